@@ -1,21 +1,32 @@
+from typing import TYPE_CHECKING, Any
+
+from .environ import EnvSnapshot
 from .errors import ArFiSettingsError
 from .handlers import (
     ArFiBaseHandler,
     ArFiHandler,
 )
-from .init_config import init_settings
 from .main import ArFiSettings
+from .provenance import FieldSource
 from .readers import (
     ArFiBaseReader,
     ArFiReader,
 )
+from .tracing import StageHook, tracing_hooks
 from .types import (
     EnvConfigDict,
     FileConfigDict,
+    LazySecretStr,
     SettingsConfigDict,
 )
 from .version import VERSION
 
+if TYPE_CHECKING:
+    from .aio import AsyncLoader, async_loader
+    from .init_config import init_settings
+    from .snapshot import SettingsSnapshot
+    from .watcher import SettingsWatcher
+
 __all__ = (
     "ArFiSettings",
     "ArFiReader",
@@ -26,8 +37,40 @@ __all__ = (
     "SettingsConfigDict",
     "FileConfigDict",
     "EnvConfigDict",
+    "LazySecretStr",
+    "EnvSnapshot",
+    "FieldSource",
+    "SettingsSnapshot",
+    "SettingsWatcher",
+    "StageHook",
+    "tracing_hooks",
+    "AsyncLoader",
+    "async_loader",
     "init_settings",
     "__version__",
 )
 
 __version__ = VERSION
+
+# Imported on first access, they are not needed to build the settings.
+_lazy_imports = {
+    "AsyncLoader": "aio",
+    "async_loader": "aio",
+    "init_settings": "init_config",
+    "SettingsSnapshot": "snapshot",
+    "SettingsWatcher": "watcher",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _lazy_imports.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module = importlib.import_module(f".{module_name}", __name__)
+    return getattr(module, name)
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_lazy_imports})
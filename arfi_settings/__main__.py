@@ -0,0 +1,47 @@
+"""Command line tools of arfi_settings.
+
+    python -m arfi_settings profile package.module.Settings [-n NUMBER]
+"""
+
+import argparse
+import sys
+
+from .errors import ArFiSettingsError
+
+
+def profile_command(args: argparse.Namespace) -> int:
+    from .profiler import Profiler, import_settings_class
+
+    settings_class = import_settings_class(args.settings_class)
+    with Profiler() as profiler:
+        if args.warmup:
+            profiler.run(settings_class, number=args.warmup)
+            profiler.root = None
+            profiler.number = 0
+        profiler.run(settings_class, number=args.number)
+    print(profiler.report())
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m arfi_settings", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    profile_parser = subparsers.add_parser("profile", help="per-stage time breakdown of the settings build")
+    profile_parser.add_argument("settings_class", help="dotted path to ArFiSettings subclass: package.module.Settings")
+    profile_parser.add_argument("-n", "--number", type=int, default=10, help="number of builds (default: 10)")
+    profile_parser.add_argument(
+        "-w", "--warmup", type=int, default=0, help="builds before profiling, excludes the cold start (default: 0)"
+    )
+    profile_parser.set_defaults(func=profile_command)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ArFiSettingsError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
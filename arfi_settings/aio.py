@@ -0,0 +1,113 @@
+import atexit
+import contextvars
+import functools
+import threading
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Iterable, TypeVar
+
+from .errors import ArFiSettingsError
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+__all__ = (
+    "AsyncLoader",
+    "async_loader",
+)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_WORKERS = 4
+
+current_loop: ContextVar["asyncio.AbstractEventLoop | None"] = ContextVar("current_loop", default=None)
+"""Event loop awaiting the build running in the worker thread."""
+
+
+class AsyncLoader:
+    """Runs the blocking settings builds in a bounded thread pool.
+
+    The event loop is not blocked by reading and parsing of the files.
+    Readers overriding `ArFiBaseReader.aread` are awaited on the event loop of the caller
+    while the rest of the build is running in the worker thread.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._executor: "ThreadPoolExecutor | None" = None
+        self._lock = threading.Lock()
+
+    def setup(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Set the maximum number of the concurrent builds."""
+
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ArFiSettingsError("`max_workers` must be a positive integer")
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.max_workers = max_workers
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @property
+    def executor(self) -> "ThreadPoolExecutor":
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="arfi_settings")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Call the function in the worker thread with the context of the caller."""
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        context.run(current_loop.set, loop)
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+class ReadExecutor:
+    """Shared thread pool reading the files concurrently, see `ArFiBaseHandler.read_workers`.
+
+    One pool is kept for the process, it is replaced by a larger one when more workers are requested.
+    The replaced pool finishes the submitted reads, the current one is shut down at the interpreter exit.
+    """
+
+    def __init__(self) -> None:
+        self.max_workers = 0
+        self._executor: "ThreadPoolExecutor | None" = None
+        self._lock = threading.Lock()
+
+    def submit(self, max_workers: int, calls: Iterable[Callable[[], T]]) -> list["Future[T]"]:
+        """Submit the calls to the pool of at least `max_workers` threads, return their futures in the same order."""
+
+        # The pool is replaced and shut down under the lock, so the calls are never submitted to a shut down pool.
+        with self._lock:
+            if self._executor is None or self.max_workers < max_workers:
+                from concurrent.futures import ThreadPoolExecutor
+
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="arfi_settings_read")
+                self.max_workers = max_workers
+            return [self._executor.submit(call) for call in calls]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the pool, the next reads create a new one."""
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.max_workers = 0
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+async_loader = AsyncLoader()
+"""Thread pool of `ArFiSettings.aload()`."""
+
+read_executor = ReadExecutor()
+"""Thread pool of `ArFiBaseHandler.read_workers`."""
+atexit.register(read_executor.shutdown)
@@ -0,0 +1,374 @@
+import copy
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable
+
+__all__ = (
+    "FrozenDict",
+    "freeze",
+    "thaw",
+    "ListingCache",
+    "ParseCache",
+    "PathCache",
+    "SecretsCache",
+)
+
+MISSING = object()
+
+
+class FrozenDict(dict):
+    """Read-only dict.
+
+    Shared between all consumers, so it never needs to be deep-copied.
+    `copy()` and `copy.deepcopy()` return an ordinary mutable dict.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"'{self.__class__.__name__}' object is read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return {copy.deepcopy(key, memo): copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+def freeze(data: Any) -> Any:
+    """Recursively convert dicts to `FrozenDict`."""
+
+    if isinstance(data, FrozenDict):
+        return data
+    if isinstance(data, dict):
+        return FrozenDict((key, freeze(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return [freeze(item) for item in data]
+    return data
+
+
+def thaw(data: Any) -> Any:
+    """Recursively copy `FrozenDict` to the ordinary dicts, the data not from the cache is returned as is."""
+
+    if isinstance(data, FrozenDict):
+        return {key: _thaw_value(value) for key, value in data.items()}
+    return data
+
+
+def _thaw_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw_value(item) for item in value]
+    return value
+
+
+class ParseCache:
+    """LRU cache of parsed files.
+
+    Entries are keyed by (resolved path, mtime_ns, size, encoding, reader),
+    so a changed file is never served from the cache.
+    The files changed within the last `RACY_NS` are not cached, a next change may keep the same mtime and size.
+    The cache is limited both by the number of entries and by the total size of the source files.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024) -> None:
+        if max_entries < 1:
+            raise ValueError("`max_entries` must be greater than 0")
+        if max_bytes < 1:
+            raise ValueError("`max_bytes` must be greater than 0")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._versions: dict[Hashable, Hashable] = dict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached source files in bytes."""
+        return self._size
+
+    @staticmethod
+    def make_key(
+        file_path: Path,
+        mtime_ns: int,
+        size: int,
+        encoding: str | None,
+        reader: str,
+    ) -> tuple[Path, int, int, str | None, str]:
+        return (file_path, mtime_ns, size, encoding, reader)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return cached data and mark it as recently used."""
+
+        with self._lock:
+            entry = self._entries.get(key, MISSING)
+            if entry is MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, data: Any, size: int) -> None:
+        """Store data parsed from the source file of the given size.
+
+        The files changed within the last `RACY_NS` are not cached.
+        """
+
+        file_path, mtime_ns, _, encoding, reader = key
+        if size > self.max_bytes or is_racy(mtime_ns):
+            return
+        version_key = (file_path, encoding, reader)
+        with self._lock:
+            previous_key = self._versions.get(version_key)
+            if previous_key is not None and previous_key != key:
+                # The file has been changed, the previous version is no longer needed.
+                self._remove(previous_key)
+            self._remove(key)
+            self._entries[key] = (data, size)
+            self._versions[version_key] = key
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, MISSING)
+        if entry is MISSING:
+            return
+        self._size -= entry[1]
+        file_path, _, _, encoding, reader = key
+        version_key = (file_path, encoding, reader)
+        if self._versions.get(version_key) == key:
+            del self._versions[version_key]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class PathCache:
+    """Cache of the file system lookups.
+
+    Keeps both found and absent paths, so repeated lookups do no syscalls.
+    Relative paths are keyed by the absolute ones, so the results do not depend on the previous working directory.
+    Call `clear()` after the files have been created, removed or moved.
+    """
+
+    def __init__(self) -> None:
+        self._is_file: dict[Path, bool] = dict()
+        self._is_dir: dict[Path, bool] = dict()
+        self._resolved: dict[Path, Path] = dict()
+
+    def __len__(self) -> int:
+        return len(self._is_file) + len(self._is_dir) + len(self._resolved)
+
+    def is_file(self, path: Path) -> bool:
+        path = absolute_path(path)
+        result = self._is_file.get(path)
+        if result is None:
+            result = self._is_file[path] = path.is_file()
+        return result
+
+    def is_dir(self, path: Path) -> bool:
+        path = absolute_path(path)
+        result = self._is_dir.get(path)
+        if result is None:
+            result = self._is_dir[path] = path.is_dir()
+        return result
+
+    def resolve(self, path: Path) -> Path:
+        path = absolute_path(path)
+        result = self._resolved.get(path)
+        if result is None:
+            result = self._resolved[path] = path.resolve()
+        return result
+
+    def clear(self) -> None:
+        """Remove all entries."""
+
+        self._is_file.clear()
+        self._is_dir.clear()
+        self._resolved.clear()
+
+
+def absolute_path(path: Path) -> Path:
+    """Return the absolute path, the relative one is joined to the current working directory."""
+
+    if path.is_absolute():
+        return path
+    return Path(os.path.abspath(path))
+
+
+CASE_INSENSITIVE_FS = sys.platform in ("win32", "darwin")
+"""The default file systems of the platform ignore the case of the file names."""
+
+RACY_NS = 1_000_000_000
+"""Entries changed more recently are not cached, a next change may keep the same mtime."""
+
+
+def is_racy(mtime_ns: int) -> bool:
+    """Whether the mtime is too recent to detect the next change by it."""
+
+    return time.time_ns() - mtime_ns < RACY_NS
+
+
+class ListingCache:
+    """Cache of the directory listings.
+
+    The listing of a directory is reused while the mtime of the directory is unchanged,
+    so checking any number of files in the directory costs one `os.stat()`.
+    The directories changed within the last `RACY_NS` are not cached.
+    """
+
+    def __init__(self) -> None:
+        self._listings: dict[str, tuple[int, frozenset[str], frozenset[str]]] = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def is_file(self, file_path: Path) -> bool:
+        """Check whether the file exists, by the listing of its directory."""
+
+        path, name = os.path.split(os.fspath(file_path))
+        path = path or os.curdir
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        with self._lock:
+            listing = self._listings.get(path)
+        if listing is None or listing[0] != mtime_ns:
+            try:
+                files = frozenset(name for name, _, is_file, _ in scan_dir(path) if is_file)
+            except OSError:
+                return False
+            listing = (mtime_ns, files, frozenset(name.casefold() for name in files))
+            if not is_racy(mtime_ns):
+                with self._lock:
+                    self._listings[path] = listing
+        if name in listing[1]:
+            return True
+        return CASE_INSENSITIVE_FS and name.casefold() in listing[2]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+
+        with self._lock:
+            self._listings.clear()
+
+
+class SecretsCache:
+    """Cache of the secrets directories listings and the secret files.
+
+    The listing of a directory is reused while the mtime of the directory is unchanged.
+    The contents of the files are cached only with `max_files` greater than 0,
+    they are the plaintext secrets kept in memory until they are evicted or `clear()` is called.
+    A cached file is read again only when its mtime or size is changed, the least recently used files are evicted.
+    The entries changed within the last `RACY_NS` are not cached.
+    """
+
+    def __init__(self, max_files: int = 0) -> None:
+        if max_files < 0:
+            raise ValueError("`max_files` must be greater than or equal to 0")
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._listings: dict[str, tuple[int, list[tuple[str, str, bool, bool]]]] = dict()
+        self._files: OrderedDict[tuple[str, str | None], tuple[int, int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def listdir(self, path: str) -> list[tuple[str, str, bool, bool]]:
+        """Return (name, path, is_file, is_dir) of the directory entries, symlinks to directories are not dirs."""
+
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            listing = self._listings.get(path)
+        if listing is not None and listing[0] == mtime_ns:
+            return listing[1]
+        entries = scan_dir(path)
+        if not is_racy(mtime_ns):
+            with self._lock:
+                self._listings[path] = (mtime_ns, entries)
+        return entries
+
+    def read_text(self, path: str, encoding: str | None) -> str:
+        """Return the stripped content of the file."""
+
+        if not self.max_files:
+            return read_text(path, encoding)
+        stat = os.stat(path)
+        key = (path, encoding)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._files.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        text = read_text(path, encoding)
+        if not is_racy(stat.st_mtime_ns):
+            with self._lock:
+                self._files[key] = (stat.st_mtime_ns, stat.st_size, text)
+                self._files.move_to_end(key)
+                while len(self._files) > self.max_files:
+                    self._files.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        """Remove all entries."""
+
+        with self._lock:
+            self._listings.clear()
+            self._files.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def scan_dir(path: str) -> list[tuple[str, str, bool, bool]]:
+    """Return (name, path, is_file, is_dir) of the directory entries, symlinks to directories are not dirs."""
+
+    with os.scandir(path) as entries:
+        return [(entry.name, entry.path, entry.is_file(), entry.is_dir(follow_symlinks=False)) for entry in entries]
+
+
+def read_text(path: str, encoding: str | None) -> str:
+    """Return the stripped content of the file."""
+
+    with open(path, encoding=encoding) as file:
+        return file.read().strip()
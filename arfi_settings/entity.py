@@ -41,5 +41,6 @@ class ModelConfigEntity(StrEnum):
     ENCODING = "encoding"
     CLI = "cli"
     SECRETS_DIR = "secrets_dir"
+    SECRETS_LAZY = "secrets_lazy"
     INCLUDE_INHERIT_PARENT = "include_inherit_parent"
     EXCLUDE_INHERIT_PARENT = "exclude_inherit_parent"
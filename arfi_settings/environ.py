@@ -0,0 +1,171 @@
+import os
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping
+
+__all__ = (
+    "EnvIndex",
+    "EnvSnapshot",
+)
+
+
+class EnvTrieNode:
+    """Node of the prefix trie over environment variable names."""
+
+    __slots__ = ("children", "keys")
+
+    def __init__(self) -> None:
+        self.children: dict[str, "EnvTrieNode"] = dict()
+        self.keys: list[str] = []
+        """Original keys of the whole subtree in source order."""
+
+
+class EnvIndex:
+    """Inverted index over environment variables.
+
+    Holds the exact map, the lower-cased map and prefix tries keyed on
+    `env_nested_delimiter` segments, so lookups cost time proportional
+    to the number of matches, not to the size of the environment.
+    """
+
+    __slots__ = (
+        "data",
+        "lower_data",
+        "lower_keys",
+        "_lower_of",
+        "_order",
+        "_tries",
+    )
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        self.data = data
+        """Exact map. Key - original name of the variable."""
+        self.lower_data: dict[str, Any] = dict()
+        """Lower-cased map. The first found value wins."""
+        self.lower_keys: dict[str, list[str]] = dict()
+        """Original names of the variable in source order. Key - lower-cased name."""
+        self._lower_of: dict[str, str] = dict()
+        self._order: dict[str, int] = dict()
+        self._tries: dict[str, EnvTrieNode] = dict()
+        for order, key in enumerate(data):
+            if not isinstance(key, str):
+                continue
+            lower_key = key.lower()
+            if lower_key not in self.lower_data:
+                self.lower_data[lower_key] = data[key]
+            self.lower_keys.setdefault(lower_key, []).append(key)
+            self._lower_of[key] = lower_key
+            self._order[key] = order
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get_trie(self, delimiter: str) -> EnvTrieNode:
+        """Return the prefix trie for the delimiter, build it on first use."""
+
+        trie = self._tries.get(delimiter)
+        if trie is not None:
+            return trie
+        trie = EnvTrieNode()
+        for key, lower_key in self._lower_of.items():
+            node = trie
+            node.keys.append(key)
+            for segment in lower_key.split(delimiter):
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = EnvTrieNode()
+                child.keys.append(key)
+                node = child
+        self._tries[delimiter] = trie
+        return trie
+
+    def get_keys(self, name: str) -> list[str]:
+        """Return original names matching the name case-insensitively, in source order."""
+
+        return self.lower_keys.get(name.lower(), [])
+
+    def search_prefix(self, prefix: str, delimiter: str = "") -> list[str]:
+        """Return original names which start with the prefix case-insensitively, in source order."""
+
+        prefix = prefix.lower()
+        if not delimiter:
+            return [key for key, lower_key in self._lower_of.items() if lower_key.startswith(prefix)]
+
+        *segments, partial = prefix.split(delimiter)
+        node = self.get_trie(delimiter)
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+        if not partial:
+            keys = node.keys
+        else:
+            # The delimiter inside the last segment may be split in another way, so the children
+            # which are prefixes of the last segment are also candidates.
+            keys = []
+            for name, child in node.children.items():
+                if name.startswith(partial) or partial.startswith(name):
+                    keys.extend(child.keys)
+            keys.sort(key=self._order.__getitem__)
+        lower_of = self._lower_of
+        return [key for key in keys if lower_of[key].startswith(prefix)]
+
+
+class EnvSnapshot(Mapping[str, str]):
+    """Immutable view of the environment variables.
+
+    The snapshot is taken once for the root settings and shared by every nested settings of the tree,
+    together with its index. Call `refresh()` to take the environment again, e.g. for hot-reload.
+    """
+
+    __slots__ = (
+        "_data",
+        "_index",
+    )
+
+    def __init__(self, environ: Mapping[str, str] | None = None) -> None:
+        self._take(environ)
+
+    def _take(self, environ: Mapping[str, str] | None = None) -> None:
+        if environ is None:
+            environ = os.environ
+        self._data = MappingProxyType(dict(environ))
+        self._index = None
+
+    def __getitem__(self, key: str) -> str:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self._data)} variables)"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, EnvSnapshot):
+            return self._data == other._data
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __copy__(self) -> "EnvSnapshot":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "EnvSnapshot":
+        return self
+
+    @property
+    def index(self) -> EnvIndex:
+        """Inverted index of the snapshot, built on first use."""
+
+        if self._index is None:
+            self._index = EnvIndex(self._data)
+        return self._index
+
+    def refresh(self, environ: Mapping[str, str] | None = None) -> "EnvSnapshot":
+        """Take the environment again and drop the index."""
+
+        self._take(environ)
+        return self
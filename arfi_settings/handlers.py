@@ -1,4 +1,4 @@
-import copy
+import contextvars
 import functools
 import itertools
 import json
@@ -7,25 +7,37 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Literal, Union
 
-from pydantic import AliasChoices, AliasPath, BaseModel
+from pydantic import AliasChoices, AliasPath, BaseModel, SecretStr
 from pydantic._internal._typing_extra import origin_is_union
-from pydantic._internal._utils import deep_update
 from pydantic_core import PydanticUndefined
 from typing_extensions import get_args, get_origin
 
+from .cache import thaw
 from .constants import ORDERED_SETTINGS
+from .environ import EnvIndex, EnvSnapshot
 from .errors import ArFiSettingsError
+from .merge import LayeredMerge, merge_layers
+from .plans import HandlerPlan, plan_cache
+from .provenance import FieldSource, current_reuse
 from .readers import ArFiBaseReader, ArFiReader
 from .schemes import (
     EnvConfigSchema,
     FileConfigSchema,
     SettingsConfigSchema,
 )
+from .tracing import (
+    STAGE_FILE,
+    STAGE_MAIN_HANDLER,
+    STAGE_ORDERED_SETTINGS,
+    STAGE_PLAN,
+    tracing_hooks,
+)
 from .types import PathType
 from .utils import (
     allow_json_parse_failure,
     create_dict_for_path,
     extract_unique_annotations,
+    get_value_decoder,
     is_pydantic,
     is_settings,
     search_dict_for_path,
@@ -62,6 +74,11 @@ class ArFiBaseHandler(ABC):
     """Settings reader class.
     Can be overridden in a handler that is defined in the passed settings class.
     """
+    read_workers: int = 0
+    """Number of the threads reading the config and .env files concurrently.
+    The files are merged in the priority order anyway, 0 or 1 reads them one after another.
+    The thread pool is shared by all handlers, it has the largest number of the threads requested.
+    """
     fields_names: set[str]
     """The names of all fields that are in the passed settings class."""
     fields_is_settings: list[str]
@@ -152,10 +169,39 @@ class ArFiBaseHandler(ABC):
     """
     Fields that can be ignored when parsing JSON.
     """
+    fields_decoders: dict[str, Callable[[Any], Any]]
+    """
+    Decoders of the string values from environment.
+    Key - field name
+    """
     data: dict[str, Any]
     """
     Data returned by the handler.
     """
+    provenance: dict[str, FieldSource]
+    """
+    Source of the resolved value of every field, filled by the main handler.
+    Key - field name
+    """
+    file_sources: dict[str, dict[str, Path]]
+    """
+    The file which provided the value of the field for the config and .env file handlers.
+    Key - handler name, field name
+    """
+    source_keys: dict[str, dict[str, str]]
+    """
+    The variable which provided the value of the field for the environment and .env file handlers.
+    Key - handler name, field name
+    """
+    env_snapshot: EnvSnapshot | None
+    """
+    Environment snapshot shared by the whole settings tree.
+    """
+    plan: HandlerPlan
+    """
+    Compiled information about fields and aliases.
+    Shared between all handlers of the same settings class, must not be modified.
+    """
 
     def __init__(
         self,
@@ -165,8 +211,9 @@ class ArFiBaseHandler(ABC):
     ) -> None:
         super().__init__()
         self.settings_class = settings_class
-        self.reader_class.BASE_DIR = settings_class.BASE_DIR
-        self.reader_class.ROOT_DIR = settings_class.root_dir
+        # Passed to every reader, the class attributes of the reader are shared by the concurrent builds.
+        self.base_dir = settings_class.BASE_DIR
+        self.root_dir = settings_class.root_dir
         self.init_kwargs = init_kwargs
         self.config = self.settings_class.settings_config
         if handler:
@@ -180,23 +227,42 @@ class ArFiBaseHandler(ABC):
             self.config.conf_custom_ext_handler,
         )
         self.data = {}
-        self.fields_is_settings = []
-        self.fields_is_pydantic = []
-        self.pydantic_single_fields = dict()
-        self.fields_names = set()
-        self.field_aliases = dict()
-        self.field_aliases_not_case_sensitive = dict()
-        self.alias_fields = dict()
-        self.alias_fields_not_case_sensitive = dict()
-        self.fields_alias_path = dict()
-        self.fields_alias_path_not_case_sensitive = dict()
-        self.fields_defaults = dict()
-        self.fields_discriminator = dict()
-        self.pydantic_aliases_info = dict()
-        self.allowed_json_parse_failure_fields = set()
+        self.provenance = {}
+        self.file_sources = {}
+        self.source_keys = {}
+        self.env_snapshot = getattr(settings_class, "_env_snapshot", None)
+        if tracing_hooks.enabled:
+            self.plan = tracing_hooks.call(STAGE_PLAN, type(settings_class), None, None, self._load_plan)
+        else:
+            self.plan = self._load_plan()
+        self._prepare_init_kwargs()
+
+    def _load_plan(self) -> HandlerPlan:
+        """Return compiled plan of the settings class fields and set it up to the handler."""
+
+        settings_type = self.settings_class
+        if not isinstance(settings_type, type):
+            settings_type = type(settings_type)
+        key = plan_cache.get_key(self)
+        plan = plan_cache.get(settings_type, key)
+        if plan is not None:
+            self._setup_plan(plan)
+            return plan
+
+        plan = HandlerPlan(model_fields=settings_type.model_fields)
+        self._setup_plan(plan)
         self._extract_fields_info()
         self._extract_alias_info()
-        self._prepare_init_kwargs()
+        plan_cache.set(settings_type, key, plan)
+        return plan
+
+    def _setup_plan(self, plan: HandlerPlan) -> None:
+        """Share the plan containers with the handler without copying."""
+
+        for name in HandlerPlan.__slots__:
+            if name == "model_fields":
+                continue
+            setattr(self, name, getattr(plan, name))
 
     def _prepare_init_kwargs(self) -> None:
         """Separate init and handler kwargs."""
@@ -221,15 +287,16 @@ class ArFiBaseHandler(ABC):
             for field_name, field_value in self.init_kwargs.items():
                 if field_name in self.fields_is_settings and field_value:
                     if isinstance(field_value, dict):
-                        self.init_kwargs[field_name]["_init_value"] = field_value
+                        self.init_kwargs[field_name] = {**field_value, "_init_value": field_value}
         else:
-            self.data = copy.deepcopy(self.init_kwargs)
+            # The parent has created new dicts for the nested settings, their values are only read.
+            self.data = dict(self.init_kwargs)
             self.init_kwargs = dict()
             if _init_value:
                 _init_value = self._convert_data_to_field_names(_init_value)
                 for field_name, field_value in _init_value.items():
                     if field_name in self.fields_is_settings and field_value:
-                        _init_value[field_name]["_init_value"] = field_value
+                        _init_value[field_name] = {**field_value, "_init_value": field_value}
                 self.init_kwargs = _init_value
 
     def __init_subclass__(cls):
@@ -363,7 +430,7 @@ class ArFiBaseHandler(ABC):
                         if alias_path := fields_alias_path.get(alias):
                             alias_dict = create_dict_for_path(alias_path, value)
                             if valid_data.get(alias):
-                                valid_data[alias].update(alias_dict[alias])
+                                valid_data[alias] = {**valid_data[alias], **alias_dict[alias]}
                             else:
                                 valid_data.update(alias_dict)
                             fields_set.add(field_name)
@@ -381,16 +448,22 @@ class ArFiBaseHandler(ABC):
         """Generate settings data."""
 
         handler = self._get_main_handler(self.handler)
-        self.data = handler()
+        if tracing_hooks.enabled:
+            self.data = tracing_hooks.call(
+                STAGE_MAIN_HANDLER, type(self.settings_class), handler.__name__, None, handler
+            )
+        else:
+            self.data = handler()
 
-        _handler_tree = copy.deepcopy(self.settings_class._handler_tree)
-        _handler_parent_mode_dir = copy.deepcopy(self.settings_class._handler_parent_mode_dir)
-        _handler_ordered_settings = copy.deepcopy(self.ordered_settings)
+        # The context of the nested settings is immutable, so it is shared instead of copied.
+        _handler_tree = self.settings_class._handler_tree
+        _handler_parent_mode_dir = self.settings_class._handler_parent_mode_dir
+        _handler_ordered_settings = tuple(self.ordered_settings)
         _handler_parent_file_config = FileConfigSchema(**self.settings_class.computed_file_config)
         _handler_parent_env_config = EnvConfigSchema(**self.settings_class.computed_env_config)
 
         if self.settings_class.mode_dir is not None:
-            _handler_parent_mode_dir.append(self.settings_class.mode_dir)
+            _handler_parent_mode_dir = (*_handler_parent_mode_dir, self.settings_class.mode_dir)
         read_config_data = {
             "_read_config": True,
             "_handler_value": True,
@@ -402,20 +475,21 @@ class ArFiBaseHandler(ABC):
             "_handler_parent_env_config": _handler_parent_env_config,
             "_handler_main_handler": self.settings_class._handler,
         }
+        if self.fields_is_settings:
+            read_config_data["_handler_env_snapshot"] = self._get_env_snapshot()
+        reuse = current_reuse.get()
         for field in self.fields_is_settings:
             if not self.data.get(field):
                 self.data[field] = {}
             if not isinstance(self.data[field], dict):
                 continue
-            self.data[field].update(read_config_data)
+            self.data[field] = {**self.data[field], **read_config_data}
             self.data[field]["_handler_mode_dir_attr"] = field
             if self.config.env_case_sensitive:
                 field_aliases = self.field_aliases[field]
             else:
                 field_aliases = self.field_aliases_not_case_sensitive[field]
-            product_tree = copy.deepcopy(_handler_tree)
-            product_tree.append(field_aliases)
-            self.data[field]["_handler_tree"] = product_tree
+            self.data[field]["_handler_tree"] = (*_handler_tree, tuple(field_aliases))
 
             if field in self.fields_defaults:
                 instance_id = None
@@ -444,6 +518,11 @@ class ArFiBaseHandler(ABC):
                 else:
                     if not self.data[field].get(discriminator_key) and discriminator_value is not PydanticUndefined:
                         self.data[field][discriminator_key] = discriminator_value
+
+            if reuse is not None:
+                instance = reuse.lookup(field, self.data[field])
+                if instance is not None:
+                    self.data[field] = instance
         self.data = self._convert_data_to_valid_aliases(self.data)
 
         return self.data
@@ -522,6 +601,17 @@ class ArFiBaseHandler(ABC):
 
         from arfi_settings import ArFiSettings
 
+        # The validators running before the field validation may accept any decoded value.
+        decorators = self.settings_class.__pydantic_decorators__
+        validated_fields = set()
+        if any(validator.info.mode != "after" for validator in decorators.model_validators.values()):
+            validated_fields.update(self.settings_class.model_fields)
+        for validator in decorators.field_validators.values():
+            if validator.info.mode != "after":
+                if "*" in validator.info.fields:
+                    validated_fields.update(self.settings_class.model_fields)
+                validated_fields.update(validator.info.fields)
+
         for field_name, field in self.settings_class.model_fields.items():
             self.fields_names.add(field_name)
             unique_annotations = extract_unique_annotations(field.annotation)
@@ -565,6 +655,12 @@ class ArFiBaseHandler(ABC):
             if field_name not in self.fields_is_pydantic:
                 if allow_json_parse_failure(field, field_name):
                     self.allowed_json_parse_failure_fields.add(field_name)
+                if field_name not in self.fields_is_settings:
+                    self.fields_decoders[field_name] = get_value_decoder(
+                        field,
+                        field_name,
+                        validated=field_name in validated_fields,
+                    )
 
     def _search_field_keys_info(
         self, model: type[BaseModel]
@@ -812,7 +908,7 @@ class ArFiBaseHandler(ABC):
         for ext in self.config.conf_ext:
             if not ext:
                 file_path = file_path.with_suffix("")
-                if self.reader_class.is_exist_file(file_path):
+                if self.reader_class.is_listed_file(file_path):
                     name_custom_ext_handler = self.conf_custom_ext_handler.get("")
                     if name_custom_ext_handler is None:
                         raise ArFiSettingsError(f"Missing non extension handler for file: `{file_path.as_posix()}`")
@@ -822,7 +918,7 @@ class ArFiBaseHandler(ABC):
                 ext = ext.lstrip(".")
                 file_ext = f".{ext}"
                 file_path = file_path.with_suffix(file_ext)
-                if self.reader_class.is_exist_file(file_path):
+                if self.reader_class.is_listed_file(file_path):
                     name_custom_ext_handler = self.conf_custom_ext_handler.get(ext)
                     if name_custom_ext_handler:
                         ext = name_custom_ext_handler.lstrip(".")
@@ -856,55 +952,74 @@ class ArFiBaseHandler(ABC):
             name = f"{name}_{suffix}"
         return name
 
+    def _create_reader(self, **kwargs: Any) -> ArFiBaseReader:
+        """Create reader with the base and root dirs of the settings."""
+
+        return self.reader_class(base_dir=self.base_dir, root_dir=self.root_dir, **kwargs)
+
+    @staticmethod
+    def _read(reader: ArFiBaseReader) -> Any:
+        """Read the source, the overridden `aread` is awaited on the loop of `ArFiSettings.aload()`."""
+
+        from .aio import current_loop
+
+        loop = current_loop.get()
+        if loop is None or type(reader).aread is ArFiBaseReader.aread:
+            return reader.read()
+
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(reader.aread(), loop).result()
+
     def toml_ext_handler(self, file_path: PathType) -> dict[str, Any]:
         """Handles settings from .toml file."""
 
-        reader = self.reader_class(
+        reader = self._create_reader(
             reader="toml",
             file_path=file_path,
             file_encoding=self.config.conf_file_encoding,
             ignore_missing=self.config.conf_ignore_missing,
         )
-        data = reader.read()
+        data = dict(thaw(self._read(reader)))
         data["__case_sensitive"] = self.config.conf_case_sensitive
         return data
 
     def yaml_ext_handler(self, file_path: PathType) -> dict[str, Any]:
         """Handles settings from .yaml file."""
 
-        reader = self.reader_class(
+        reader = self._create_reader(
             reader="yaml",
             file_path=file_path,
             file_encoding=self.config.conf_file_encoding,
             ignore_missing=self.config.conf_ignore_missing,
         )
-        data = reader.read() or {}
+        data = dict(thaw(self._read(reader)) or {})
         data["__case_sensitive"] = self.config.conf_case_sensitive
         return data
 
     def yml_ext_handler(self, file_path: PathType) -> dict[str, Any]:
         """Handles settings from .yml file."""
 
-        reader = self.reader_class(
+        reader = self._create_reader(
             reader="yaml",
             file_path=file_path,
             file_encoding=self.config.conf_file_encoding,
             ignore_missing=self.config.conf_ignore_missing,
         )
-        data = reader.read() or {}
+        data = dict(thaw(self._read(reader)) or {})
         data["__case_sensitive"] = self.config.conf_case_sensitive
         return data
 
     def json_ext_handler(self, file_path: PathType) -> dict[str, Any]:
         """Handles settings from .json file."""
 
-        reader = self.reader_class(
+        reader = self._create_reader(
             reader="json",
             file_path=file_path,
             file_encoding=self.config.conf_file_encoding,
             ignore_missing=self.config.conf_ignore_missing,
         )
-        data = reader.read()
+        data = dict(thaw(self._read(reader)))
         data["__case_sensitive"] = self.config.conf_case_sensitive
         return data
 
@@ -913,8 +1028,8 @@ class ArFiBaseHandler(ABC):
 
         data: dict[str, Any] = {}
         if self.config.cli:
-            reader = self.reader_class(is_cli=True)
-            data = reader.read()
+            reader = self._create_reader(is_cli=True)
+            data = self._read(reader)
             data["__case_sensitive"] = self.config.case_sensitive
         return data
 
@@ -927,59 +1042,88 @@ class ArFiBaseHandler(ABC):
         """Handles settings from environment."""
 
         data: dict[str, Any] = {}
-        reader = self.reader_class(
+        reader = self._create_reader(
             is_env=True,
+            env_snapshot=self._get_env_snapshot(),
+        )
+        reader_data = self._read(reader)
+        data = self._convert_env_data_by_fields_names(
+            data=reader_data,
+            handler="env",
+            case_sensitive=self.config.env_case_sensitive,
+            source_keys=self.source_keys.setdefault("env_ordered_settings_handler", {}),
         )
-        reader_data = reader.read()
-        reader_data["__case_sensitive"] = self.config.env_case_sensitive
-        data = self._convert_env_data_by_fields_names(data=reader_data, handler="env")
         return data
 
+    def _get_env_snapshot(self) -> EnvSnapshot:
+        """Return environment snapshot of the settings tree, take it on first use."""
+
+        if self.env_snapshot is None:
+            self.env_snapshot = EnvSnapshot()
+        return self.env_snapshot
+
     def env_file_ordered_settings_handler(self) -> dict[str, Any]:
         """Handles settings from .env file."""
 
-        data: dict[str, Any] = {}
+        layers = LayeredMerge()
+        reads = []
         for file_path in self.config.env_path:
-            reader = self.reader_class(
+            reader = self._create_reader(
                 file_path=file_path,
                 is_env_file=True,
                 file_encoding=self.config.env_file_encoding,
                 ignore_missing=self.config.env_ignore_missing,
+                env_snapshot=self._get_env_snapshot(),
             )
-            reader_data = reader.read()
-            reader_data["__case_sensitive"] = self.config.env_case_sensitive
+            reads.append(("env_file_ordered_settings_handler", Path(file_path), self._read, {"reader": reader}))
+        source_keys = self.source_keys.setdefault("env_file_ordered_settings_handler", {})
+        for (_, file_path, _, _), reader_data in zip(reads, self._read_files(reads)):
+            file_keys: dict[str, str] = {}
             env_file_data = self._convert_env_data_by_fields_names(
                 data=reader_data,
                 handler="env_file",
                 env_file=file_path,
+                case_sensitive=self.config.env_case_sensitive,
+                source_keys=file_keys,
             )
-            data = deep_update(data, env_file_data)
+            layers.add(env_file_data)
+            self._add_file_sources("env_file_ordered_settings_handler", env_file_data, file_path)
+            for key in env_file_data:
+                if key in file_keys:
+                    source_keys[key] = file_keys[key]
+                else:
+                    source_keys.pop(key, None)
 
-        return data
+        return layers.materialize()
 
     def _convert_env_data_by_fields_names(
         self,
         data: dict[str, Any],
         handler: Literal["env_file", "env"],  # for feature debug
         env_file: Path | None = None,  # for feature debug
+        case_sensitive: bool | None = None,
+        source_keys: dict[str, str] | None = None,
     ) -> dict[str, Any]:
-        """Converts data from environment to data with fields names."""
+        """Converts data from environment to data with fields names.
+
+        source_keys: dict The variables of the values found by the exact names are added to it by the field names
+        """
 
         valid_data: dict[str, Any] = dict()
         fields_set = set()
-        case_sensitive = data.get("__case_sensitive", self.config.case_sensitive)
-        lower_data = dict()
+        if case_sensitive is None:
+            case_sensitive = data.get("__case_sensitive", self.config.case_sensitive)
+        if isinstance(data, EnvSnapshot):
+            env_index = data.index
+        else:
+            env_index = EnvIndex(data)
+        lower_data = env_index.lower_data
         if case_sensitive:
             dict_fields_alias = self.field_aliases
             dict_fields_alias_path = self.fields_alias_path
         else:
             dict_fields_alias = self.field_aliases_not_case_sensitive
             dict_fields_alias_path = self.fields_alias_path_not_case_sensitive
-            for key, value in data.items():
-                if isinstance(key, str):
-                    key = key.lower()
-                if key not in lower_data:
-                    lower_data[key] = value
         env_prefix = self.config.env_prefix
         env_nested_delimiter = self.config.env_nested_delimiter
         handler_tree = self.settings_class._handler_tree
@@ -1009,6 +1153,8 @@ class ArFiBaseHandler(ABC):
                 lower_data=lower_data,
                 fields_set=fields_set,
                 fields_alias_path=fields_alias_path,
+                env_index=env_index,
+                source_keys=source_keys,
             )
 
             # TODO: Combine fields_is_settings и fields_is_pydantic. Take out only the discriminator !!!
@@ -1021,6 +1167,7 @@ class ArFiBaseHandler(ABC):
                     found_value=found_value,
                     data=data,
                     lower_data=lower_data,
+                    env_index=env_index,
                 )
             elif field_name in self.fields_is_pydantic:
                 if isinstance(found_value, str):
@@ -1033,16 +1180,11 @@ class ArFiBaseHandler(ABC):
                         env_nested_delimiter=env_nested_delimiter,
                         found_value=found_value,
                         data=data,
+                        env_index=env_index,
                     )
             else:
                 if found_value is not PydanticUndefined:
-                    try:
-                        found_value = json.loads(found_value)
-                    except (ValueError, json.decoder.JSONDecodeError) as e:
-                        if field_name in self.allowed_json_parse_failure_fields:
-                            pass
-                        else:
-                            raise e
+                    found_value = self.fields_decoders[field_name](found_value)
 
             if found_value is not PydanticUndefined:
                 valid_data[field_name] = found_value
@@ -1058,9 +1200,14 @@ class ArFiBaseHandler(ABC):
         lower_data: dict[str, Any],
         fields_set: set[str],
         fields_alias_path: dict[str, AliasPath | list[str | int]],
+        env_index: EnvIndex | None = None,
+        source_keys: dict[str, str] | None = None,
     ) -> Union[dict[str, Any], PydanticUndefined]:
         """Searches exact value in environment."""
 
+        if env_index is None:
+            env_index = EnvIndex(data)
+
         found_value = PydanticUndefined
         for prefix in parents_prefixis:
             for alias in aliases:
@@ -1069,18 +1216,24 @@ class ArFiBaseHandler(ABC):
                     break
 
                 value = data.get(search_alias, PydanticUndefined)
+                source_key = search_alias
                 if not self.config.env_case_sensitive and value is PydanticUndefined:
                     if prefix:
-                        for k, v in data.items():
+                        for k in env_index.get_keys(search_alias):
                             if k.startswith(prefix):
-                                if k.lower() == search_alias.lower():
-                                    value = v
+                                value = data[k]
+                                source_key = k
 
                     if value is PydanticUndefined:
                         search_alias = f"{prefix}{alias.lower()}"
                         value = lower_data.get(search_alias, PydanticUndefined)
+                        if value is not PydanticUndefined:
+                            # The first found variable wins
+                            source_key = env_index.get_keys(search_alias)[0]
 
                 if value is not PydanticUndefined:
+                    if source_keys is not None:
+                        source_keys[field_name] = source_key
                     if fields_alias_path:
                         if alias_path := fields_alias_path.get(alias):
                             value = json.loads(value)
@@ -1112,6 +1265,7 @@ class ArFiBaseHandler(ABC):
         found_value: Union[dict, PydanticUndefined],
         data: dict[str, Any],
         lower_data: dict[str, Any],
+        env_index: EnvIndex | None = None,
     ) -> Union[dict[str, Any], PydanticUndefined]:
         """Searches value in arfi_settings fields."""
 
@@ -1135,9 +1289,11 @@ class ArFiBaseHandler(ABC):
                 env_nested_delimiter=env_nested_delimiter,
                 found_value=found_value,
                 data=data,
+                env_index=env_index,
             )
         else:
             list_pydantic_aliases_info = self.pydantic_aliases_info[field_name]
+            layers = LayeredMerge()
             for field_aliases_info_dict in reversed(list_pydantic_aliases_info):
                 # Search velue of nested key
                 nested_key_dict = self._search_nested_key_value(
@@ -1148,11 +1304,13 @@ class ArFiBaseHandler(ABC):
                     found_value=found_value,
                     data=data,
                     field_aliases_info_dict=field_aliases_info_dict,
+                    env_index=env_index,
                 )
-                if nested_key_dict:
-                    if found_value is PydanticUndefined:
-                        found_value = dict()
-                    found_value = deep_update(found_value, nested_key_dict)
+                layers.add(nested_key_dict)
+            if layers:
+                if found_value is PydanticUndefined:
+                    found_value = dict()
+                found_value = merge_layers([found_value, *layers.layers])
 
         # Search discriminator
         discriminator = self.fields_discriminator.get(field_name)
@@ -1183,6 +1341,7 @@ class ArFiBaseHandler(ABC):
         env_nested_delimiter: str,
         found_value: Union[dict, PydanticUndefined],
         data: dict[str, Any],
+        env_index: EnvIndex | None = None,
     ) -> Union[dict[str, Any], PydanticUndefined]:
         """Searches value in pydantic single fields."""
 
@@ -1203,12 +1362,13 @@ class ArFiBaseHandler(ABC):
             found_value=found_value,
             data=data,
             field_aliases_info_dict=self.pydantic_single_fields[field_name],
+            env_index=env_index,
         )
 
         if nested_key_dict:
             if found_value is PydanticUndefined:
                 found_value = dict()
-            found_value = deep_update(found_value, nested_key_dict)
+            found_value = merge_layers([found_value, nested_key_dict])
         return found_value
 
     def _search_nested_key_value(
@@ -1220,6 +1380,7 @@ class ArFiBaseHandler(ABC):
         found_value: Union[dict, PydanticUndefined],
         data: dict[str, Any],
         field_aliases_info_dict: dict[str, Any],
+        env_index: EnvIndex | None = None,
     ) -> dict[str, Any]:
         """Search nested key value in environment variable."""
 
@@ -1228,12 +1389,17 @@ class ArFiBaseHandler(ABC):
         dict_alias_path = field_aliases_info_dict["dict_alias_path"]
         nested_key_lower = {i.lower() for i in list_nested_keys}
 
-        nested_key_dict = dict()
+        nested_key_layers = LayeredMerge()
+        if not nested_key_lower:
+            return dict()
+        if env_index is None:
+            env_index = EnvIndex(data)
         for prefix in reversed(parents_prefixis):
             for alias in reversed(aliases):
                 start_key_prefix = f"{prefix}{alias}{env_nested_delimiter}"
                 env_find_data = dict()
-                for env_key, env_value in data.items():
+                for env_key in env_index.search_prefix(start_key_prefix, env_nested_delimiter):
+                    env_value = data[env_key]
                     if env_key.startswith(start_key_prefix):
                         env_nested_key = env_key[len(start_key_prefix) :]
                         if env_nested_key.lower() in nested_key_lower:
@@ -1260,16 +1426,16 @@ class ArFiBaseHandler(ABC):
                                         field_name=field_name,
                                         is_alias_path=path_alias,
                                     )
-                                    nested_key_dict = deep_update(nested_key_dict, found_dict)
+                                    nested_key_layers.add(found_dict)
                     else:
                         for nested_key in reversed(list_nested_keys):
                             is_alias_path = False
                             alias_path_key = nested_key.split(env_nested_delimiter)[0]
                             if dict_alias_path.get(alias_path_key):
                                 is_alias_path = True
-                            exact_match_dict = dict()
-                            middle_match_dict = dict()
-                            lower_match_dict = dict()
+                            exact_match_layers = LayeredMerge()
+                            middle_match_layers = LayeredMerge()
+                            lower_match_layers = LayeredMerge()
                             for env_key, env_value in env_find_data.items():
                                 env_nested_key = env_key[len(start_key_prefix) :]
 
@@ -1283,7 +1449,7 @@ class ArFiBaseHandler(ABC):
                                             field_name=field_name,
                                             is_alias_path=is_alias_path,
                                         )
-                                        exact_match_dict = deep_update(exact_match_dict, found_dict)
+                                        exact_match_layers.add(found_dict)
                                     elif nested_key.lower() == env_nested_key.lower():
                                         key_path = env_nested_key.split(env_nested_delimiter)
                                         found_dict = create_dict_for_path(key_path, env_value)
@@ -1293,7 +1459,7 @@ class ArFiBaseHandler(ABC):
                                             field_name=field_name,
                                             is_alias_path=is_alias_path,
                                         )
-                                        middle_match_dict = deep_update(middle_match_dict, found_dict)
+                                        middle_match_layers.add(found_dict)
                                 elif env_key.lower().startswith(start_key_prefix):
                                     if nested_key == env_nested_key:
                                         key_path = env_nested_key.split(env_nested_delimiter)
@@ -1304,7 +1470,7 @@ class ArFiBaseHandler(ABC):
                                             field_name=field_name,
                                             is_alias_path=is_alias_path,
                                         )
-                                        middle_match_dict = deep_update(middle_match_dict, found_dict)
+                                        middle_match_layers.add(found_dict)
                                     elif nested_key.lower() == env_nested_key.lower():
                                         key_path = env_nested_key.split(env_nested_delimiter)
                                         found_dict = create_dict_for_path(key_path, env_value)
@@ -1314,15 +1480,16 @@ class ArFiBaseHandler(ABC):
                                             field_name=field_name,
                                             is_alias_path=is_alias_path,
                                         )
-                                        lower_match_dict = deep_update(lower_match_dict, found_dict)
+                                        lower_match_layers.add(found_dict)
                                 else:
                                     raise ValueError(f"Unresolved nested key: {nested_key}")
 
-                            nested_key_dict = deep_update(nested_key_dict, lower_match_dict)
-                            nested_key_dict = deep_update(nested_key_dict, middle_match_dict)
-                            nested_key_dict = deep_update(nested_key_dict, exact_match_dict)
+                            # Groups are merged separately, their order of priority differs from the order of keys.
+                            for match_layers in (lower_match_layers, middle_match_layers, exact_match_layers):
+                                if match_layers:
+                                    nested_key_layers.add(match_layers.materialize())
 
-        return nested_key_dict
+        return nested_key_layers.materialize()
 
     def _convert_env_found_value_key(
         self,
@@ -1333,7 +1500,7 @@ class ArFiBaseHandler(ABC):
     ) -> dict[str, Any]:
         """Convert found environment variable value to model field names."""
 
-        valid_data: dict[str, Any] = dict()
+        valid_layers = LayeredMerge()
         found_value_lower = dict()
 
         if isinstance(found_value, str):
@@ -1380,18 +1547,17 @@ class ArFiBaseHandler(ABC):
                         )
                         if search_value is not PydanticUndefined:
                             result_value = create_dict_for_path(path_alias, search_value)
-                        find_dict = deep_update(find_dict, result_value)
+                        find_dict = merge_layers([find_dict, result_value])
                     else:
                         if main_alias in alias_path:
                             path_alias = alias_path[main_alias]
                             result_value = create_dict_for_path(path_alias, result_value)
-                            find_dict = deep_update(find_dict, result_value)
+                            find_dict = merge_layers([find_dict, result_value])
                         else:
                             find_dict[main_alias] = result_value
-            if find_dict:
-                valid_data = deep_update(valid_data, find_dict)
+            valid_layers.add(find_dict)
 
-        return valid_data
+        return valid_layers.materialize()
 
     def secrets_ordered_settings_handler(self) -> dict[str, Any]:
         """Handles settings from secrets directory."""
@@ -1410,39 +1576,155 @@ class ArFiBaseHandler(ABC):
                 return data
             raise ArFiSettingsError(f"Missing secrets directory: `{self.config.secrets_dir.as_posix()}`")
 
-        all_files = self.config.secrets_dir.rglob("*")
-        for file in all_files:
-            if not file.is_file():
-                continue
-            if file.suffix:
-                continue
-            file_name = file.stem
-            try:
-                data[file_name] = file.read_text(encoding=self.config.encoding).strip()
-            except UnicodeDecodeError as e:
-                raise ArFiSettingsError(f"Error reading file: `{file.as_posix()}`") from e
+        # Only the files named as the field aliases are read
+        if self.config.case_sensitive:
+            field_aliases = self.field_aliases
+            names = {alias for aliases in field_aliases.values() for alias in aliases}
+        else:
+            field_aliases = self.field_aliases_not_case_sensitive
+            names = {alias.lower() for aliases in field_aliases.values() for alias in aliases}
+        lazy_names = set()
+        if self.config.secrets_lazy:
+            for field_name in self._get_lazy_secret_fields():
+                for alias in field_aliases.get(field_name, []):
+                    lazy_names.add(alias if self.config.case_sensitive else alias.lower())
+        reader = self._create_reader(
+            file_path=self.config.secrets_dir.resolve(),
+            is_secrets_dir=True,
+            file_encoding=self.config.encoding,
+            names=names,
+            lazy_names=lazy_names,
+            case_sensitive=self.config.case_sensitive,
+        )
+        data.update(self._read(reader))
 
         return data
 
-    def conf_file_ordered_settings_handler(self, mode: str | None = None) -> dict[str, Any]:
-        """Handles settings from config file."""
+    def _get_lazy_secret_fields(self) -> list[str]:
+        """Return the fields annotated as `SecretStr`, whose secret files can be read lazily.
 
-        data: dict[str, Any] = {}
+        The fields with `AliasPath` are excluded, their values are parsed when read.
+        """
+
+        fields = []
+        for field_name, field_info in self.settings_class.model_fields.items():
+            if field_name in self.fields_alias_path or field_name in self.fields_alias_path_not_case_sensitive:
+                continue
+            annotations = extract_unique_annotations(field_info.annotation)
+            if any(isinstance(ann, type) and issubclass(ann, SecretStr) for ann in annotations):
+                fields.append(field_name)
+        return fields
+
+    def conf_file_ordered_settings_handler(self, mode: str | None = None, with_base: bool = False) -> dict[str, Any]:
+        """Handles settings from config file.
+
+        mode: str | None Read the files of the mode instead of the config files
+        with_base: bool Read the config files and then the files of the mode in one pass
+        """
+
+        layers = LayeredMerge()
+        conf_path = []
         for file_path in self.config.conf_path:
             if not file_path.is_absolute():
                 if self.settings_class.BASE_DIR is not None:
                     base_dir = Path(self.settings_class.BASE_DIR).resolve()
                     file_path = Path(base_dir, file_path).resolve()
-            if mode:
-                file_path = file_path.parent / mode
-            handler, file_path = self._find_ext_handler(file_path)
-            if handler is None:
-                if not self.config.conf_ignore_missing:
-                    raise ArFiSettingsError(f"Missing file: `{file_path.as_posix()}`")
-                continue
-            data = deep_update(data, handler(file_path=file_path))
+            conf_path.append(file_path)
+        modes = [None, mode] if with_base and mode else [mode]
+        reads = []
+        for current_mode in modes:
+            for file_path in conf_path:
+                if current_mode:
+                    file_path = file_path.parent / current_mode
+                handler, file_path = self._find_ext_handler(file_path)
+                if handler is None:
+                    if not self.config.conf_ignore_missing:
+                        raise ArFiSettingsError(f"Missing file: `{file_path.as_posix()}`")
+                    continue
+                reads.append((handler.__name__, file_path, handler, {"file_path": file_path}))
+        for (_, file_path, _, _), handler_data in zip(reads, self._read_files(reads)):
+            layers.add(handler_data)
+            self._add_file_sources("conf_file_ordered_settings_handler", handler_data, file_path)
 
-        return data
+        return layers.materialize()
+
+    def _read_files(self, reads: list[tuple[str, Path, Callable, dict[str, Any]]]) -> list[Any]:
+        """Call the readers of the files and return their data in the same order.
+
+        reads: list[tuple[str, Path, Callable, dict[str, Any]]] Handler name, file, reader and its kwargs
+
+        With `read_workers` the files are read concurrently in a thread pool.
+        With the tracing hooks enabled the files are read one after another, so the hooks see nested stages.
+        """
+
+        reuse = current_reuse.get()
+        if reuse is not None:
+            reuse.add_files(file_path for _, file_path, _, _ in reads)
+        if self.read_workers > 1 and len(reads) > 1 and not tracing_hooks.enabled:
+            from .aio import read_executor
+
+            futures = read_executor.submit(
+                self.read_workers,
+                [functools.partial(contextvars.copy_context().run, func, **kwargs) for _, _, func, kwargs in reads],
+            )
+            # The errors are raised in the priority order
+            return [future.result() for future in futures]
+        results = []
+        for source, file_path, func, kwargs in reads:
+            if tracing_hooks.enabled:
+                result = tracing_hooks.call(STAGE_FILE, type(self.settings_class), source, file_path, func, **kwargs)
+            else:
+                result = func(**kwargs)
+            results.append(result)
+        return results
+
+    def _add_file_sources(self, handler: str, data: dict[str, Any], file_path: PathType) -> None:
+        """Record the file of the fields, the later files override the earlier ones."""
+
+        file_sources = self.file_sources.setdefault(handler, {})
+        file_path = Path(file_path)
+        for key in data:
+            file_sources[key] = file_path
+
+    def _set_provenance(self, data: dict[str, dict[str, Any]]) -> None:
+        """Record the source of the highest priority for every field.
+
+        data: dict[str, dict[str, Any]] Data of every ordered settings handler
+        """
+
+        provenance = dict()
+        for key in self.data:
+            if isinstance(key, str) and not key.startswith("_"):
+                provenance[key] = FieldSource("parent")
+        for ord_handler in reversed(self.ordered_settings):
+            file_sources = self.file_sources.get(ord_handler, {})
+            # The keys of the other sources are the keys of their data
+            source_keys = self.source_keys.get(ord_handler)
+            for key in data[ord_handler]:
+                if isinstance(key, str) and not key.startswith("_"):
+                    source_key = key if source_keys is None else source_keys.get(key)
+                    provenance[key] = FieldSource(ord_handler, file_sources.get(key), source_key)
+        self.provenance = provenance
+
+    def _call_ordered_settings_handler(self, ord_handler: str, **kwargs: Any) -> dict[str, Any]:
+        """Call the ordered settings handler by its full name."""
+
+        handler = self._get_ordered_settings_handler(ord_handler)
+        if tracing_hooks.enabled:
+            return tracing_hooks.call(
+                STAGE_ORDERED_SETTINGS, type(self.settings_class), ord_handler, None, handler, **kwargs
+            )
+        return handler(**kwargs)
+
+    @staticmethod
+    def _search_mode(data: dict[str, dict[str, Any]], ordered_settings: list[str]) -> str | None:
+        """Return MODE of the source with the highest priority."""
+
+        for ord_handler in ordered_settings:
+            mode = data.get(ord_handler, {}).get("MODE", None)
+            if mode:
+                return mode
+        return None
 
     @abstractmethod
     def default_main_handler(self) -> dict[str, Any]:
@@ -1453,28 +1735,43 @@ class ArFiHandler(ArFiBaseHandler):
     """Handles source settings."""
 
     def default_main_handler(self) -> dict[str, Any]:
-        """Main handler."""
+        """Main handler.
+
+        MODE of the highest priority source selects the config files of the mode.
+        If it is set by the sources with the higher priority than the config files,
+        the config files and the files of the mode are read in one pass.
+        """
 
         data: dict[str, Any] = {}
-        mode = self.data.get("MODE", None)
+        conf_handler = "conf_file_ordered_settings_handler"
+        # A redefined config files handler is called as before: the config files and then the mode files
+        single_pass = (
+            conf_handler in self.ordered_settings
+            and type(self).conf_file_ordered_settings_handler is ArFiBaseHandler.conf_file_ordered_settings_handler
+        )
         for ord_handler in reversed(self.ordered_settings):
-            handler = self._get_ordered_settings_handler(ord_handler)
-            handler_data = handler()
-            current_mode = handler_data.get("MODE", None)
-            if current_mode:
-                mode = current_mode
-            data[ord_handler] = handler_data
-
-        mode_field = self.settings_class.model_fields.get("MODE")
-        class_mode = mode_field.default
-        mode = mode or class_mode
-        if mode:
-            if "conf_file_ordered_settings_handler" in self.ordered_settings:
-                handler_data = self.conf_file_ordered_settings_handler(mode=mode)
-                data["conf_file_ordered_settings_handler"] = deep_update(
-                    data["conf_file_ordered_settings_handler"], handler_data
-                )
+            if single_pass and ord_handler == conf_handler:
+                continue
+            data[ord_handler] = self._call_ordered_settings_handler(ord_handler)
 
+        mode = None
+        if single_pass:
+            higher_sources = self.ordered_settings[: self.ordered_settings.index(conf_handler)]
+            mode = self._search_mode(data, higher_sources)
+            if mode:
+                data[conf_handler] = self._call_ordered_settings_handler(conf_handler, mode=mode, with_base=True)
+            else:
+                data[conf_handler] = self._call_ordered_settings_handler(conf_handler)
+        if not mode:
+            mode_field = self.settings_class.model_fields.get("MODE")
+            mode = self._search_mode(data, self.ordered_settings) or self.data.get("MODE", None) or mode_field.default
+            if mode and conf_handler in self.ordered_settings:
+                handler_data = self._call_ordered_settings_handler(conf_handler, mode=mode)
+                data[conf_handler] = merge_layers([data[conf_handler], handler_data])
+
+        self._set_provenance(data)
+        layers = LayeredMerge(self.data)
         for ord_handler in reversed(self.ordered_settings):
-            self.data = deep_update(self.data, data[ord_handler])
+            layers.add(data[ord_handler])
+        self.data = layers.materialize()
         return self.data
@@ -1,13 +1,18 @@
 import functools
-import inspect
+import sys
+import threading
 import warnings
+from collections import OrderedDict
 from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any
 
 import pydantic
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic_core import PydanticUndefined
 from typing_extensions import Annotated
 
+from .cache import PathCache, absolute_path
 from .constants import (
     PYPROJECT_TOML_MAX_DEPTH,
 )
@@ -20,6 +25,53 @@ __all__ = [
     "init_settings",
 ]
 
+path_cache = PathCache()
+"""Cache of the pyproject.toml and base dir discovery."""
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_called_file(filename: str) -> str:
+    """Resolves the file of the call site.
+
+    Cached by the file name, the code objects of the same functions in different files are equal.
+    """
+
+    return Path(filename).resolve().as_posix()
+
+
+CALLED_FILES_CACHE_SIZE = 256
+"""Number of the call sites whose calling file is cached."""
+
+_called_files: OrderedDict[tuple[CodeType, str, int], tuple[str, int]] = OrderedDict()
+"""Calling file and line by the code object, its file and line of the innermost frame outside `arfi_settings`."""
+_called_files_lock = threading.Lock()
+
+
+def _is_internal_file(filename: str) -> bool:
+    return "importlib" in filename or "/arfi_settings/" in filename
+
+
+def _walk_called_frame(frame: FrameType) -> FrameType | None:
+    """Returns the frame which called initialization ArFiSettings first, the whole call stack is walked."""
+
+    # Walks frames directly, `inspect.stack()` loads source lines for every frame.
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+
+    called_frame = None
+    for frame in reversed(frames):
+        filename = frame.f_code.co_filename
+        if "importlib" in filename:
+            continue
+        if filename.endswith("/arfi_settings/main.py"):
+            break
+        if "/arfi_settings/" in filename:
+            continue
+        called_frame = frame
+    return called_frame
+
 
 class InitSettings(BaseModel):
     """Init settings."""
@@ -51,21 +103,30 @@ class InitSettings(BaseModel):
         pyproject_toml_max_depth: int = PYPROJECT_TOML_MAX_DEPTH,
         class_name: str | None = None,
         search_base_dir: bool = True,
+        called_file: PathType | None = None,
     ):
-        """Searches and read pyproject.toml file."""
+        """Searches and read pyproject.toml file.
+
+        called_file: PathType | None The file from which the search starts.
+            If not set, the file which called initialization ArFiSettings is searched in the call stack.
+        """
 
         if not read_pyproject_toml:
             return
         self.pyproject_toml_depth = pyproject_toml_depth
         self.pyproject_toml_max_depth = pyproject_toml_max_depth
 
-        called_file, lineno = self._search_called_file()
+        if called_file is None:
+            called_file, lineno = self._search_called_file()
+        else:
+            lineno = 0
+        called_file = path_cache.resolve(Path(called_file)).as_posix()
         self.main_config_class = class_name
         self.called_line = lineno
         if self.main_config_file is not None and called_file == self.main_config_file.as_posix():
             return
 
-        self.main_config_file = Path(called_file).resolve()
+        self.main_config_file = path_cache.resolve(Path(called_file))
         if not self.read_pyproject_toml:
             return
         if read_once:
@@ -102,7 +163,7 @@ class InitSettings(BaseModel):
             )
 
         self.pyproject_toml_path = pyproject_toml_path
-        self.root_dir = pyproject_toml_path.parent.resolve()
+        self.root_dir = path_cache.resolve(pyproject_toml_path.parent)
 
         reader = ArFiReader(
             file_path=pyproject_toml_path,
@@ -123,22 +184,47 @@ class InitSettings(BaseModel):
             self.init_params = PyProjectSchema()
 
     @staticmethod
-    def _search_called_file() -> tuple[str, int]:
-        """Searches file which called initialization ArFiSettings."""
+    def clear_cache() -> None:
+        """Clears cached results of the pyproject.toml and base dir discovery.
 
-        called_file = ""
-        lineno = 0
-        for elem in reversed(inspect.stack()):
-            if "importlib" in elem.filename:
-                continue
-            if elem.filename.endswith("/arfi_settings/main.py"):
-                break
-            if "/arfi_settings/" in elem.filename:
-                continue
-            lineno = elem.lineno
-            called_file = Path(elem.filename).resolve().as_posix()
+        Call it after pyproject.toml or `__init__.py` files have been created, removed or moved.
+        """
+        path_cache.clear()
 
-        return called_file, lineno
+    @staticmethod
+    def _search_called_file() -> tuple[str, int]:
+        """Searches file which called initialization ArFiSettings.
+
+        Cached by the code object, its file and line of the innermost frame outside `arfi_settings`,
+        the code objects of the same functions in different files are equal.
+        The whole call stack is walked only on the first call from the line,
+        or on every call if the line is called by the build of other settings.
+        A line once called directly keeps its own file, even if it is called by the build later.
+        """
+
+        frame = sys._getframe(1)
+        while frame is not None and _is_internal_file(frame.f_code.co_filename):
+            frame = frame.f_back
+        if frame is None:
+            return "", 0
+        key = (frame.f_code, frame.f_code.co_filename, frame.f_lineno)
+        with _called_files_lock:
+            result = _called_files.get(key)
+            if result is not None:
+                _called_files.move_to_end(key)
+                return result
+
+        called_frame = _walk_called_frame(frame)
+        if called_frame is None:
+            return "", 0
+        result = _resolve_called_file(called_frame.f_code.co_filename), called_frame.f_lineno
+        # The calling frame itself is the result unless it is called by the build of other settings
+        if called_frame is frame:
+            with _called_files_lock:
+                _called_files[key] = result
+                if len(_called_files) > CALLED_FILES_CACHE_SIZE:
+                    _called_files.popitem(last=False)
+        return result
 
     def _search_pyproject_toml(
         self,
@@ -152,11 +238,13 @@ class InitSettings(BaseModel):
         if isinstance(cwd, str):
             cwd = Path(cwd)
         assert isinstance(cwd, Path)
+        # The parent of a relative path stops at the current directory.
+        cwd = absolute_path(cwd)
 
-        if cwd.is_file():
+        if path_cache.is_file(cwd):
             cwd = cwd.parent
 
-        assert cwd.is_dir()
+        assert path_cache.is_dir(cwd)
 
         if max_depth is None:
             max_depth = PYPROJECT_TOML_MAX_DEPTH
@@ -171,7 +259,7 @@ class InitSettings(BaseModel):
         elif max_depth:
             for i in range(0, max_depth + 1):
                 file_path = cwd / "pyproject.toml"
-                if file_path.is_file():
+                if path_cache.is_file(file_path):
                     real_depth = i
                     break
                 else:
@@ -179,8 +267,8 @@ class InitSettings(BaseModel):
                         cwd = cwd.parent
 
         file_path = cwd / "pyproject.toml"
-        if file_path.is_file():
-            pyproject_toml_file = file_path.resolve()
+        if path_cache.is_file(file_path):
+            pyproject_toml_file = path_cache.resolve(file_path)
             self.pyproject_toml_depth = real_depth
         return pyproject_toml_file
 
@@ -189,31 +277,32 @@ class InitSettings(BaseModel):
 
         current_root_dir = self.main_config_file.parent
         while self.root_dir is None:
-            if Path(current_root_dir / "__init__.py").is_file():
+            if path_cache.is_file(current_root_dir / "__init__.py"):
                 current_root_dir = current_root_dir.parent
                 continue
-            self.root_dir = current_root_dir.resolve()
+            self.root_dir = path_cache.resolve(current_root_dir)
         base_dir = self.main_config_file.parent
         previous_dir = base_dir
         while previous_dir != self.root_dir:
-            if not Path(previous_dir / "__init__.py").is_file():
+            if not path_cache.is_file(previous_dir / "__init__.py"):
                 break
             base_dir = previous_dir
             previous_dir = previous_dir.parent
 
-        if Path(previous_dir / "__init__.py").is_file():
+        if path_cache.is_file(previous_dir / "__init__.py"):
             base_dir = previous_dir
 
         source_base_dir_str = ""
         if self.base_dir is not None:
             source_base_dir_str = self.base_dir.as_posix()
-        find_base_dir_str = base_dir.resolve().as_posix()
+        find_base_dir = path_cache.resolve(base_dir)
+        find_base_dir_str = find_base_dir.as_posix()
         if source_base_dir_str != find_base_dir_str:
             if not find_base_dir_str.startswith(source_base_dir_str):
-                self.base_dir = base_dir.resolve()
+                self.base_dir = find_base_dir
                 return
         if not self.base_dir:
-            self.base_dir = base_dir.resolve()
+            self.base_dir = find_base_dir
 
     def _search_base_dir_decorator(self, func):
         @functools.wraps(func)
@@ -231,4 +320,28 @@ class InitSettings(BaseModel):
         return value
 
 
-init_settings: InitSettings = InitSettings()
+init_settings: InitSettings
+"""Init settings shared by all settings classes, created on first use."""
+
+_init_settings_lock = threading.Lock()
+
+init_settings_lock = threading.RLock()
+"""Guards `init_settings` read by the concurrent builds, hold it while the results are taken."""
+
+
+def get_init_settings() -> InitSettings:
+    """Return the init settings shared by all settings classes, it is created on first use."""
+
+    init_settings = globals().get("init_settings")
+    if init_settings is None:
+        with _init_settings_lock:
+            if "init_settings" not in globals():
+                globals()["init_settings"] = InitSettings()
+            init_settings = globals()["init_settings"]
+    return init_settings
+
+
+def __getattr__(name: str) -> Any:
+    if name == "init_settings":
+        return get_init_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,8 @@
 import inspect
+from inspect import CO_NEWLOCALS, CO_OPTIMIZED
 from pathlib import Path
-from typing import Any, ClassVar, Literal
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Literal, Mapping
 
 from pydantic import AliasChoices, BaseModel, Field
 
@@ -23,15 +25,24 @@ from .descriptors import (
     ReadConfigForceDeskriptor,
     ReadPyProjectTomlDeskriptor,
 )
+from .environ import EnvSnapshot
 from .handlers import ArFiHandler
-from .init_config import init_settings
 from .schemes import (
     CONF_INCLUDE_EXLUDE_PARAMS,
     ENV_INCLUDE_EXLUDE_PARAMS,
     INCLUDE_EXLUDE_PARAMS,
     SettingsConfigSchema,
 )
+from .provenance import FieldSource, current_reuse
+from .registry import WeakRegistry
 from .storage import config_storage
+from .tracing import (
+    STAGE_INSTANCE_CONFIG,
+    STAGE_NEW,
+    STAGE_SETTINGS,
+    STAGE_VALIDATION,
+    tracing_hooks,
+)
 from .types import (
     DEFAULT_PATH_SENTINEL,
     LIST_STR_SENTINEL,
@@ -43,7 +54,14 @@ from .types import (
     PathType,
     SettingsConfigDict,
 )
-from .utils import is_descriptor
+from .utils import is_descriptor, make_build
+
+if TYPE_CHECKING:
+    from .snapshot import SettingsSnapshot
+    from .watcher import SettingsWatcher
+
+CO_FUNCTION = CO_OPTIMIZED | CO_NEWLOCALS
+"""Code flags of the functions, unlike the class bodies and modules."""
 
 
 class ArFiSettings(BaseModel):
@@ -66,6 +84,12 @@ class ArFiSettings(BaseModel):
     handler_inherit_parent: ClassVar[bool] = SENTINEL
     ordered_settings: ClassVar[list[str]] = SENTINEL
     ordered_settings_inherit_parent: ClassVar[bool] = SENTINEL
+    instances_max_size: ClassVar[int | None] = None
+    """Max number of the live settings instances and of their configs, counted over all settings classes.
+
+    `None` is unbounded. The live instances are never evicted, beyond the limit
+    a new instance raises `ArFiSettingsError`, the garbage collected instances are dropped first.
+    """
 
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(
         extra="forbid",
@@ -112,9 +136,11 @@ class ArFiSettings(BaseModel):
         "_base_dir",
         "_root_dir",
         "_arfi_debug",
+        "_env_snapshot",
+        "_provenance",
     )
 
-    __instances: ClassVar[dict] = dict()
+    __instances: ClassVar[WeakRegistry["ArFiSettings"]] = WeakRegistry()
 
     @property
     def settings_config(self) -> SettingsConfigSchema:
@@ -200,6 +226,65 @@ class ArFiSettings(BaseModel):
     def root_dir(self) -> PathType | None:
         return self._root_dir
 
+    @property
+    def provenance(self) -> Mapping[str, FieldSource]:
+        """Source of the resolved value of every field read from the sources, see `FieldSource`."""
+        if not hasattr(self, "_provenance"):
+            return MappingProxyType({})
+        return MappingProxyType(self._provenance)
+
+    @property
+    def env_snapshot(self) -> EnvSnapshot | None:
+        """Environment snapshot shared by the whole settings tree."""
+        if not hasattr(self, "_env_snapshot"):
+            return None
+        return self._env_snapshot
+
+    def snapshot(self) -> "SettingsSnapshot":
+        """Takes frozen value tree of the settings, see `from_snapshot`."""
+        from .snapshot import SettingsSnapshot
+
+        return SettingsSnapshot.take(self)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: "SettingsSnapshot", **overrides: Any) -> "ArFiSettings":
+        """Creates instance from the snapshot without reading env, files and pyproject.toml.
+
+        Only the overridden fields are validated. A dict overrides the fields of the nested settings.
+        """
+        return snapshot.build(cls, **overrides)
+
+    @classmethod
+    def watch(
+        cls,
+        interval: float = 1.0,
+        debounce: float = 0.1,
+        callback: Callable[["ArFiSettings"], Any] | None = None,
+        on_error: Callable[[Exception], Any] | None = None,
+        **kwargs: Any,
+    ) -> "SettingsWatcher":
+        """Creates settings and the watcher which rebuilds them when the files they were read from are changed.
+
+        The current settings are `watcher.settings`, see `SettingsWatcher`.
+        """
+        from .watcher import SettingsWatcher
+
+        return SettingsWatcher(cls, interval=interval, debounce=debounce, callback=callback, on_error=on_error, **kwargs)
+
+    @classmethod
+    async def aload(cls, **kwargs: Any) -> "ArFiSettings":
+        """Creates settings without blocking the event loop.
+
+        The settings are built in the thread pool of `async_loader`,
+        the readers with the overridden `aread` are awaited on the event loop.
+        """
+        from .aio import async_loader
+        from .init_config import get_init_settings
+
+        # The worker threads have no frames of the caller, the pyproject.toml discovery starts from its file.
+        called_file, _ = get_init_settings()._search_called_file()
+        return await async_loader.run(make_build(cls, called_file), **kwargs)
+
     def __set_name__(self, owner, name):
         self._mode_dir_attr = name
 
@@ -223,6 +308,11 @@ class ArFiSettings(BaseModel):
     def _setup_subclasses_descriptors(cls):
         """Validate and set class variables as descriptors"""
 
+        # Don't move to global scope, `init_settings` is created on first use
+        from .init_config import get_init_settings
+
+        init_settings = get_init_settings()
+
         # setup settings from users class, from pyproject.toml or by default
         for cls_var in init_settings.init_params.model_fields:
             if cls_var not in cls.__class_vars__:
@@ -266,12 +356,19 @@ class ArFiSettings(BaseModel):
     def __new__(cls, _instance_id: int = None, **kwargs):
         """Create new instance or return existing."""
 
+        traced = tracing_hooks.enabled
+        if traced:
+            tracing_hooks.start(STAGE_NEW, cls)
         curren_frame = inspect.currentframe()
         parrent_frame = curren_frame.f_back
-        frame_scope = parrent_frame.f_locals
-        co_name = parrent_frame.f_code.co_name
-
-        given_instance = cls.__instances.get(_instance_id)
+        parrent_code = parrent_frame.f_code
+        # Only the class body and module frames have no fast locals, their `f_locals` is the namespace itself,
+        # so the locals snapshot of the function frames is never taken.
+        is_class_body = not parrent_code.co_flags & CO_FUNCTION and "__qualname__" in parrent_frame.f_locals
+        co_name = parrent_code.co_name
+        del curren_frame, parrent_frame
+
+        given_instance = cls.__instances.get_object(_instance_id)
         if given_instance and not issubclass(type(given_instance), cls):
             given_instance = None
 
@@ -280,17 +377,19 @@ class ArFiSettings(BaseModel):
             instance._read_config = True
         else:
             instance = super().__new__(cls)
-            if "__qualname__" in frame_scope:
+            if is_class_body:
                 instance._read_config = False
                 instance._read_pyproject_toml = False
             if co_name not in ("__init__", "__deepcopy__"):
-                cls.__instances[id(instance)] = instance
+                cls.__instances.set(instance, max_size=cls.instances_max_size)
 
             if co_name == "__deepcopy__":
                 instance._read_config = False
                 instance._read_config_force = False
                 instance._read_pyproject_toml = False
 
+        if traced:
+            tracing_hooks.end(STAGE_NEW, cls)
         return instance
 
     def _convert_debug_path(self, list_path: list[Path], mode: Literal["conf", "env"]) -> list[str]:
@@ -333,6 +432,7 @@ class ArFiSettings(BaseModel):
             "_handler_read_pyproject_toml_force",
             "_handler_search_base_dir",
             "_handler_main_handler",
+            "_handler_env_snapshot",
         ]
         for field in extra_fields:
             if field in value:
@@ -346,6 +446,7 @@ class ArFiSettings(BaseModel):
         _read_pyproject_toml: bool | None = None,
         _pyproject_toml_depth: int | None = None,
         _pyproject_toml_max_depth: int = PYPROJECT_TOML_MAX_DEPTH,
+        _called_file: PathType | None = None,
         _mode_dir: PathType | None = DEFAULT_PATH_SENTINEL,
         _mode_dir_inherit_nested: bool = None,
         _mode_dir_inherit_parent: bool = None,
@@ -375,6 +476,7 @@ class ArFiSettings(BaseModel):
         _ignore_missing: bool = None,
         _encoding: str | None = STR_SENTINEL,
         _secrets_dir: PathType | None = DEFAULT_PATH_SENTINEL,
+        _secrets_lazy: bool = None,
         _include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _exclude_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _handler: str = STR_SENTINEL,
@@ -383,26 +485,58 @@ class ArFiSettings(BaseModel):
         _ordered_settings_inherit_parent: bool = None,
         _cli: bool = None,
         _arfi_debug: bool = False,
+        _env_snapshot: EnvSnapshot | None = None,
         **values: Any,
     ):
         _kwargs: dict = locals()
         _kwargs.pop("self")
-        config = config_storage.get_config(self)
-        values = config.load(instance=self, **_kwargs)
-        config.extract(self)
-
-        debug(self, "__init__", arfi_debug=_arfi_debug, mode="before", values=values)
-
-        if self.read_config:
-            handler = self.handler_class(
-                settings_class=self,
-                init_kwargs=values,
-                handler=self.handler,
-            )
-            values = handler()
-        values = self._clear_value_from_handler_params(values)
-
-        debug(self, "__init__", values=values, mode="after")
-
-        super().__init__(**values)
-        config.extract(self)
+        # Nested settings are created by pydantic inside this method, `__new__` relies on it.
+        traced = tracing_hooks.enabled
+        if traced:
+            settings_class = type(self)
+            field_name = values.get("_handler_mode_dir_attr")
+            tracing_hooks.start(STAGE_SETTINGS, settings_class, field_name)
+        reuse = current_reuse.get()
+        if reuse is not None:
+            reuse.enter(values.get("_handler_mode_dir_attr"))
+        try:
+            if _env_snapshot is not None:
+                values["_handler_env_snapshot"] = _env_snapshot
+            config = config_storage.get_config(self)
+            if traced:
+                values = tracing_hooks.call(
+                    STAGE_INSTANCE_CONFIG, settings_class, field_name, None, config.load, instance=self, **_kwargs
+                )
+            else:
+                values = config.load(instance=self, **_kwargs)
+            config.extract(self)
+
+            debug(self, "__init__", arfi_debug=_arfi_debug, mode="before", values=values)
+
+            if self.read_config:
+                handler = self.handler_class(
+                    settings_class=self,
+                    init_kwargs=values,
+                    handler=self.handler,
+                )
+                values = handler()
+                config.env_snapshot = handler.env_snapshot
+                config.provenance = handler.provenance
+            values = self._clear_value_from_handler_params(values)
+
+            debug(self, "__init__", values=values, mode="after")
+
+            if traced:
+                tracing_hooks.start(STAGE_VALIDATION, settings_class, field_name)
+                try:
+                    super().__init__(**values)
+                finally:
+                    tracing_hooks.end(STAGE_VALIDATION, settings_class, field_name)
+            else:
+                super().__init__(**values)
+            config.extract(self)
+        finally:
+            if reuse is not None:
+                reuse.exit()
+            if traced:
+                tracing_hooks.end(STAGE_SETTINGS, settings_class, field_name)
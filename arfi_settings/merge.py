@@ -0,0 +1,79 @@
+from typing import Any, Mapping
+
+__all__ = (
+    "LayeredMerge",
+    "merge_layers",
+)
+
+
+def merge_layers(layers: list[Mapping[str, Any]]) -> dict[str, Any]:
+    """Recursively merge the mappings ordered from the lowest to the highest priority.
+
+    Gives the same result as a chain of pydantic `deep_update` calls,
+    but every merged dict is created once: values which are not merged
+    with another dict are shared by reference and the layers are never changed.
+    """
+
+    if not layers:
+        return dict()
+    if len(layers) == 1:
+        return dict(layers[0])
+    stacks: dict[str, Any] = dict()
+    multiple = set()
+    for layer in layers:
+        for key, value in layer.items():
+            if key in multiple:
+                stacks[key].append(value)
+            elif key in stacks:
+                stacks[key] = [stacks[key], value]
+                multiple.add(key)
+            else:
+                stacks[key] = value
+    if not multiple:
+        return stacks
+    merged = dict()
+    for key, stack in stacks.items():
+        if key not in multiple:
+            merged[key] = stack
+            continue
+        top = stack[-1]
+        if not isinstance(top, dict):
+            merged[key] = top
+            continue
+        # Only the dicts above the last non-dict value are merged, it replaces everything below.
+        start = len(stack) - 1
+        while start and isinstance(stack[start - 1], dict):
+            start -= 1
+        if start == len(stack) - 1:
+            merged[key] = top
+        else:
+            merged[key] = merge_layers(stack[start:])
+    return merged
+
+
+class LayeredMerge:
+    """Recursive overlay of the mappings merged once by `materialize()`.
+
+    Usage:
+        layers = LayeredMerge()
+        layers.add(low_priority_data)
+        layers.add(high_priority_data)
+        data = layers.materialize()
+    """
+
+    __slots__ = ("layers",)
+
+    def __init__(self, *layers: Mapping[str, Any]) -> None:
+        self.layers: list[Mapping[str, Any]] = [layer for layer in layers if layer]
+
+    def add(self, layer: Mapping[str, Any]) -> None:
+        """Add the mapping with the higher priority than the added ones."""
+
+        if layer:
+            self.layers.append(layer)
+
+    def materialize(self) -> dict[str, Any]:
+        return merge_layers(self.layers)
+
+    def __bool__(self) -> bool:
+        return bool(self.layers)
@@ -0,0 +1,118 @@
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Hashable
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from .handlers import ArFiBaseHandler
+
+__all__ = (
+    "HandlerPlan",
+    "HandlerPlanCache",
+    "plan_cache",
+)
+
+
+class HandlerPlan:
+    """Compiled information about fields and aliases of a settings class.
+
+    The plan is built once for a settings class and the handler options it depends on,
+    after that every handler of this class reuses the same plan without copying.
+    The plan must be treated as read-only.
+    """
+
+    __slots__ = (
+        "model_fields",
+        "fields_names",
+        "fields_is_settings",
+        "fields_is_pydantic",
+        "pydantic_single_fields",
+        "field_aliases",
+        "field_aliases_not_case_sensitive",
+        "alias_fields",
+        "alias_fields_not_case_sensitive",
+        "fields_alias_path",
+        "fields_alias_path_not_case_sensitive",
+        "fields_defaults",
+        "fields_discriminator",
+        "pydantic_aliases_info",
+        "allowed_json_parse_failure_fields",
+        "fields_decoders",
+    )
+
+    def __init__(self, model_fields: dict[str, Any] | None = None) -> None:
+        self.model_fields = model_fields
+        self.fields_names: set[str] = set()
+        self.fields_is_settings: list[str] = []
+        self.fields_is_pydantic: list[str] = []
+        self.pydantic_single_fields: dict[str, dict[str, Any]] = dict()
+        self.field_aliases: dict[str, list[str]] = dict()
+        self.field_aliases_not_case_sensitive: dict[str, list[str]] = dict()
+        self.alias_fields: dict[str, list[str]] = dict()
+        self.alias_fields_not_case_sensitive: dict[str, list[str]] = dict()
+        self.fields_alias_path: dict[str, dict[str, list[str | int]]] = dict()
+        self.fields_alias_path_not_case_sensitive: dict[str, dict[str, list[str | int]]] = dict()
+        self.fields_defaults: dict[str, int] = dict()
+        self.fields_discriminator: dict[str, dict[str, Any]] = dict()
+        self.pydantic_aliases_info: dict[str, list[dict[str, Any]]] = dict()
+        self.allowed_json_parse_failure_fields: set[str] = set()
+        self.fields_decoders: dict[str, Callable[[Any], Any]] = dict()
+
+
+class HandlerPlanCache:
+    """Cache of compiled handler plans.
+
+    Plans are stored per settings class in a weak mapping,
+    so a redefined (or garbage collected) class never gets a stale plan.
+    """
+
+    def __init__(self) -> None:
+        self._plans: weakref.WeakKeyDictionary[type[BaseModel], dict[Hashable, HandlerPlan]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @staticmethod
+    def get_key(handler: "ArFiBaseHandler") -> tuple[Hashable, ...]:
+        """Return the handler options the plan depends on."""
+
+        config = handler.config
+        return (
+            type(handler),
+            config.case_sensitive,
+            config.env_case_sensitive,
+            config.env_nested_delimiter,
+        )
+
+    def get(self, settings_class: type[BaseModel], key: Hashable) -> HandlerPlan | None:
+        """Return the cached plan or None."""
+
+        plans = self._plans.get(settings_class)
+        if plans is None:
+            return None
+        plan = plans.get(key)
+        if plan is not None and plan.model_fields is not settings_class.model_fields:
+            # The model was rebuilt, so its fields may be changed.
+            plans.pop(key, None)
+            return None
+        return plan
+
+    def set(self, settings_class: type[BaseModel], key: Hashable, plan: HandlerPlan) -> None:
+        """Store plan for the settings class."""
+
+        if not getattr(settings_class, "__pydantic_complete__", True):
+            # Don't cache plans of not fully defined models
+            return
+        self._plans.setdefault(settings_class, dict())[key] = plan
+
+    def invalidate(self, settings_class: type[BaseModel]) -> None:
+        """Remove all plans of the settings class."""
+
+        self._plans.pop(settings_class, None)
+
+    def clear(self) -> None:
+        """Remove all plans."""
+
+        self._plans.clear()
+
+
+plan_cache = HandlerPlanCache()
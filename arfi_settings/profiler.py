@@ -0,0 +1,228 @@
+import importlib
+import time
+from pathlib import Path
+from typing import Any
+
+from .errors import ArFiSettingsError
+from .main import ArFiSettings
+from .tracing import (
+    STAGE_FILE,
+    STAGE_INSTANCE_CONFIG,
+    STAGE_MAIN_HANDLER,
+    STAGE_NEW,
+    STAGE_ORDERED_SETTINGS,
+    STAGE_PLAN,
+    STAGE_PYPROJECT,
+    STAGE_SETTINGS,
+    STAGE_VALIDATION,
+    tracing_hooks,
+)
+from .utils import is_settings, make_build
+
+__all__ = (
+    "Profiler",
+    "ProfileNode",
+    "import_settings_class",
+    "profile",
+    "stage_label",
+)
+
+
+class StageStats:
+    """Accumulated exclusive time and calls of the stage."""
+
+    __slots__ = ("time", "calls")
+
+    def __init__(self) -> None:
+        self.time = 0.0
+        self.calls = 0
+
+
+class ProfileNode:
+    """Stages of one settings class, nested settings fields are the children."""
+
+    __slots__ = ("name", "settings_class", "stages", "children")
+
+    def __init__(self, name: str, settings_class: type[ArFiSettings]) -> None:
+        self.name = name
+        self.settings_class = settings_class
+        self.stages: dict[str, StageStats] = dict()
+        self.children: dict[str, ProfileNode] = dict()
+
+    def add(self, stage: str, seconds: float) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.time += seconds
+        stats.calls += 1
+
+    def child(self, name: str, settings_class: type[ArFiSettings]) -> "ProfileNode":
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = ProfileNode(name, settings_class)
+        return node
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.time for stats in self.stages.values()) + sum(
+            child.total_time for child in self.children.values()
+        )
+
+
+class Profiler:
+    """Context manager which records the exclusive time of every stage of the settings build.
+
+    The profiler is registered as a global stage hook while it is active,
+    the nested settings fields are recorded to their own nodes.
+    """
+
+    def __init__(self) -> None:
+        self.root: ProfileNode | None = None
+        self.number = 0
+        self._running = False
+        self._frames: list[list] = []
+        self._nodes: list[ProfileNode] = []
+        self._new_time = 0.0
+
+    def on_stage_start(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None:
+        if not self._running:
+            return
+        if stage == STAGE_SETTINGS:
+            if self._nodes:
+                node = self._nodes[-1].child(source or settings_class.__name__, settings_class)
+            else:
+                if self.root is None:
+                    self.root = ProfileNode(settings_class.__name__, settings_class)
+                node = self.root
+            if self._new_time:
+                # `__new__` of the instance is called just before its `__init__`.
+                node.add(stage_label(STAGE_NEW, None, None), self._new_time)
+                self._new_time = 0.0
+            self._nodes.append(node)
+        self._frames.append([time.perf_counter(), 0.0])
+
+    def on_stage_end(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None:
+        if not self._running or not self._frames:
+            return
+        start, child_time = self._frames.pop()
+        elapsed = time.perf_counter() - start
+        if self._frames:
+            self._frames[-1][1] += elapsed
+        if stage == STAGE_NEW:
+            self._new_time = elapsed - child_time
+        elif self._nodes:
+            self._nodes[-1].add(stage_label(stage, source, path), elapsed - child_time)
+        if stage == STAGE_SETTINGS and self._nodes:
+            self._nodes.pop()
+
+    def __enter__(self) -> "Profiler":
+        tracing_hooks.register(self)
+        return self
+
+    def __exit__(self, *args) -> None:
+        tracing_hooks.unregister(self)
+
+    def run(self, settings_class: type[ArFiSettings], number: int = 10, **kwargs: Any) -> ProfileNode:
+        """Build the settings `number` times and return the root node."""
+
+        build = make_build(settings_class)
+        self._running = True
+        try:
+            for _ in range(number):
+                build(**kwargs)
+        finally:
+            self._running = False
+            self._frames.clear()
+            self._nodes.clear()
+        self.number += number
+        return self.root
+
+    def report(self) -> str:
+        """Return the report, the values are per one build."""
+
+        if self.root is None or not self.number:
+            return ""
+        lines = [
+            f"Profile of `{self.root.settings_class.__qualname__}`: "
+            f"{self.number} builds, {self.root.total_time / self.number * 1_000_000:.1f} us per build",
+            "",
+            f"{'stage':<64}{'time, us':>12}{'share':>9}{'calls':>8}",
+        ]
+        self._report_node(self.root, lines, self.root.total_time or 1.0, level=0)
+        return "\n".join(lines)
+
+    def _report_node(self, node: ProfileNode, lines: list[str], total: float, level: int) -> None:
+        indent = "    " * level
+        name = f"{indent}{node.name}"
+        if level:
+            name = f"{name}: {node.settings_class.__name__}"
+        lines.append(f"{name:<64}{node.total_time / self.number * 1_000_000:>12.1f}{node.total_time / total:>9.1%}")
+        items: list[tuple[float, str, StageStats | ProfileNode]] = [
+            (stats.time, stage, stats) for stage, stats in node.stages.items()
+        ]
+        items.extend((child.total_time, child.name, child) for child in node.children.values())
+        for seconds, stage, item in sorted(items, key=lambda item: item[0], reverse=True):
+            if isinstance(item, ProfileNode):
+                self._report_node(item, lines, total, level + 1)
+                continue
+            lines.append(
+                f"{indent}    {stage:<{60 - len(indent)}}{seconds / self.number * 1_000_000:>12.1f}"
+                f"{seconds / total:>9.1%}{item.calls / self.number:>8.3g}"
+            )
+
+
+STAGE_LABELS = {
+    STAGE_NEW: "__new__",
+    STAGE_SETTINGS: "__init__ (other)",
+    STAGE_INSTANCE_CONFIG: "InstanceConfig.load",
+    STAGE_PYPROJECT: "pyproject discovery",
+    STAGE_PLAN: "handler plan",
+    STAGE_VALIDATION: "pydantic validation",
+}
+
+
+def stage_label(stage: str, source: str | None, path: Path | None) -> str:
+    """Return the name of the stage in the reports."""
+
+    if stage == STAGE_FILE and path is not None:
+        try:
+            path = Path(path).resolve().relative_to(Path.cwd())
+        except ValueError:
+            pass
+        return f"read {Path(path).as_posix()}"
+    if stage in (STAGE_MAIN_HANDLER, STAGE_ORDERED_SETTINGS) and source:
+        return source
+    return STAGE_LABELS.get(stage, stage)
+
+
+def import_settings_class(path: str) -> type[ArFiSettings]:
+    """Import the settings class by the dotted path `package.module.Class` or `package.module:Class`."""
+
+    if ":" in path:
+        module_name, _, qualname = path.partition(":")
+    else:
+        module_name, _, qualname = path.rpartition(".")
+    if not module_name or not qualname:
+        raise ArFiSettingsError(f"Invalid settings class path `{path}`, expected `package.module.Class`")
+    try:
+        obj: Any = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ArFiSettingsError(f"Can not import module `{module_name}`: {e}") from e
+    for name in qualname.split("."):
+        try:
+            obj = getattr(obj, name)
+        except AttributeError as e:
+            raise ArFiSettingsError(f"`{qualname}` not found in module `{module_name}`") from e
+    if not is_settings(obj):
+        raise ArFiSettingsError(f"`{path}` is not a subclass of ArFiSettings")
+    return obj
+
+
+def profile(settings_class: type[ArFiSettings] | str, number: int = 10, **kwargs: Any) -> Profiler:
+    """Profile the settings build, `Profiler.report()` returns the breakdown."""
+
+    if isinstance(settings_class, str):
+        settings_class = import_settings_class(settings_class)
+    with Profiler() as profiler:
+        profiler.run(settings_class, number=number, **kwargs)
+    return profiler
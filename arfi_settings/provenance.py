@@ -0,0 +1,209 @@
+import os
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from .cache import scan_dir
+from .environ import EnvSnapshot
+from .types import PathType
+from .utils import is_settings
+
+if TYPE_CHECKING:
+    from .main import ArFiSettings
+
+__all__ = (
+    "FieldSource",
+    "BuildRecord",
+    "ReuseContext",
+)
+
+NodePath = tuple[str, ...]
+
+# Handler params which are different on every build and do not change the nested values.
+VOLATILE_PARAMS = ("_handler_env_snapshot", "_instance_id")
+
+
+class FieldSource:
+    """Source of the resolved field value.
+
+    source: str Name of the ordered settings handler, or `parent` for the values
+        passed to the nested settings by the sources of the parent
+    path: Path | None The file for the config and .env files
+    key: str | None The key of the value in the source: the environment variable, the key of the file,
+        the init kwarg or the secret file name. None for `parent` and for the fields of the environment
+        assembled from the nested variables
+    """
+
+    __slots__ = ("source", "path", "key")
+
+    def __init__(self, source: str, path: Path | None = None, key: str | None = None) -> None:
+        self.source = source
+        self.path = path
+        self.key = key
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, FieldSource):
+            return NotImplemented
+        return self.source == other.source and self.path == other.path and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash((self.source, self.path, self.key))
+
+    def __repr__(self) -> str:
+        args = [repr(self.source)]
+        if self.path is not None:
+            args.append(repr(self.path.as_posix()))
+        if self.key is not None:
+            args.append(f"key={self.key!r}")
+        return f"{self.__class__.__name__}({', '.join(args)})"
+
+
+def iter_settings_tree(instance: "ArFiSettings", node: NodePath = ()) -> Iterator[tuple[NodePath, "ArFiSettings"]]:
+    """Iterate the settings instance and its nested settings with their field paths."""
+
+    yield node, instance
+    for field_name in type(instance).model_fields:
+        value = getattr(instance, field_name, None)
+        if is_settings(type(value)):
+            yield from iter_settings_tree(value, (*node, field_name))
+
+
+class BuildRecord:
+    """Dependencies of every node of the settings tree recorded during the build.
+
+    files: Files and directories read by the node itself
+    inputs: Data passed to the nested settings by the handler of the parent
+    instances: Built instances with their `__dict__`, pydantic replaces it on every initialization
+    env_snapshot: Environment of the build
+    """
+
+    __slots__ = ("files", "inputs", "instances", "env_snapshot")
+
+    def __init__(self, env_snapshot: EnvSnapshot | None = None) -> None:
+        self.files: dict[NodePath, set[Path]] = dict()
+        self.inputs: dict[NodePath, Any] = dict()
+        self.instances: dict[NodePath, tuple["ArFiSettings", dict]] = dict()
+        self.env_snapshot = env_snapshot
+
+    def add_tree(self, instance: "ArFiSettings") -> None:
+        """Record the built instances and their secrets directories.
+
+        The secrets directories are listed by `ArFiReader.secrets_cache`, the unchanged ones are not walked again.
+        """
+
+        listings: dict[Path, set[Path]] = dict()
+        for node, nested in iter_settings_tree(instance):
+            self.instances[node] = (nested, nested.__dict__)
+            secrets_dir = nested.settings_config.secrets_dir if nested.settings_config else None
+            if secrets_dir is not None:
+                secrets_dir = Path(secrets_dir).resolve()
+                if secrets_dir not in listings:
+                    listings[secrets_dir] = list_secrets_dir(secrets_dir)
+                self.files.setdefault(node, set()).update(listings[secrets_dir])
+
+    @property
+    def paths(self) -> set[Path]:
+        return set().union(*self.files.values())
+
+    def subtree_files(self, node: NodePath) -> set[Path]:
+        size = len(node)
+        return set().union(*(files for path, files in self.files.items() if path[:size] == node))
+
+    def copy_subtree(self, other: "BuildRecord", node: NodePath) -> None:
+        size = len(node)
+        for records, other_records in (
+            (self.files, other.files),
+            (self.inputs, other.inputs),
+            (self.instances, other.instances),
+        ):
+            for path, value in other_records.items():
+                if path[:size] == node:
+                    records[path] = value
+
+
+def list_secrets_dir(secrets_dir: Path) -> set[Path]:
+    """Return the secrets directory with its files and subdirectories, the directories are watched for new files."""
+
+    from .readers import ArFiReader
+
+    paths = {secrets_dir}
+    if not secrets_dir.is_dir():
+        return paths
+    secrets_cache = ArFiReader.secrets_cache
+    dirs = [os.fspath(secrets_dir)]
+    while dirs:
+        path = dirs.pop()
+        entries = scan_dir(path) if secrets_cache is None else secrets_cache.listdir(path)
+        for _, entry_path, is_file, is_dir in entries:
+            if is_file or is_dir:
+                paths.add(Path(entry_path))
+            if is_dir:
+                dirs.append(entry_path)
+    return paths
+
+
+class ReuseContext:
+    """Recorder of the build of the settings tree, it is passed to the build by `current_reuse`.
+
+    With the previous record the nested settings whose inputs and files are unchanged
+    are taken from the previous tree instead of being built again.
+    The nested settings are reused as whole subtrees, a changed source builds again its settings
+    and all their nested settings, the fields of the root are always resolved again.
+    """
+
+    def __init__(
+        self,
+        previous: BuildRecord | None = None,
+        changed: set[Path] | None = None,
+        env_snapshot: EnvSnapshot | None = None,
+    ) -> None:
+        self.previous = previous
+        self.changed = changed or set()
+        self.record = BuildRecord(env_snapshot)
+        self.reused: list[NodePath] = []
+        self._stack: list[str | None] = []
+
+    @property
+    def node(self) -> NodePath:
+        return tuple(self._stack[1:])
+
+    def enter(self, field_name: str | None) -> None:
+        """Start the build of the settings, `field_name` is the field of the nested settings."""
+
+        self._stack.append(field_name)
+
+    def exit(self) -> None:
+        """End the build of the settings."""
+
+        if self._stack:
+            self._stack.pop()
+
+    def add_files(self, paths: Iterable[PathType]) -> None:
+        """Record the files read by the current settings."""
+
+        self.record.files.setdefault(self.node, set()).update(Path(path).resolve() for path in paths)
+
+    def lookup(self, field_name: str, data: dict[str, Any]) -> "ArFiSettings | None":
+        """Record the data of the nested settings and return the previous instance if it can be reused."""
+
+        from .snapshot import copy_value
+
+        node = (*self.node, field_name)
+        inputs = {key: copy_value(value) for key, value in data.items() if key not in VOLATILE_PARAMS}
+        self.record.inputs[node] = inputs
+        previous = self.previous
+        if previous is None or node not in previous.instances:
+            return None
+        if previous.inputs.get(node) != inputs or previous.subtree_files(node) & self.changed:
+            return None
+        instance, instance_dict = previous.instances[node]
+        # The shared default instance could be initialized again by another build.
+        if instance.__dict__ is not instance_dict:
+            return None
+        self.record.copy_subtree(previous, node)
+        self.reused.append(node)
+        return instance
+
+
+current_reuse: ContextVar[ReuseContext | None] = ContextVar("current_reuse", default=None)
+"""Reuse context of the current build, the builds without it do not pay for the recording."""
@@ -1,14 +1,16 @@
 import json
 import os
+import re
 import sys
+import warnings
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable
-
-from dotenv import dotenv_values
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Literal, Mapping
 
+from .cache import ListingCache, ParseCache, SecretsCache, freeze, read_text, scan_dir
+from .environ import EnvSnapshot
 from .errors import ArFiSettingsError
-from .types import PathType
+from .types import SENTINEL, LazySecretStr, PathType
 from .utils import validate_cli_reader
 
 if TYPE_CHECKING:
@@ -18,10 +20,12 @@ if TYPE_CHECKING:
         tomllib = None
     import tomli
     import yaml
+    from dotenv import dotenv_values
 else:
     yaml = None
     tomllib = None
     tomli = None
+    dotenv_values = None
 
 __all__ = (
     "ArFiBaseReader",
@@ -29,6 +33,204 @@ __all__ = (
 )
 
 
+def import_dotenv() -> None:
+    global dotenv_values
+    if dotenv_values is not None:
+        return
+    from dotenv import dotenv_values
+
+
+ENV_FILE_PARSERS = ("native", "dotenv")
+
+ENV_LINE = re.compile(
+    r"[^\S\n]*(?P<export>export[^\S\n]+)?"
+    r"(?:'(?P<quoted_key>[^'\n]+)'|(?P<key>[^=#\s'][^=#\s]*))"
+    r"[^\S\n]*(?P<equal>=[^\S\n]*)?"
+)
+ENV_INLINE_COMMENT = re.compile(r"\s+#.*")
+ENV_VARIABLE = re.compile(r"\$\{(?P<name>[^}:]*)(?::-(?P<default>[^}]*))?\}")
+ENV_SINGLE_QUOTE_ESCAPES = re.compile(r"\\[\\']")
+ENV_DOUBLE_QUOTE_ESCAPES = re.compile(r"\\[\\'\"abfnrtv]")
+ENV_ESCAPES = {
+    "\\\\": "\\",
+    "\\'": "'",
+    '\\"': '"',
+    "\\a": "\a",
+    "\\b": "\b",
+    "\\f": "\f",
+    "\\n": "\n",
+    "\\r": "\r",
+    "\\t": "\t",
+    "\\v": "\v",
+}
+
+
+def parse_env_lines(
+    lines: Iterable[str],
+    interpolate: bool = True,
+    source: str = "",
+    strict: bool = False,
+    environ: Mapping[str, str] | None = None,
+    environ_used: dict[str, str | None] | None = None,
+) -> dict[str, str | None]:
+    """Parse the lines of .env file in one pass.
+
+    Grammar, the same as python-dotenv has for the valid files:
+        - empty lines and lines starting with `#` are skipped, BOM at the start of the file is removed
+        - `[export ]KEY=value`, the key is unquoted `[^=#\\s]+` or single-quoted on one line
+        - `KEY` without `=` has `None` value
+        - unquoted value ends at the end of the line, ` #comment` and trailing whitespace are removed;
+          `KEY= #comment` is empty, but in `KEY=#value` the `#` is a part of the value
+        - single-quoted value decodes only `\\\\` and `\\'`, double-quoted value decodes `\\\\`, `\\'`, `\\"`
+          and `\\a \\b \\f \\n \\r \\t \\v`, both may span several lines and may be followed by `#comment`
+        - with `interpolate` `${NAME}` and `${NAME:-default}` are replaced by the values above in the file
+          or by the variables of `environ`, `os.environ` by default
+
+    Any other line is skipped with a warning as python-dotenv does, with `strict` it raises `ArFiSettingsError`.
+    environ_used: dict The names and the values of the variables taken from `environ` are added to it
+    """
+
+    if environ is None:
+        environ = os.environ
+    data: dict[str, str | None] = dict()
+    lines = list(lines)
+    lineno = 0
+    while lineno < len(lines):
+        start_lineno = lineno + 1
+        try:
+            key, value, lineno = parse_env_line(lines, lineno, source)
+        except ArFiSettingsError as e:
+            if strict:
+                raise
+            warnings.warn(f"{e}, the line is skipped", category=Warning, stacklevel=2)
+            lineno = start_lineno
+            continue
+        if key is None:
+            continue
+        if interpolate and value and "${" in value:
+            value = interpolate_env_value(value, data, environ, environ_used)
+        data[key] = value
+    return data
+
+
+def parse_env_line(lines: list[str], lineno: int, source: str) -> tuple[str | None, str | None, int]:
+    """Parse the statement starting at the line with the index `lineno`.
+
+    Returns the key, `None` for the empty and comment lines, the value and the index of the next line.
+    """
+
+    line = lines[lineno]
+    lineno += 1
+    if lineno == 1 and line.startswith("\ufeff"):
+        line = line[1:]
+    start_lineno = lineno
+    key, equal_sign, rest = line.partition("=")
+    if equal_sign and key.isidentifier():
+        # The most common `KEY=value` line is split without the regex.
+        text = rest.lstrip()
+        spaced = len(text) != len(rest)
+    else:
+        match = ENV_LINE.match(line)
+        if match is None:
+            text = line.lstrip()
+            if not text or text[0] == "#":
+                return None, None, lineno
+            raise invalid_env_line(lineno, source)
+        key = match["quoted_key"] or match["key"]
+        key_end = match.end("key")
+        if key == "export" and match["export"] is None and line[key_end : key_end + 1] in (" ", "\t"):
+            # `export` with whitespace is always the prefix, the key after it is invalid or a comment.
+            if line[key_end:].lstrip()[:1] == "#":
+                return None, None, lineno
+            raise invalid_env_line(lineno, source)
+        equal_sign = match["equal"]
+        text = line[match.end() :]
+        spaced = equal_sign is not None and len(equal_sign) > 1
+    if not equal_sign:
+        value, rest = None, text
+    else:
+        first = text[:1]
+        if first == "'" or first == '"':
+            value, rest, lineno = read_quoted_env_value(text, lines, lineno, source)
+        elif first == "#" and spaced:
+            value, rest = "", ""
+        else:
+            value, rest = text, ""
+            if "#" in value:
+                value = ENV_INLINE_COMMENT.sub("", value)
+            value = value.rstrip()
+    rest = rest.strip()
+    if rest and rest[0] != "#":
+        raise invalid_env_line(start_lineno, source)
+    return key, value, lineno
+
+
+def read_quoted_env_value(
+    text: str,
+    lines: list[str],
+    lineno: int,
+    source: str,
+) -> tuple[str, str, int]:
+    """Read the quoted value starting at the `text`, returns the value, the rest of the last line and its number."""
+
+    quote = text[0]
+    start_lineno = lineno
+    value = text[1:]
+    position = 0
+    while True:
+        end = value.find(quote, position)
+        if end < 0:
+            position = len(value)
+            if lineno >= len(lines):
+                raise invalid_env_line(start_lineno, source)
+            value += lines[lineno]
+            lineno += 1
+            continue
+        backslashes = 0
+        while end - backslashes > 0 and value[end - backslashes - 1] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            break
+        position = end + 1
+    rest = value[end + 1 :]
+    value = value[:end]
+    if "\\" in value:
+        escapes = ENV_SINGLE_QUOTE_ESCAPES if quote == "'" else ENV_DOUBLE_QUOTE_ESCAPES
+        value = escapes.sub(lambda match: ENV_ESCAPES[match.group(0)], value)
+    return value, rest, lineno
+
+
+def interpolate_env_value(
+    value: str,
+    data: Mapping[str, str | None],
+    environ: Mapping[str, str],
+    environ_used: dict[str, str | None] | None = None,
+) -> str:
+    """Replace `${NAME}` and `${NAME:-default}` by the parsed values or the variables of `environ`."""
+
+    def resolve(match: re.Match) -> str:
+        name = match["name"]
+        if name in data:
+            result = data[name]
+        else:
+            result = environ.get(name)
+            if environ_used is not None:
+                environ_used[name] = result
+            if result is None:
+                result = match["default"]
+        return result if result is not None else ""
+
+    return ENV_VARIABLE.sub(resolve, value)
+
+
+def invalid_env_line(lineno: int, source: str) -> ArFiSettingsError:
+    return ArFiSettingsError(f"Invalid .env syntax at line {lineno}: `{source}`")
+
+
+def unknown_env_file_parser(parser: str) -> ArFiSettingsError:
+    return ArFiSettingsError(f"Unknown .env file parser `{parser}`, choose one of: {', '.join(ENV_FILE_PARSERS)}")
+
+
 def import_yaml() -> None:
     global yaml
     if yaml is not None:
@@ -59,6 +261,12 @@ class ArFiBaseReader(ABC):
     """Readers of the source settings."""
 
     default_cli_reader: Callable | None = None
+    parse_cache: ParseCache | None = None
+    secrets_cache: SecretsCache | None = SecretsCache()
+    listing_cache: ListingCache | None = ListingCache()
+    env_file_parser: Literal["native", "dotenv"] = "native"
+    env_file_interpolate: bool = True
+    env_file_strict: bool = False
     ROOT_DIR: PathType | None = None
     BASE_DIR: PathType | None = None
 
@@ -70,16 +278,24 @@ class ArFiBaseReader(ABC):
         is_env: bool = False,
         is_cli: bool = False,
         is_secret_file: bool = False,
+        is_secrets_dir: bool = False,
         reader: str = "",
         ignore_missing: bool = False,
+        base_dir: PathType | None = SENTINEL,
+        root_dir: PathType | None = SENTINEL,
         **options,
     ) -> None:
+        if base_dir is not SENTINEL:
+            self.BASE_DIR = base_dir
+        if root_dir is not SENTINEL:
+            self.ROOT_DIR = root_dir
         self.file_path = self._validate_file_path(file_path)
         self.file_encoding = file_encoding
         self.is_env_file = is_env_file
         self.is_env = is_env
         self.is_cli = is_cli
         self.is_secret_file = is_secret_file
+        self.is_secrets_dir = is_secrets_dir
         self.ignore_missing = ignore_missing
         self.reader = reader
         if self.reader:
@@ -170,15 +386,48 @@ class ArFiBaseReader(ABC):
             return False
         return True
 
+    @classmethod
+    def is_listed_file(cls, file_path: Path) -> bool:
+        """Checks if the file exists by the cached listing of its directory, see `listing_cache`."""
+
+        if cls.listing_cache is None:
+            return cls.is_exist_file(file_path)
+        return cls.listing_cache.is_file(file_path)
+
+    def _parse_file(self, reader: str, parse: Callable[[], Any]) -> Any:
+        """Parse the file or return the parsed data from `parse_cache`.
+
+        With the cache enabled returns read-only data shared between all callers,
+        the handlers copy it to the ordinary dicts by `thaw`.
+        """
+
+        if self.parse_cache is None:
+            return parse()
+        try:
+            file_path = Path(self.file_path).resolve()
+            stat = os.stat(file_path)
+        except OSError:
+            return parse()
+        key = self.parse_cache.make_key(file_path, stat.st_mtime_ns, stat.st_size, self.file_encoding, reader)
+        data = self.parse_cache.get(key, ParseCache)
+        if data is ParseCache:
+            data = freeze(parse())
+            self.parse_cache.set(key, data, stat.st_size)
+        return data
+
     def toml_reader(self) -> dict[str, Any]:
         """Reads settings from TOML file."""
 
         import_toml()
-        try:
+
+        def parse() -> dict[str, Any]:
             with open(self.file_path, mode="rb") as toml_file:
                 if sys.version_info < (3, 11):
                     return tomli.load(toml_file)
                 return tomllib.load(toml_file)
+
+        try:
+            return self._parse_file("toml_reader", parse)
         except FileNotFoundError as e:
             if self.ignore_missing:
                 return {}
@@ -188,9 +437,13 @@ class ArFiBaseReader(ABC):
         """Reads settings from YAML file."""
 
         import_yaml()
-        try:
+
+        def parse() -> dict[str, Any]:
             with open(self.file_path, encoding=self.file_encoding) as yaml_file:
                 return yaml.safe_load(yaml_file)
+
+        try:
+            return self._parse_file("yaml_reader", parse)
         except FileNotFoundError as e:
             if self.ignore_missing:
                 return {}
@@ -204,26 +457,82 @@ class ArFiBaseReader(ABC):
     def json_reader(self) -> dict[str, Any]:
         """Reads settings from JSON file."""
 
-        try:
+        def parse() -> dict[str, Any]:
             with open(self.file_path, encoding=self.file_encoding) as json_file:
                 return json.load(json_file)
+
+        try:
+            return self._parse_file("json_reader", parse)
         except FileNotFoundError as e:
             if self.ignore_missing:
                 return {}
             raise ArFiSettingsError(f"File not found: `{self.file_path.resolve().as_posix()}`") from e
 
     def env_file_reader(self) -> dict[str, str | None]:
-        """Reads settings from .env file."""
+        """Reads settings from .env file by `env_file_parser`.
+
+        The native parser interpolates the variables of the `env_snapshot` option, `os.environ` without it.
+        """
 
         if not self.ignore_missing:
             if not self.is_exist_file(self.file_path):
                 raise ArFiSettingsError(f"File not found: `{self.file_path.resolve().as_posix()}`")
-        data: dict[str, str | None] = dotenv_values(self.file_path, encoding=self.file_encoding)
-        return dict(data)
 
-    def env_reader(self) -> dict[str, str | None]:
-        """Reads settings from environment."""
-        return dict(os.environ)
+        parser = self.env_file_parser
+        interpolate = self.env_file_interpolate
+        if parser == "dotenv":
+            import_dotenv()
+
+            def parse() -> dict[str, str | None]:
+                return dict(dotenv_values(self.file_path, encoding=self.file_encoding, interpolate=interpolate))
+
+            return self._parse_file(f"env_file_reader:{parser}:{interpolate:d}", parse)
+        if parser != "native":
+            raise unknown_env_file_parser(parser)
+
+        strict = self.env_file_strict
+        environ: Mapping[str, str] | None = self.options.get("env_snapshot")
+        if environ is None:
+            environ = os.environ
+
+        def parse_native() -> tuple[dict[str, str | None], tuple[tuple[str, str | None], ...]]:
+            environ_used: dict[str, str | None] = dict()
+            try:
+                with open(self.file_path, encoding=self.file_encoding) as env_file:
+                    data = parse_env_lines(
+                        env_file,
+                        interpolate,
+                        Path(self.file_path).as_posix(),
+                        strict=strict,
+                        environ=environ,
+                        environ_used=environ_used,
+                    )
+            except FileNotFoundError:
+                data = {}
+            return data, tuple(environ_used.items())
+
+        if self.parse_cache is None:
+            return parse_native()[0]
+
+        def parse_cached() -> tuple[dict[str, str | None], tuple[tuple[str, str | None], ...]]:
+            data, environ_used = parse_native()
+            return freeze(data), environ_used
+
+        data, environ_used = self._parse_file(f"env_file_reader:{parser}:{interpolate:d}:{strict:d}", parse_cached)
+        # The cached values are interpolated by the other environment
+        if any(environ.get(name) != value for name, value in environ_used):
+            data, _ = parse_native()
+        return data
+
+    def env_reader(self) -> Mapping[str, str]:
+        """Reads settings from environment.
+
+        Returns the snapshot passed in the `env_snapshot` option or takes a new one.
+        """
+        env_snapshot = self.options.get("env_snapshot")
+        if env_snapshot is None:
+            env_snapshot = EnvSnapshot()
+        return env_snapshot
 
     def secret_file_reader(self) -> dict[str, str]:
         """Reads settings from secrets directory."""
@@ -238,6 +547,54 @@ class ArFiBaseReader(ABC):
         data[key_name] = self.file_path.read_text(encoding=self.file_encoding).strip()
         return data
 
+    def secrets_dir_reader(self) -> dict[str, str]:
+        """Reads settings from secrets directory and its subdirectories.
+
+        Reads only the files without extension, the `names` option limits the files to the field aliases.
+        The files named in the `lazy_names` option are not read, `LazySecretStr` reads them on the first access.
+        Names are compared in lower case unless the `case_sensitive` option is set.
+        """
+
+        names: set[str] | None = self.options.get("names")
+        lazy_names: set[str] = self.options.get("lazy_names") or set()
+        case_sensitive: bool = self.options.get("case_sensitive", False)
+        data: dict[str, str | LazySecretStr] = {}
+        self._read_secrets_dir(os.fspath(self.file_path), names, lazy_names, case_sensitive, data)
+        return data
+
+    def _read_secrets_dir(
+        self,
+        path: str,
+        names: set[str] | None,
+        lazy_names: set[str],
+        case_sensitive: bool,
+        data: dict[str, str | LazySecretStr],
+    ) -> None:
+        if self.secrets_cache is None:
+            entries = scan_dir(path)
+        else:
+            entries = self.secrets_cache.listdir(path)
+        for name, file_path, is_file, _ in entries:
+            if not is_file or os.path.splitext(name)[1]:
+                continue
+            key = name if case_sensitive else name.lower()
+            if names is not None and key not in names:
+                continue
+            if key in lazy_names:
+                data[name] = LazySecretStr(file_path, self.file_encoding)
+                continue
+            try:
+                if self.secrets_cache is None:
+                    data[name] = read_text(file_path, self.file_encoding)
+                else:
+                    data[name] = self.secrets_cache.read_text(file_path, self.file_encoding)
+            except UnicodeDecodeError as e:
+                raise ArFiSettingsError(f"Error reading file: `{Path(file_path).as_posix()}`") from e
+        # The files of the subdirectories override the files of the parent, as `rglob("*")` does
+        for _, dir_path, _, is_dir in entries:
+            if is_dir:
+                self._read_secrets_dir(dir_path, names, lazy_names, case_sensitive, data)
+
     def cli_reader(self) -> dict[str, Any]:
         """Reads settings from CLI."""
 
@@ -258,10 +615,76 @@ class ArFiBaseReader(ABC):
         """
         cls.default_cli_reader = validate_cli_reader(cli_reader)
 
+    @classmethod
+    def setup_env_file_parser(
+        cls,
+        parser: Literal["native", "dotenv"],
+        interpolate: bool = True,
+        strict: bool = False,
+    ) -> None:
+        """Setup the parser of .env files.
+
+        parser: str `native` is the built-in one pass parser, see `parse_env_lines`,
+            `dotenv` is `dotenv_values` of python-dotenv
+        interpolate: bool Expand `${NAME}` and `${NAME:-default}` in the values,
+            the native parser takes the variables from the environment snapshot of the settings
+        strict: bool The native parser raises `ArFiSettingsError` on the invalid lines instead of skipping them
+        """
+        if parser not in ENV_FILE_PARSERS:
+            raise unknown_env_file_parser(parser)
+        cls.env_file_parser = parser
+        cls.env_file_interpolate = interpolate
+        cls.env_file_strict = strict
+
+    @classmethod
+    def setup_parse_cache(cls, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024) -> ParseCache:
+        """Enable the parse cache of the config and .env files.
+
+        Parsed files are cached by (resolved path, mtime_ns, size, encoding, reader)
+        and returned as read-only mappings, so they must not be modified by the callers.
+
+        max_entries: int Maximum number of cached files
+        max_bytes: int Maximum total size of cached files
+        """
+        cls.parse_cache = ParseCache(max_entries=max_entries, max_bytes=max_bytes)
+        return cls.parse_cache
+
+    @classmethod
+    def disable_parse_cache(cls) -> None:
+        """Disable the parse cache."""
+        cls.parse_cache = None
+
+    @classmethod
+    def setup_secrets_cache(cls, max_files: int = 0) -> SecretsCache:
+        """Enable the cache of the secrets directories, the listings cache is enabled by default.
+
+        Directory listings are cached by the directory mtime.
+        max_files: int Maximum number of cached secret files, they are cached by their mtime and size.
+            The cached files are the plaintext secrets kept in memory, 0 disables it.
+        """
+        cls.secrets_cache = SecretsCache(max_files=max_files)
+        return cls.secrets_cache
+
+    @classmethod
+    def disable_secrets_cache(cls) -> None:
+        """Disable the cache of the secrets directories."""
+        cls.secrets_cache = None
+
     @abstractmethod
     def read(self) -> dict[str, Any]:
         """Read and return settings."""
 
+    async def aread(self) -> dict[str, Any]:
+        """Read and return settings without blocking the event loop.
+
+        By default `read()` is called in a thread.
+        Override it for the native async I/O, `ArFiSettings.aload()` awaits it on the event loop.
+        """
+
+        import asyncio
+
+        return await asyncio.to_thread(self.read)
+
 
 class ArFiReader(ArFiBaseReader):
     """Reads settings from file."""
@@ -274,6 +697,8 @@ class ArFiReader(ArFiBaseReader):
             return self.cli_reader()
         elif self.is_env:
             return self.env_reader()
+        elif self.is_secrets_dir:
+            return self.secrets_dir_reader()
         elif self.is_secret_file:
             return self.secret_file_reader()
         elif self.file_path is not None:
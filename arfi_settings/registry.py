@@ -0,0 +1,93 @@
+import threading
+import weakref
+from typing import Any, Generic, TypeVar
+
+from .errors import ArFiSettingsError
+
+__all__ = ("WeakRegistry",)
+
+T = TypeVar("T")
+
+
+class WeakRegistry(Generic[T]):
+    """Registry of objects by `id()`, which does not keep them alive.
+
+    An entry is removed as soon as its object is garbage collected,
+    so a recycled `id()` never picks up a stale entry.
+    With `max_size` only the entries of the dead objects are dropped when the registry is full,
+    the live objects are never evicted, `ArFiSettingsError` is raised instead.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        if max_size is not None and max_size < 1:
+            raise ValueError("`max_size` must be greater than 0")
+        self.max_size = max_size
+        self._data: dict[int, tuple[weakref.ref, Any]] = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, obj_id: int) -> bool:
+        return self.get_object(obj_id) is not None
+
+    def _make_callback(self, obj_id: int):
+        data = self._data
+
+        def remove(ref: weakref.ref) -> None:
+            entry = data.get(obj_id)
+            if entry is not None and entry[0] is ref:
+                data.pop(obj_id, None)
+
+        return remove
+
+    def get_object(self, obj_id: int | None) -> T | None:
+        """Return the live object by `id()`."""
+
+        entry = self._data.get(obj_id)
+        if entry is None:
+            return None
+        return entry[0]()
+
+    def get(self, obj: T, default: Any = None) -> Any:
+        """Return the value stored for the object."""
+
+        entry = self._data.get(id(obj))
+        if entry is None or entry[0]() is not obj:
+            return default
+        return entry[1]
+
+    def set(self, obj: T, value: Any = None, max_size: int | None = None) -> None:
+        """Store the value for the object, `max_size` overrides the max size of the registry."""
+
+        if max_size is None:
+            max_size = self.max_size
+        obj_id = id(obj)
+        ref = weakref.ref(obj, self._make_callback(obj_id))
+        with self._lock:
+            self._data.pop(obj_id, None)
+            if max_size is not None and len(self._data) >= max_size:
+                for dead_id in [key for key, (key_ref, _) in self._data.items() if key_ref() is None]:
+                    del self._data[dead_id]
+                if len(self._data) >= max_size:
+                    raise ArFiSettingsError(
+                        f"The registry is full, it keeps {len(self._data)} live objects with max size {max_size}. "
+                        "Delete the unused objects or increase the max size"
+                    )
+            self._data[obj_id] = (ref, value)
+
+    def pop(self, obj: T, default: Any = None) -> Any:
+        """Remove the object and return its value."""
+
+        with self._lock:
+            entry = self._data.get(id(obj))
+            if entry is None or entry[0]() is not obj:
+                return default
+            del self._data[id(obj)]
+        return entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+
+        with self._lock:
+            self._data.clear()
@@ -106,6 +106,7 @@ class PyProjectSchema(BaseModel):
     encoding: str | None = None
     cli: bool = False
     secrets_dir: str | None = None
+    secrets_lazy: bool = False
     include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS]] = []
     exclude_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS]] = []
 
@@ -237,6 +238,7 @@ class SettingsConfigSchema(FileConfigSchema, EnvConfigSchema):
     encoding: str | None = STR_SENTINEL
     cli: bool | None = None
     secrets_dir: PathType | None = DEFAULT_PATH_SENTINEL
+    secrets_lazy: bool | None = None
     conf_path: list[Path] = []
     env_path: list[Path] = []
     include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS]] | None = None
@@ -258,6 +260,7 @@ class SettingsConfigSchema(FileConfigSchema, EnvConfigSchema):
             encoding=self.encoding if self.encoding is not STR_SENTINEL else None,
             cli=self.cli if self.cli is not None else False,
             secrets_dir=self.secrets_dir if self.secrets_dir is not DEFAULT_PATH_SENTINEL else None,
+            secrets_lazy=self.secrets_lazy if self.secrets_lazy is not None else False,
             # secrets_dir=self.secrets_dir if self.secrets_dir != DEFAULT_PATH_SENTINEL else None,
             include_inherit_parent=self.include_inherit_parent if self.include_inherit_parent is not None else [],
             exclude_inherit_parent=self.exclude_inherit_parent if self.exclude_inherit_parent is not None else [],
@@ -314,6 +317,7 @@ class SettingsParamsSchema(BaseModel):
     encoding: str | None = Field(STR_SENTINEL, alias="_encoding")
     cli: bool | None = Field(None, alias="_cli")
     secrets_dir: PathType | None = Field(DEFAULT_PATH_SENTINEL, alias="_secrets_dir")
+    secrets_lazy: bool | None = Field(None, alias="_secrets_lazy")
     include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS]] | None = Field(None, alias="_include_inherit_parent")
     exclude_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS]] | None = Field(None, alias="_exclude_inherit_parent")
     handler: str = Field(STR_SENTINEL, alias="_handler")
@@ -396,6 +400,7 @@ class SettingsParamsSchema(BaseModel):
             encoding=self.encoding if self.encoding is not STR_SENTINEL else None,
             cli=self.cli if self.cli is not None else False,
             secrets_dir=self.secrets_dir if self.secrets_dir is not DEFAULT_PATH_SENTINEL else None,
+            secrets_lazy=self.secrets_lazy if self.secrets_lazy is not None else False,
             include_inherit_parent=self.include_inherit_parent if self.include_inherit_parent is not None else [],
             exclude_inherit_parent=self.exclude_inherit_parent if self.exclude_inherit_parent is not None else [],
             # handler settings
@@ -0,0 +1,185 @@
+import copy
+from enum import Enum
+from pathlib import Path, PurePath
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping
+
+from pydantic import AliasChoices, BaseModel
+
+from .environ import EnvSnapshot
+from .errors import ArFiSettingsError
+from .utils import is_settings
+
+if TYPE_CHECKING:
+    from .main import ArFiSettings
+
+__all__ = ("SettingsSnapshot",)
+
+IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, PurePath, Enum, range, EnvSnapshot)
+IMMUTABLE_EXACT_TYPES = frozenset((type(None), bool, int, float, str, type(PurePath()), type(Path())))
+"""The most common immutable types checked by `type()` without `isinstance()`."""
+
+
+def is_immutable(value: Any) -> bool:
+    """Checks that the value can be shared between instances without copying."""
+
+    if isinstance(value, IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(is_immutable(item) for item in value)
+    return False
+
+
+def copy_value(value: Any) -> Any:
+    """Returns the value itself if it is immutable, otherwise its deep copy.
+
+    Lists, dicts, sets and pydantic models are copied directly, it is much faster than `copy.deepcopy()`.
+    """
+
+    value_type = type(value)
+    if value_type in IMMUTABLE_EXACT_TYPES:
+        return value
+    if value_type is list:
+        return [item if type(item) in IMMUTABLE_EXACT_TYPES else copy_value(item) for item in value]
+    if value_type is dict:
+        return {
+            key: item if type(item) in IMMUTABLE_EXACT_TYPES else copy_value(item) for key, item in value.items()
+        }
+    if is_immutable(value):
+        return value
+    if value_type is set and all(is_immutable(item) for item in value):
+        return set(value)
+    if isinstance(value, BaseModel) and not is_settings(value_type):
+        value = value.model_copy()
+        fields = value.__dict__
+        for name, item in fields.items():
+            if type(item) not in IMMUTABLE_EXACT_TYPES:
+                fields[name] = copy_value(item)
+        return value
+    return copy.deepcopy(value)
+
+
+def field_names_by_alias(settings_class: type["ArFiSettings"]) -> dict[str, str]:
+    """Maps the aliases of the fields to the field names."""
+
+    names = dict()
+    for field_name, field in settings_class.model_fields.items():
+        for alias in (field.alias, field.validation_alias):
+            if isinstance(alias, str):
+                names[alias] = field_name
+            elif isinstance(alias, AliasChoices):
+                for choice in alias.choices:
+                    if isinstance(choice, str):
+                        names[choice] = field_name
+    return names
+
+
+class SettingsSnapshot:
+    """Frozen value tree of the resolved settings.
+
+    Built by `ArFiSettings.snapshot()`. `ArFiSettings.from_snapshot()` creates instances from it
+    without reading env, files and pyproject.toml, only the overridden fields are validated.
+    Nested settings are stored as nested snapshots.
+    """
+
+    __slots__ = (
+        "settings_class",
+        "values",
+        "fields_set",
+        "private_values",
+    )
+
+    def __init__(
+        self,
+        settings_class: type["ArFiSettings"],
+        values: Mapping[str, Any],
+        fields_set: set[str] | frozenset[str],
+        private_values: Mapping[str, Any],
+    ) -> None:
+        object.__setattr__(self, "settings_class", settings_class)
+        object.__setattr__(self, "values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "fields_set", frozenset(fields_set))
+        object.__setattr__(self, "private_values", MappingProxyType(dict(private_values)))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"'{self.__class__.__name__}' object is read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"'{self.__class__.__name__}' object is read-only")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.settings_class.__name__})"
+
+    def __copy__(self) -> "SettingsSnapshot":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "SettingsSnapshot":
+        return self
+
+    @classmethod
+    def take(cls, instance: "ArFiSettings") -> "SettingsSnapshot":
+        """Take snapshot of the settings instance."""
+
+        values = dict()
+        for field_name in type(instance).model_fields:
+            value = getattr(instance, field_name)
+            if is_settings(type(value)):
+                value = cls.take(value)
+            else:
+                value = copy_value(value)
+            values[field_name] = value
+        private_values = dict()
+        for name in instance.__slots__:
+            value = getattr(instance, name, SettingsSnapshot)
+            if value is not SettingsSnapshot:
+                private_values[name] = copy_value(value)
+        return cls(
+            settings_class=type(instance),
+            values=values,
+            fields_set=instance.model_fields_set,
+            private_values=private_values,
+        )
+
+    def build(self, settings_class: type["ArFiSettings"] | None = None, **overrides: Any) -> "ArFiSettings":
+        """Create settings instance from the snapshot."""
+
+        if settings_class is None:
+            settings_class = self.settings_class
+        if not issubclass(self.settings_class, settings_class):
+            raise ArFiSettingsError(
+                f"Snapshot of `{self.settings_class.__name__}` can not be used to create `{settings_class.__name__}`"
+            )
+        settings_class = self.settings_class
+        fields = settings_class.model_fields
+        if any(name not in fields for name in overrides):
+            names = field_names_by_alias(settings_class)
+            overrides = {name if name in fields else names.get(name, name): value for name, value in overrides.items()}
+
+        values = dict()
+        validate = dict()
+        fields_set = set(self.fields_set)
+        for field_name, value in self.values.items():
+            if field_name in overrides:
+                override = overrides.pop(field_name)
+                if isinstance(value, SettingsSnapshot) and isinstance(override, dict):
+                    values[field_name] = value.build(**override)
+                    fields_set.add(field_name)
+                else:
+                    validate[field_name] = override
+                    values[field_name] = None
+                continue
+            if isinstance(value, SettingsSnapshot):
+                value = value.build()
+            else:
+                value = copy_value(value)
+            values[field_name] = value
+        # Unknown fields are passed to the validator to raise the error of the model.
+        validate.update(overrides)
+
+        instance = settings_class.model_construct(_fields_set=fields_set, **values)
+        # The private values such as `_conf_path` are mutable, every instance has its own copy.
+        for name, value in self.private_values.items():
+            setattr(instance, name, copy_value(value))
+        for field_name, value in validate.items():
+            settings_class.__pydantic_validator__.validate_assignment(instance, field_name, value)
+        return instance
@@ -1,5 +1,5 @@
-import copy
 import warnings
+import weakref
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, ClassVar, Literal, Optional
 
@@ -12,8 +12,11 @@ from .entity import (
     FileConfigEntity as conf,
     ModelConfigEntity as model,
 )
+from .environ import EnvSnapshot
 from .errors import ArFiSettingsError
 from .handlers import ArFiBaseHandler, ArFiHandler
+from .provenance import FieldSource
+from .registry import WeakRegistry
 from .schemes import (
     CONF_INCLUDE_EXLUDE_PARAMS,
     ENV_INCLUDE_EXLUDE_PARAMS,
@@ -24,6 +27,7 @@ from .schemes import (
     SettingsConfigSchema,
     SettingsParamsSchema,
 )
+from .tracing import STAGE_PYPROJECT, tracing_hooks
 from .types import (
     DEFAULT_PATH_SENTINEL,
     LIST_STR_SENTINEL,
@@ -39,67 +43,83 @@ from .utils import is_settings
 if TYPE_CHECKING:
     from .main import ArFiSettings
 
-init_settings = None
-
-
-class InstanceConfig(BaseModel):
-    root_dir: PathType | None = None
-    base_dir: PathType | None = None
-    instance: Optional[BaseModel] = None
-
-    read_config: bool = True
-    read_config_force: bool | None = None
-    read_pyproject_toml: bool = True
-    read_pyproject_toml_force: bool | None = None
-    pyproject_toml_path: PathType | None = None
-    mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
-    parent_mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
-    mode_dir_path: PathType = DEFAULT_PATH_SENTINEL
-    computed_mode_dir: str = ""
-    source_mode_dir: str = ""
-    nested_mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
-    mode_dir_attr: str | None = None
-    mode_dir_inherit_nested: bool = True
-    mode_dir_inherit_parent: bool = True
-    file_config_inherit_parent: bool = True
-    env_config_inherit_parent: bool = True
+class InstanceConfigSchema(BaseModel):
+    """Validates the class config of the settings instance, the input boundary of `InstanceConfig`."""
 
     file_config: FileConfigDict = FileConfigDict()
     env_config: EnvConfigDict = EnvConfigDict()
-    global_config: GlobalConfigDict = GlobalConfigDict()
-    class_file_config: FileConfigSchema = FileConfigSchema()
-    init_file_config: FileConfigSchema = FileConfigSchema()
-    parent_file_config: FileConfigSchema = FileConfigSchema()
-    computed_file_config: FileConfigDict = {}
-    conf_path: list[Path] = []
-
-    class_env_config: EnvConfigSchema = EnvConfigSchema()
-    init_env_config: EnvConfigSchema = EnvConfigSchema()
-    parent_env_config: EnvConfigSchema = EnvConfigSchema()
-    computed_env_config: EnvConfigDict = {}
-    env_path: list[Path] = []
-
-    handler_class: type[ArFiBaseHandler] = ArFiHandler
-    handler: str = "default_main_handler"
-    handler_inherit_parent: bool = True
-    ordered_settings: list[str] = ORDERED_SETTINGS
-    ordered_settings_inherit_parent: bool = True
-
-    settings_config: Optional[SettingsConfigSchema] = None
-    class_settings_config: Optional[SettingsConfigSchema] = None
-    settings_init_params: SettingsParamsSchema = SettingsParamsSchema()
-    values_by_default: dict[str, Any] = {}
-    init_kwargs: dict[str, Any] = {}
-    handler_tree: list[list[str]] = []
-    handler_parent_mode_dir: list[str | Path] = []
-
-    modified_class_vars: set[str] = set()
-    inherited_params: list[str] = []
-    search_base_dir: bool = True
-    init_params: PyProjectSchema = PyProjectSchema()
 
+    model_config = ConfigDict(
+        extra="ignore",
+        validate_default=False,
+        validate_return=False,
+    )
+
+
+class InstanceConfig:
+    """Config of the settings instance.
+
+    A plain slotted object on the construction hot path. The values come from already validated
+    init params, class config and pyproject.toml schemes, so the assignments are not validated again.
+    """
+
+    __slots__ = (
+        "root_dir",
+        "base_dir",
+        "read_config",
+        "read_config_force",
+        "read_pyproject_toml",
+        "read_pyproject_toml_force",
+        "pyproject_toml_path",
+        "mode_dir",
+        "parent_mode_dir",
+        "mode_dir_path",
+        "computed_mode_dir",
+        "source_mode_dir",
+        "nested_mode_dir",
+        "mode_dir_attr",
+        "mode_dir_inherit_nested",
+        "mode_dir_inherit_parent",
+        "file_config_inherit_parent",
+        "env_config_inherit_parent",
+        "file_config",
+        "env_config",
+        "global_config",
+        "class_file_config",
+        "init_file_config",
+        "parent_file_config",
+        "computed_file_config",
+        "conf_path",
+        "class_env_config",
+        "init_env_config",
+        "parent_env_config",
+        "computed_env_config",
+        "env_path",
+        "handler_class",
+        "handler",
+        "handler_inherit_parent",
+        "ordered_settings",
+        "ordered_settings_inherit_parent",
+        "settings_config",
+        "class_settings_config",
+        "settings_init_params",
+        "values_by_default",
+        "init_kwargs",
+        "handler_tree",
+        "handler_parent_mode_dir",
+        "env_snapshot",
+        "provenance",
+        "modified_class_vars",
+        "inherited_params",
+        "search_base_dir",
+        "init_params",
+        "arfi_dev_debug",
+        "arfi_debug",
+        "_instance_ref",
+    )
+
+    fields: ClassVar[tuple[str, ...]] = tuple(name for name in __slots__ if not name.startswith("_"))
     _class_vars: ClassVar[set[str]] = {
-        "instance",
         "class_file_config",
         "class_env_config",
         "class_settings_config",
@@ -113,16 +133,70 @@ class InstanceConfig(BaseModel):
         "read_pyproject_toml_force",
         "init_params",
     }
-    model_config = ConfigDict(
-        extra="ignore",
-        validate_assignment=True,
-        validate_default=False,
-        validate_return=False,
-    )
-
-    # TODO: append read arfi_dev_debug from ./config/arfi_dev_debug.toml
-    arfi_dev_debug: bool = False
-    arfi_debug: bool = False
+    _extract_fields: ClassVar[tuple[str, ...]] = tuple(sorted(set(fields) - _class_vars, key=fields.index))
+
+    def __init__(self) -> None:
+        self.root_dir: PathType | None = None
+        self.base_dir: PathType | None = None
+
+        self.read_config: bool = True
+        self.read_config_force: bool | None = None
+        self.read_pyproject_toml: bool = True
+        self.read_pyproject_toml_force: bool | None = None
+        self.pyproject_toml_path: PathType | None = None
+        self.mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
+        self.parent_mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
+        self.mode_dir_path: PathType = DEFAULT_PATH_SENTINEL
+        self.computed_mode_dir: str = ""
+        self.source_mode_dir: str = ""
+        self.nested_mode_dir: PathType | None = DEFAULT_PATH_SENTINEL
+        self.mode_dir_attr: str | None = None
+        self.mode_dir_inherit_nested: bool = True
+        self.mode_dir_inherit_parent: bool = True
+        self.file_config_inherit_parent: bool = True
+        self.env_config_inherit_parent: bool = True
+
+        self.file_config: FileConfigDict = FileConfigDict()
+        self.env_config: EnvConfigDict = EnvConfigDict()
+        self.global_config: GlobalConfigDict = GlobalConfigDict()
+        self.class_file_config: FileConfigSchema = FileConfigSchema()
+        self.init_file_config: FileConfigSchema = FileConfigSchema()
+        self.parent_file_config: FileConfigSchema = FileConfigSchema()
+        self.computed_file_config: FileConfigDict = {}
+        self.conf_path: list[Path] = []
+
+        self.class_env_config: EnvConfigSchema = EnvConfigSchema()
+        self.init_env_config: EnvConfigSchema = EnvConfigSchema()
+        self.parent_env_config: EnvConfigSchema = EnvConfigSchema()
+        self.computed_env_config: EnvConfigDict = {}
+        self.env_path: list[Path] = []
+
+        self.handler_class: type[ArFiBaseHandler] = ArFiHandler
+        self.handler: str = "default_main_handler"
+        self.handler_inherit_parent: bool = True
+        self.ordered_settings: list[str] = list(ORDERED_SETTINGS)
+        self.ordered_settings_inherit_parent: bool = True
+
+        self.settings_config: Optional[SettingsConfigSchema] = None
+        self.class_settings_config: Optional[SettingsConfigSchema] = None
+        self.settings_init_params: SettingsParamsSchema = SettingsParamsSchema()
+        self.values_by_default: dict[str, Any] = {}
+        self.init_kwargs: dict[str, Any] = {}
+        self.handler_tree: tuple[tuple[str, ...], ...] = ()
+        self.handler_parent_mode_dir: tuple[str | Path, ...] = ()
+        self.env_snapshot: Optional[EnvSnapshot] = None
+        self.provenance: dict[str, FieldSource] = {}
+
+        self.modified_class_vars: set[str] = set()
+        self.inherited_params: list[str] = []
+        self.search_base_dir: bool = True
+        self.init_params: PyProjectSchema = PyProjectSchema()
+
+        # TODO: append read arfi_dev_debug from ./config/arfi_dev_debug.toml
+        self.arfi_dev_debug: bool = False
+        self.arfi_debug: bool = False
+
+        self._instance_ref: Optional[weakref.ref] = None
 
     def load(
         self,
@@ -132,6 +206,7 @@ class InstanceConfig(BaseModel):
         _read_pyproject_toml: bool | None = None,
         _pyproject_toml_depth: int | None = None,
         _pyproject_toml_max_depth: int = PYPROJECT_TOML_MAX_DEPTH,
+        _called_file: PathType | None = None,
         _mode_dir: PathType | None = DEFAULT_PATH_SENTINEL,
         _mode_dir_inherit_nested: bool = None,
         _mode_dir_inherit_parent: bool = None,
@@ -161,6 +236,7 @@ class InstanceConfig(BaseModel):
         _ignore_missing: bool = None,
         _encoding: str | None = STR_SENTINEL,
         _secrets_dir: PathType | None = DEFAULT_PATH_SENTINEL,
+        _secrets_lazy: bool = None,
         _include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _exclude_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _handler: str = STR_SENTINEL,
@@ -172,9 +248,10 @@ class InstanceConfig(BaseModel):
     ) -> None:
         """Load settings configuration and params."""
 
-        global init_settings
         # Don't move to global scope !!!
-        from .init_config import init_settings
+        from .init_config import get_init_settings, init_settings_lock
+
+        init_settings = get_init_settings()
 
         values = kwargs.get("values", {})
         self._setup_instance_and_default_value(instance, **values)
@@ -213,47 +290,61 @@ class InstanceConfig(BaseModel):
             values = self.values_by_default
 
         ################ PYPROJECT ################
-        if _read_pyproject_toml is not None:
-            self.read_pyproject_toml = _read_pyproject_toml
-
-        if self._need_read_pyproject(
-            _read_config=_read_config,
-            _read_config_force=_read_config_force,
-        ):
-            init_settings.read_pyproject(
-                read_pyproject_toml=self.read_pyproject_toml,
-                pyproject_toml_depth=_pyproject_toml_depth,
-                pyproject_toml_max_depth=_pyproject_toml_max_depth,
-                class_name=instance.__class__.__name__,
-                search_base_dir=self.search_base_dir,
-            )
-        if _read_pyproject_toml is not False:
-            self.init_params = init_settings.init_params
-
-        if self.pyproject_toml_path != init_settings.pyproject_toml_path:
-            if self.pyproject_toml_path is not None:
-                warnings.warn_explicit(
-                    f"\033[33m\n"
-                    f"Path to pyproject.toml has been changed !!!\n"
-                    f"for instance {instance.__class__.__name__}()\n"
-                    f"inside class {init_settings.main_config_class}\n"
-                    f"    previous path:\n"
-                    f"{self.pyproject_toml_path.as_posix()}\n"
-                    f"    current path:\n"
-                    f"{init_settings.pyproject_toml_path.as_posix()}\n"
-                    f"Call once\n"
-                    f"  from arfi_settings.init_config import init_settings\n"
-                    f"  init_settings.read_pyproject(read_once=True)\n"
-                    f"before import any instance or subclass `ArFiSettings` for fix it."
-                    f"\033[0m",
-                    category=Warning,
-                    filename=init_settings.main_config_file.as_posix(),
-                    lineno=init_settings.called_line,
+        # `init_settings` is shared by the concurrent builds, it is read and its results are taken under the lock.
+        with init_settings_lock:
+            if _read_pyproject_toml is not None:
+                self.read_pyproject_toml = _read_pyproject_toml
+
+            if self._need_read_pyproject(
+                _read_config=_read_config,
+                _read_config_force=_read_config_force,
+            ):
+                read_pyproject_kwargs = dict(
+                    read_pyproject_toml=self.read_pyproject_toml,
+                    pyproject_toml_depth=_pyproject_toml_depth,
+                    pyproject_toml_max_depth=_pyproject_toml_max_depth,
+                    class_name=instance.__class__.__name__,
+                    search_base_dir=self.search_base_dir,
+                    called_file=_called_file,
                 )
-
-        self.pyproject_toml_path = init_settings.pyproject_toml_path
-        self._setup_class_vars_from_pyproject_toml_or_by_default()
-        self._setup_config_dict_variables_from_pyproject_toml_or_by_default()
+                if tracing_hooks.enabled:
+                    tracing_hooks.call(
+                        STAGE_PYPROJECT,
+                        type(instance),
+                        None,
+                        None,
+                        init_settings.read_pyproject,
+                        **read_pyproject_kwargs,
+                    )
+                else:
+                    init_settings.read_pyproject(**read_pyproject_kwargs)
+            if _read_pyproject_toml is not False:
+                self.init_params = init_settings.init_params
+
+            if self.pyproject_toml_path != init_settings.pyproject_toml_path:
+                if self.pyproject_toml_path is not None:
+                    warnings.warn_explicit(
+                        f"\033[33m\n"
+                        f"Path to pyproject.toml has been changed !!!\n"
+                        f"for instance {instance.__class__.__name__}()\n"
+                        f"inside class {init_settings.main_config_class}\n"
+                        f"    previous path:\n"
+                        f"{self.pyproject_toml_path.as_posix()}\n"
+                        f"    current path:\n"
+                        f"{init_settings.pyproject_toml_path.as_posix()}\n"
+                        f"Call once\n"
+                        f"  from arfi_settings.init_config import init_settings\n"
+                        f"  init_settings.read_pyproject(read_once=True)\n"
+                        f"before import any instance or subclass `ArFiSettings` for fix it."
+                        f"\033[0m",
+                        category=Warning,
+                        filename=init_settings.main_config_file.as_posix(),
+                        lineno=init_settings.called_line,
+                    )
+
+            self.pyproject_toml_path = init_settings.pyproject_toml_path
+            self._setup_class_vars_from_pyproject_toml_or_by_default()
+            self._setup_config_dict_variables_from_pyproject_toml_or_by_default()
         ################ END PYPROJECT ################
 
         if self.read_config:
@@ -309,12 +400,15 @@ class InstanceConfig(BaseModel):
     ) -> None:
         """Setup params from handler."""
 
+        _handler_env_snapshot = values.get("_handler_env_snapshot")
+        if _handler_env_snapshot is not None:
+            self.env_snapshot = _handler_env_snapshot
         if _handler_tree := values.get("_handler_tree"):
-            self.handler_tree = _handler_tree
+            self.handler_tree = tuple(tuple(tree) for tree in _handler_tree)
         if _handler_mode_dir_attr := values.get("_handler_mode_dir_attr"):
             self.mode_dir_attr = _handler_mode_dir_attr
         if _handler_parent_mode_dir := values.get("_handler_parent_mode_dir"):
-            self.handler_parent_mode_dir = _handler_parent_mode_dir
+            self.handler_parent_mode_dir = tuple(_handler_parent_mode_dir)
             parent_mode_dir = Path(*_handler_parent_mode_dir).as_posix().strip(".")
             self.parent_mode_dir = parent_mode_dir or DEFAULT_PATH_SENTINEL
         if _handler_ordered_settings := values.get("_handler_ordered_settings"):
@@ -347,8 +441,7 @@ class InstanceConfig(BaseModel):
         pyproject_or_default_fields = self.init_params.model_fields
         # Fields explicitly set by the user in the class
         modified_class_vars = self.instance._modified_class_vars
-        # for field_name in self.model_fields.keys():
-        for field_name in self.model_fields.keys():
+        for field_name in self.fields:
             if field_name in pyproject_or_default_fields:
                 instance_field_name = f"_{field_name}"
                 if hasattr(self.instance, instance_field_name):
@@ -362,8 +455,13 @@ class InstanceConfig(BaseModel):
                     if field_name == "ordered_settings":
                         if field_value != self.ordered_settings and self.ordered_settings != ORDERED_SETTINGS:
                             field_value = self.ordered_settings
+                    if isinstance(field_value, list):
+                        field_value = list(field_value)
                     setattr(self, field_name, field_value)
 
+        from .init_config import get_init_settings
+
+        init_settings = get_init_settings()
         self.base_dir = init_settings.base_dir
         self.root_dir = init_settings.root_dir
         if not self.base_dir and not self.search_base_dir and self.instance.BASE_DIR:
@@ -549,6 +647,18 @@ class InstanceConfig(BaseModel):
 
         self.settings_config = self.class_settings_config
 
+    @property
+    def instance(self) -> Optional["ArFiSettings"]:
+        """Instance of the config. The config does not keep the instance alive."""
+
+        if self._instance_ref is None:
+            return None
+        return self._instance_ref()
+
+    @instance.setter
+    def instance(self, instance: Optional["ArFiSettings"]) -> None:
+        self._instance_ref = None if instance is None else weakref.ref(instance)
+
     def _setup_instance_and_default_value(self, instance: "ArFiSettings", **values) -> None:
         """Setup default value from class."""
 
@@ -568,11 +678,18 @@ class InstanceConfig(BaseModel):
         self.mode_dir_attr = instance._mode_dir_attr
 
         # setup class config
-        self.file_config = instance.file_config
-        self.env_config = instance.env_config
+        class_config = InstanceConfigSchema(
+            file_config=instance.file_config,
+            env_config=instance.env_config,
+        )
+        self.file_config = class_config.file_config
+        self.env_config = class_config.env_config
         self.global_config = GlobalConfigDict()
+        from .init_config import get_init_settings
+
+        init_params_fields = get_init_settings().init_params.model_fields
         for key, value in instance.model_config.items():
-            if key in list(init_settings.init_params.model_fields.keys()):
+            if key in init_params_fields:
                 self.global_config[key] = value
 
         # setup default value
@@ -617,6 +734,7 @@ class InstanceConfig(BaseModel):
         _ignore_missing: bool = None,
         _encoding: str | None = STR_SENTINEL,
         _secrets_dir: PathType | None = DEFAULT_PATH_SENTINEL,
+        _secrets_lazy: bool = None,
         _include_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _exclude_inherit_parent: list[Literal[*INCLUDE_EXLUDE_PARAMS], ...] = None,
         _handler_inherit_parent: bool = None,
@@ -646,7 +764,7 @@ class InstanceConfig(BaseModel):
             self.ordered_settings_inherit_parent = _init_ordered_settings_inherit_parent
         if self.ordered_settings_inherit_parent is False:
             if _ordered_settings != LIST_STR_SENTINEL:
-                self.ordered_settings = _ordered_settings
+                self.ordered_settings = list(_ordered_settings)
 
         if _case_sensitive is not None:
             if _conf_case_sensitive is None:
@@ -766,6 +884,8 @@ class InstanceConfig(BaseModel):
             self.settings_config.encoding = _encoding
         if _secrets_dir != DEFAULT_PATH_SENTINEL:
             self.settings_config.secrets_dir = _secrets_dir
+        if _secrets_lazy is not None:
+            self.settings_config.secrets_lazy = _secrets_lazy
         if _cli is not None:
             self.settings_config.cli = _cli
         self.conf_path = self.instance_conf_path
@@ -870,7 +990,8 @@ class InstanceConfig(BaseModel):
     def instance_computed_file_config(self) -> FileConfigDict:
         """Compute file_config."""
 
-        file_config = copy.deepcopy(self.class_file_config)
+        # The fields are only replaced by the assignment, so the shallow copy is enough.
+        file_config = self.class_file_config.model_copy()
         file_config.conf_include_inherit_parent = self.settings_config.conf_include_inherit_parent
         file_config.conf_exclude_inherit_parent = self.settings_config.conf_exclude_inherit_parent
         if self.file_config_inherit_parent:
@@ -904,7 +1025,7 @@ class InstanceConfig(BaseModel):
     def instance_computed_env_config(self) -> EnvConfigDict:
         """Compute env_config."""
 
-        env_config = copy.deepcopy(self.class_env_config)
+        env_config = self.class_env_config.model_copy()
         env_config.env_include_inherit_parent = self.settings_config.env_include_inherit_parent
         env_config.env_exclude_inherit_parent = self.settings_config.env_exclude_inherit_parent
         if self.env_config_inherit_parent:
@@ -1141,25 +1262,29 @@ class InstanceConfig(BaseModel):
     def extract(self, instance: "ArFiSettings") -> None:
         """Setup config to instance."""
 
-        for field_name in self.model_fields.keys():
-            if field_name in self._class_vars:
-                continue
-            instance_field_name = f"_{field_name}"
-            setattr(instance, instance_field_name, getattr(self, field_name))
+        for field_name in self._extract_fields:
+            setattr(instance, f"_{field_name}", getattr(self, field_name))
 
 
 class ConfigStorage:
-    storage: dict[int, InstanceConfig] = dict()
+    """Storage of the instances configs.
+
+    Configs are dropped together with their instances.
+    The configs of the live instances are never evicted, beyond `max_size`
+    or `ArFiSettings.instances_max_size` the new config raises `ArFiSettingsError`.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        self.storage: WeakRegistry["ArFiSettings"] = WeakRegistry(max_size=max_size)
 
     def get_config(self, instance: "ArFiSettings") -> InstanceConfig:
         """Create or return config for instance."""
 
         assert is_settings(type(instance)), f"type(instance) must be a subclass ArFiSettings, got {type(instance)}"
-        instance_id = id(instance)
-        instance_config = self.storage.get(instance_id, PydanticUndefined)
+        instance_config = self.storage.get(instance, PydanticUndefined)
         if instance_config is PydanticUndefined:
             instance_config = InstanceConfig()
-            self.storage[instance_id] = instance_config
+            self.storage.set(instance, instance_config, max_size=instance.instances_max_size)
         return instance_config
 
 
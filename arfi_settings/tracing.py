@@ -0,0 +1,152 @@
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Protocol, TypeVar
+
+from .errors import ArFiSettingsError
+
+__all__ = (
+    "StageHook",
+    "TracingHooks",
+    "tracing_hooks",
+)
+
+T = TypeVar("T")
+
+STAGE_NEW = "new"
+"""`ArFiSettings.__new__`, including the caller frame inspection."""
+STAGE_SETTINGS = "settings"
+"""Whole `ArFiSettings.__init__`, `source` is the field name for the nested settings."""
+STAGE_INSTANCE_CONFIG = "instance_config"
+"""`InstanceConfig.load`, resolving the instance config."""
+STAGE_PYPROJECT = "pyproject"
+"""Discovery and reading of pyproject.toml."""
+STAGE_PLAN = "plan"
+"""Building or loading the cached handler plan."""
+STAGE_MAIN_HANDLER = "main_handler"
+"""Main handler, `source` is the handler name."""
+STAGE_ORDERED_SETTINGS = "ordered_settings"
+"""Ordered settings handler, `source` is the handler name."""
+STAGE_FILE = "file"
+"""Reading and parsing of one config or .env file, `source` is the handler name."""
+STAGE_VALIDATION = "validation"
+"""Pydantic validation of the resolved values."""
+
+STAGES = (
+    STAGE_NEW,
+    STAGE_SETTINGS,
+    STAGE_INSTANCE_CONFIG,
+    STAGE_PYPROJECT,
+    STAGE_PLAN,
+    STAGE_MAIN_HANDLER,
+    STAGE_ORDERED_SETTINGS,
+    STAGE_FILE,
+    STAGE_VALIDATION,
+)
+
+
+class StageHook(Protocol):
+    """Hook called around the stages of the settings build.
+
+    Both methods are optional.
+    `on_stage_end` is called even if the stage raised an exception.
+    """
+
+    def on_stage_start(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None: ...
+
+    def on_stage_end(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None: ...
+
+
+class TracingHooks:
+    """Registry of the stage hooks.
+
+    Hooks are registered globally or for the settings class, the class hooks are called for its subclasses too.
+    Call sites check `enabled` first, so without hooks tracing costs one attribute lookup.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._global_hooks: list[StageHook] = []
+        self._class_hooks: weakref.WeakKeyDictionary[type, list[StageHook]] = weakref.WeakKeyDictionary()
+        self._resolved: weakref.WeakKeyDictionary[type, tuple[list, list]] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, hook: StageHook, settings_class: type | None = None) -> StageHook:
+        """Register the hook globally or for the settings class."""
+
+        if not callable(getattr(hook, "on_stage_start", None)) and not callable(getattr(hook, "on_stage_end", None)):
+            raise ArFiSettingsError("Hook must define `on_stage_start` or `on_stage_end`")
+        with self._lock:
+            if settings_class is None:
+                self._global_hooks.append(hook)
+            else:
+                self._class_hooks.setdefault(settings_class, []).append(hook)
+            self._update()
+        return hook
+
+    def unregister(self, hook: StageHook, settings_class: type | None = None) -> None:
+        """Unregister the hook, missing hook is ignored."""
+
+        with self._lock:
+            hooks = self._global_hooks if settings_class is None else self._class_hooks.get(settings_class, [])
+            if hook in hooks:
+                hooks.remove(hook)
+            self._update()
+
+    def clear(self) -> None:
+        """Unregister all hooks."""
+
+        with self._lock:
+            self._global_hooks.clear()
+            self._class_hooks.clear()
+            self._update()
+
+    def _update(self) -> None:
+        self._resolved = weakref.WeakKeyDictionary()
+        self.enabled = bool(self._global_hooks) or any(self._class_hooks.values())
+
+    def get_hooks(self, settings_class: type) -> tuple[list[Callable], list[Callable]]:
+        """Return start and end callbacks of the settings class."""
+
+        resolved = self._resolved.get(settings_class)
+        if resolved is not None:
+            return resolved
+        hooks = list(self._global_hooks)
+        for base in reversed(settings_class.__mro__):
+            hooks.extend(self._class_hooks.get(base, ()))
+        starts = [hook.on_stage_start for hook in hooks if callable(getattr(hook, "on_stage_start", None))]
+        ends = [hook.on_stage_end for hook in reversed(hooks) if callable(getattr(hook, "on_stage_end", None))]
+        resolved = (starts, ends)
+        self._resolved[settings_class] = resolved
+        return resolved
+
+    def start(self, stage: str, settings_class: type, source: str | None = None, path: Path | None = None) -> None:
+        for on_stage_start in self.get_hooks(settings_class)[0]:
+            on_stage_start(stage, settings_class, source, path)
+
+    def end(self, stage: str, settings_class: type, source: str | None = None, path: Path | None = None) -> None:
+        for on_stage_end in self.get_hooks(settings_class)[1]:
+            on_stage_end(stage, settings_class, source, path)
+
+    def call(
+        self,
+        stage: str,
+        settings_class: type,
+        source: str | None,
+        path: Path | None,
+        func: Callable[..., T],
+        /,
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Call the function between the start and the end hooks of the stage."""
+
+        self.start(stage, settings_class, source, path)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.end(stage, settings_class, source, path)
+
+
+tracing_hooks = TracingHooks()
+"""Stage hooks of the settings build."""
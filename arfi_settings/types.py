@@ -1,10 +1,13 @@
 from pathlib import Path
 from typing import List, Tuple, Union
 
-from pydantic import ConfigDict
+from pydantic import ConfigDict, SecretStr
 from pydantic._internal._config import config_keys
 from typing_extensions import TypedDict
 
+from .cache import read_text
+from .errors import ArFiSettingsError
+
 MultiPathType = Union[Path, str, List[Union[Path, str]], Tuple[Union[Path, str], ...]]
 PathType = Union[Path, str]
 DEFAULT_PATH_SENTINEL: PathType = Path("")
@@ -48,6 +51,7 @@ class PyProjectConfigDict(TypedDict, total=False):
     encoding: str | None
     cli: bool
     secrets_dir: str | None
+    secrets_lazy: bool
 
     handler: str
     handler_inherit_parent: bool
@@ -98,6 +102,7 @@ class GlobalConfigDict(TypedDict, total=False):
     encoding: str | None
     cli: bool
     secrets_dir: PathType | None
+    secrets_lazy: bool
     include_inherit_parent: list[str] | None
     exclude_inherit_parent: list[str] | None
 
@@ -147,6 +152,7 @@ class SettingsParamsDict(TypedDict, total=False):
     encoding: str | None
     cli: bool
     secrets_dir: PathType | None
+    secrets_lazy: bool
 
     handler: str
     handler_inherit_parent: bool
@@ -154,3 +160,49 @@ class SettingsParamsDict(TypedDict, total=False):
     ordered_settings_inherit_parent: bool
     include_inherit_parent: list[str]
     exclude_inherit_parent: list[str]
+
+
+class LazySecretStr(SecretStr):
+    """`SecretStr` of the secret file, the file is read on the first access to the value.
+
+    Until the value is read it is displayed as masked, even if the file is empty.
+    The lazy secrets are compared and hashed by the file and its encoding, so the file is not read.
+    The comparison with other `SecretStr` reads the file.
+    """
+
+    def __init__(self, file_path: PathType, encoding: str | None = None) -> None:
+        self.file_path = Path(file_path)
+        self.encoding = encoding
+        # The value is read on the first access
+        super().__init__(None)
+
+    @property
+    def _secret_value(self) -> str:
+        if self._value is None:
+            try:
+                self._value = read_text(self.file_path, self.encoding)
+            except (OSError, UnicodeDecodeError) as e:
+                raise ArFiSettingsError(f"Error reading file: `{self.file_path.as_posix()}`") from e
+        return self._value
+
+    @_secret_value.setter
+    def _secret_value(self, value: str | None) -> None:
+        self._value = value
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the file has been read."""
+        return self._value is not None
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazySecretStr):
+            return (self.file_path, self.encoding) == (other.file_path, other.encoding)
+        return isinstance(other, SecretStr) and self.get_secret_value() == other.get_secret_value()
+
+    def __hash__(self) -> int:
+        return hash((self.file_path, self.encoding))
+
+    def _display(self) -> str:
+        if self._value is None:
+            return "**********"
+        return super()._display()
@@ -1,5 +1,7 @@
 import functools
+import importlib
 import inspect
+import json
 import os
 from pathlib import Path
 from typing import Any, Callable, Literal
@@ -23,9 +25,11 @@ __all__ = [
     "create_dict_for_path",
     "search_dict_for_path",
     "allow_json_parse_failure",
+    "get_value_decoder",
     "validate_cli_reader",
     "clean_value",
     "is_descriptor",
+    "make_build",
 ]
 
 
@@ -159,6 +163,78 @@ def allow_json_parse_failure(field, field_name: str | None = None) -> bool:
     return False
 
 
+JSON_START = frozenset('{["-0123456789tfnNI')
+"""First characters of the values which `json.loads` can parse."""
+
+
+def decode_json(value: Any) -> Any:
+    """Decode JSON value, the errors are raised."""
+
+    if not isinstance(value, str):
+        return value
+    return json.loads(value)
+
+
+def decode_json_or_raw(value: Any) -> Any:
+    """Decode JSON value or return the value as is if it is not JSON."""
+
+    if not isinstance(value, str) or value.lstrip()[:1] not in JSON_START:
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def decode_str(value: Any) -> Any:
+    """Return the value as is, only JSON strings are decoded."""
+
+    if not isinstance(value, str) or value.lstrip()[:1] != '"':
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def decode_optional_str(value: Any) -> Any:
+    """Return the value as is, only JSON strings and `null` are decoded."""
+
+    if isinstance(value, str) and value.strip() == "null":
+        return None
+    return decode_str(value)
+
+
+def is_str_annotation(annotation: Any) -> bool:
+    """Checks that annotation is `str` or `Literal` of strings."""
+
+    if annotation is str:
+        return True
+    if get_origin(annotation) is Literal:
+        return all(isinstance(arg, str) for arg in get_args(annotation))
+    return False
+
+
+def get_value_decoder(field, field_name: str | None = None, validated: bool = False) -> Callable[[Any], Any]:
+    """Return decoder of the string values of the field.
+
+    The values of the `str` and string `Literal` fields are passed as is,
+    because other JSON values are not valid for them, `null` of the optional ones is decoded.
+    `validated` - the field has the validators which may accept any decoded value.
+    """
+
+    if not allow_json_parse_failure(field, field_name):
+        return decode_json
+    if not validated and not field.metadata:
+        if is_str_annotation(field.annotation):
+            return decode_str
+        if origin_is_union(get_origin(field.annotation)):
+            args = [arg for arg in get_args(field.annotation) if arg is not type(None)]
+            if len(args) < len(get_args(field.annotation)) and all(is_str_annotation(arg) for arg in args):
+                return decode_optional_str
+    return decode_json_or_raw
+
+
 def validate_cli_reader(cli_reader: Callable) -> Callable:
     """Validate and returns cli reader."""
 
@@ -232,3 +308,15 @@ def is_descriptor(obj, name: str):
     if getattr(type(value), "__get__", None):
         return True
     return False
+
+
+def make_build(settings_class: type, called_file: str | Path | None = None) -> Callable[..., Any]:
+    """Return the function building the settings with the pyproject.toml discovery from the `called_file`.
+
+    By default the discovery starts from the module of the class.
+    """
+
+    if called_file is None:
+        module = importlib.import_module(settings_class.__module__)
+        called_file = getattr(module, "__file__", None) or Path.cwd().as_posix()
+    return functools.partial(settings_class, _called_file=called_file)
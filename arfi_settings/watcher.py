@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable
+
+from .aio import async_loader
+from .environ import EnvSnapshot
+from .errors import ArFiSettingsError
+from .provenance import BuildRecord, ReuseContext, current_reuse, iter_settings_tree
+from .utils import make_build
+
+if TYPE_CHECKING:
+    from .main import ArFiSettings
+
+__all__ = ("SettingsWatcher",)
+
+FileState = tuple[int, int] | None
+
+
+def stat_file(path: Path) -> FileState:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SettingsWatcher:
+    """Rebuilds the settings when the sources it has read are changed.
+
+    Watches the config files (including the MODE files), the .env files, the secrets directories
+    and pyproject.toml which were actually used by the last build.
+    The files are checked by `os.stat()`, the settings are rebuilt only after a change
+    and when the files have not been changed for `debounce` seconds.
+
+    With `incremental` the nested settings which do not depend on the changed files
+    are reused from the previous tree instead of being built again, the reuse is by whole subtrees:
+    the root and the settings with the changed sources are built again with all their nested settings.
+    The whole tree is built again when pyproject.toml or the environment variables are changed.
+
+    Usage:
+        watcher = AppConfig.watch(interval=2, callback=on_change)
+        watcher.start()  # polling in a daemon thread
+        ...
+        watcher.stop()
+
+        # or
+        async for config in AppConfig.watch(interval=2):
+            ...
+    """
+
+    def __init__(
+        self,
+        settings_class: type["ArFiSettings"],
+        interval: float = 1.0,
+        debounce: float = 0.1,
+        callback: Callable[["ArFiSettings"], Any] | None = None,
+        on_error: Callable[[Exception], Any] | None = None,
+        incremental: bool = True,
+        **init_kwargs: Any,
+    ) -> None:
+        if interval <= 0:
+            raise ArFiSettingsError("`interval` must be greater than 0")
+        if debounce < 0:
+            raise ArFiSettingsError("`debounce` must not be negative")
+        self.settings_class = settings_class
+        self.interval = interval
+        self.debounce = debounce
+        self.callback = callback
+        self.on_error = on_error
+        self.incremental = incremental
+        self.init_kwargs = init_kwargs
+        self.record: BuildRecord | None = None
+        self.reused: list[tuple[str, ...]] = []
+        """Field paths of the nested settings reused by the last build."""
+        from .init_config import get_init_settings
+
+        # The rebuilds run in the watcher thread, the pyproject.toml discovery starts from the file of the caller.
+        called_file, _ = get_init_settings()._search_called_file()
+        self._build = make_build(settings_class, called_file)
+        self._state: dict[Path, FileState] = dict()
+        self._pyproject_paths: set[Path] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.settings: "ArFiSettings" = self._load()
+
+    @property
+    def paths(self) -> list[Path]:
+        """Watched files and directories."""
+
+        return list(self._state)
+
+    def _load(self, changed: set[Path] | None = None) -> "ArFiSettings":
+        # The snapshot taken once is compared with the previous one and is the environment of the build.
+        env_snapshot = EnvSnapshot(self.init_kwargs.get("_env_snapshot"))
+        previous = None
+        if changed is not None and self.incremental and self.record is not None:
+            if not changed & self._pyproject_paths and self.record.env_snapshot == env_snapshot:
+                previous = self.record
+        context = ReuseContext(previous, changed, env_snapshot)
+        token = current_reuse.set(context)
+        try:
+            settings = self._build(**{**self.init_kwargs, "_env_snapshot": env_snapshot})
+        finally:
+            current_reuse.reset(token)
+        context.record.add_tree(settings)
+        pyproject_paths = set()
+        for _, instance in iter_settings_tree(settings):
+            if instance.pyproject_toml_path is not None:
+                pyproject_paths.add(Path(instance.pyproject_toml_path).resolve())
+        self.record = context.record
+        self.reused = context.reused
+        self._pyproject_paths = pyproject_paths
+        self._state = self._stat(context.record.paths | pyproject_paths)
+        return settings
+
+    @staticmethod
+    def _stat(paths: Iterable[Path]) -> dict[Path, FileState]:
+        return {path: stat_file(path) for path in paths}
+
+    def changed(self) -> bool:
+        """Check whether any watched file was changed, created or removed."""
+
+        return self._stat(self._state) != self._state
+
+    def reload(self) -> "ArFiSettings | None":
+        """Rebuild the settings, returns None if the build failed.
+
+        On errors the previous settings are kept and the error is passed to `on_error`.
+        """
+
+        state = self._stat(self._state)
+        changed = {path for path, file_state in state.items() if file_state != self._state[path]}
+        try:
+            settings = self._load(changed)
+        except Exception as e:
+            # The failed sources are not retried until they are changed again.
+            self._state = self._stat(self._state)
+            if self.on_error is None:
+                warnings.warn(f"Settings `{self.settings_class.__name__}` were not reloaded: {e}", stacklevel=2)
+            else:
+                self.on_error(e)
+            return None
+        self.settings = settings
+        if self.callback is not None:
+            self.callback(settings)
+        return settings
+
+    def poll(self) -> "ArFiSettings | None":
+        """Check the files once, returns the new settings if they were changed."""
+
+        state = self._stat(self._state)
+        if state == self._state:
+            return None
+        while self.debounce:
+            time.sleep(self.debounce)
+            current = self._stat(state)
+            if current == state:
+                break
+            state = current
+        return self.reload()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            state = self._stat(self._state)
+            if state == self._state:
+                continue
+            while self.debounce and not self._stop.wait(self.debounce):
+                current = self._stat(state)
+                if current == state:
+                    break
+                state = current
+            if not self._stop.is_set():
+                self.reload()
+
+    def start(self) -> "SettingsWatcher":
+        """Start polling in a daemon thread, the new settings are passed to `callback`."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"SettingsWatcher({self.settings_class.__name__})",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SettingsWatcher":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    async def __aiter__(self) -> AsyncIterator["ArFiSettings"]:
+        """Yield the new settings after every change."""
+
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.interval)
+            state = self._stat(self._state)
+            if state == self._state:
+                continue
+            while self.debounce:
+                await asyncio.sleep(self.debounce)
+                current = self._stat(state)
+                if current == state:
+                    break
+                state = current
+            settings = await async_loader.run(self.reload)
+            if settings is not None:
+                yield settings
@@ -0,0 +1,52 @@
+"""Benchmarks of the settings construction pipeline.
+
+Run from the project root:
+
+    python -m benchmarks                      # all cases
+    python -m benchmarks -k env/ -k tree/     # cases which names contain any pattern
+    python -m benchmarks --stages             # with per-stage time and allocations
+    python -m benchmarks --save before        # store benchmarks/baselines/before.json
+    python -m benchmarks --compare before     # compare with the stored baseline
+"""
+
+import argparse
+
+from .cases import CASES
+from .runner import load_baseline, make_report, print_comparison, print_results, run_case, save_baseline, select_cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[2:]),
+    )
+    parser.add_argument("-k", dest="patterns", action="append", help="run cases which names contain the pattern")
+    parser.add_argument("-n", "--number", type=int, default=100, help="constructions per measurement")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="measurements per case, the best is reported")
+    parser.add_argument("--stages", action="store_true", help="show per-stage time and allocations")
+    parser.add_argument("--save", metavar="NAME", help="save results as the baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare results with the baseline")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        return
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    results = dict()
+    for name in select_cases(args.patterns):
+        results[name] = run_case(name, number=args.number, repeat=args.repeat, stages=args.stages or bool(args.save))
+
+    if baseline is None:
+        print_results(results, show_stages=args.stages)
+    else:
+        print_comparison(results, baseline)
+    if args.save:
+        file_path = save_baseline(make_report(results, args.number), args.save)
+        print(f"saved: {file_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Micro-benchmark of the per-instance cost of `InstanceConfig`.
+
+Run from the project root:
+
+    python -m benchmarks.bench_instance_config
+"""
+
+import argparse
+import timeit
+import tracemalloc
+
+from arfi_settings import ArFiSettings
+from arfi_settings.storage import InstanceConfig
+
+
+class NestedConfig(ArFiSettings):
+    host: str = "localhost"
+    port: int = 5432
+
+
+class AppConfig(ArFiSettings):
+    name: str = "app"
+    debug: bool = False
+    db: NestedConfig = NestedConfig()
+
+
+def create_instance_config() -> None:
+    InstanceConfig()
+
+
+def load_instance_config() -> None:
+    instance = AppConfig.__new__(AppConfig)
+    config = InstanceConfig()
+    config.load(instance=instance)
+    config.extract(instance)
+
+
+def create_settings() -> None:
+    AppConfig()
+
+
+CASES = {
+    "InstanceConfig()": create_instance_config,
+    "InstanceConfig.load() + extract()": load_instance_config,
+    "AppConfig() with nested settings": create_settings,
+}
+
+
+def measure(func, number: int) -> tuple[float, int]:
+    """Return time per call in microseconds and peak of allocated memory per call in bytes."""
+
+    func()
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    tracemalloc.start()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds * 1_000_000, peak - current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=1000, help="calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'case':<40}{'time, us':>12}{'peak, B':>12}")
+    for name, func in CASES.items():
+        time_us, allocated = measure(func, args.number)
+        print(f"{name:<40}{time_us:>12.1f}{allocated:>12}")
+
+
+if __name__ == "__main__":
+    main()
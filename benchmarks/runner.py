@@ -0,0 +1,133 @@
+"""Run the benchmark cases and store, load and compare the baselines."""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from .cases import CASES
+from .stages import StageRecorder
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+
+def measure_peak(func: Callable[[], Any]) -> int:
+    """Return peak of allocated memory of one call in bytes."""
+
+    tracemalloc.start()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - current
+
+
+def run_case(name: str, number: int, repeat: int = 5, stages: bool = True) -> dict[str, Any]:
+    """Run one case.
+
+    Total time is measured without instrumentation, the stage breakdown is a separate run.
+    """
+
+    source_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            with CASES[name](Path(tmp_dir)) as build:
+                # Settings look for pyproject.toml from the calling file,
+                # so the build is never called directly from `<timeit-src>`.
+                def func() -> Any:
+                    return build()
+
+                func()
+                seconds = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+                result: dict[str, Any] = {
+                    "time_us": seconds * 1_000_000,
+                    "peak_bytes": measure_peak(func),
+                }
+                if stages:
+                    stage_number = max(1, number // 10)
+                    with StageRecorder() as recorder:
+                        for _ in range(stage_number):
+                            func()
+                    result["stages"] = recorder.result(stage_number)
+        finally:
+            os.chdir(source_cwd)
+    return result
+
+
+def select_cases(patterns: list[str] | None) -> list[str]:
+    if not patterns:
+        return list(CASES)
+    return [name for name in CASES if any(pattern in name for pattern in patterns)]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(results: dict[str, dict[str, Any]], number: int) -> dict[str, Any]:
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "number": number,
+        },
+        "cases": results,
+    }
+
+
+def save_baseline(report: dict[str, Any], name: str) -> Path:
+    BASELINES_DIR.mkdir(exist_ok=True)
+    file_path = BASELINES_DIR / f"{name}.json"
+    file_path.write_text(json.dumps(report, indent=2))
+    return file_path
+
+
+def load_baseline(name: str) -> dict[str, Any]:
+    file_path = Path(name)
+    if not file_path.is_file():
+        file_path = BASELINES_DIR / f"{name}.json"
+    return json.loads(file_path.read_text())
+
+
+def print_results(results: dict[str, dict[str, Any]], show_stages: bool = False) -> None:
+    print(f"{'case':<56}{'time, us':>12}{'peak, B':>12}")
+    for name, result in results.items():
+        print(f"{name:<56}{result['time_us']:>12.1f}{result['peak_bytes']:>12}")
+        if show_stages:
+            for stage, stats in result.get("stages", {}).items():
+                print(
+                    f"    {stage:<52}{stats['time_us']:>12.1f}{stats['memory_bytes']:>12}"
+                    f"{'calls: ' + format(stats['calls'], 'g'):>14}"
+                )
+
+
+def print_comparison(results: dict[str, dict[str, Any]], baseline: dict[str, Any]) -> None:
+    meta = baseline["meta"]
+    print(f"baseline: commit {meta.get('commit')}, {meta.get('date')}, python {meta.get('python')}")
+    print(f"{'case':<56}{'old, us':>12}{'new, us':>12}{'ratio':>8}")
+    for name, result in results.items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            print(f"{name:<56}{'-':>12}{result['time_us']:>12.1f}{'-':>8}")
+            continue
+        ratio = result["time_us"] / old["time_us"]
+        print(f"{name:<56}{old['time_us']:>12.1f}{result['time_us']:>12.1f}{ratio:>8.2f}")
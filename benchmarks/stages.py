@@ -0,0 +1,65 @@
+"""Per-stage timings of the settings construction pipeline.
+
+The recorder is registered as a stage hook while it is active.
+Each stage reports its own (exclusive) time and net allocated memory,
+the time of the nested stages is reported by the nested stages.
+"""
+
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+from arfi_settings.profiler import stage_label
+from arfi_settings.tracing import STAGE_FILE, tracing_hooks
+
+
+class StageRecorder:
+    """Context manager which records exclusive time and net allocations of every stage."""
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.time: dict[str, float] = defaultdict(float)
+        self.memory: dict[str, int] = defaultdict(int)
+        self.calls: dict[str, int] = defaultdict(int)
+        self._stack: list[list] = []
+
+    def on_stage_start(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None:
+        memory_start = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        self._stack.append([time.perf_counter(), memory_start, 0.0, 0])
+
+    def on_stage_end(self, stage: str, settings_class: type, source: str | None, path: Path | None) -> None:
+        start, memory_start, child_time, child_memory = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0] - memory_start if self.trace_memory else 0
+        # Files of the cases are generated in temporary directories, they are reported as one stage.
+        name = "file read and parse" if stage == STAGE_FILE else stage_label(stage, source, path)
+        self.time[name] += elapsed - child_time
+        self.memory[name] += memory - child_memory
+        self.calls[name] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+            self._stack[-1][3] += memory
+
+    def __enter__(self) -> "StageRecorder":
+        if self.trace_memory:
+            tracemalloc.start()
+        tracing_hooks.register(self)
+        return self
+
+    def __exit__(self, *args) -> None:
+        tracing_hooks.unregister(self)
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    def result(self, number: int = 1) -> dict[str, dict[str, float]]:
+        """Return stages sorted by time, the values are per one construction."""
+
+        return {
+            stage: {
+                "time_us": self.time[stage] / number * 1_000_000,
+                "memory_bytes": self.memory[stage] // number,
+                "calls": self.calls[stage] / number,
+            }
+            for stage in sorted(self.time, key=self.time.__getitem__, reverse=True)
+        }
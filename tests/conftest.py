@@ -32,6 +32,12 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "connectors")
 
 
+@pytest.fixture(autouse=True)
+def clear_path_cache():
+    yield
+    InitSettings.clear_cache()
+
+
 @pytest.fixture(scope="session")
 def platform_system():
     yield platform.system()
@@ -60,7 +66,6 @@ def path_base_dir(tmp_path, monkeypatch):
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
     yield
 
 
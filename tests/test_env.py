@@ -4,6 +4,7 @@ import pytest
 from pydantic import AliasChoices, Field, BaseModel, AliasPath
 
 from arfi_settings import ArFiSettings, EnvConfigDict
+from arfi_settings.environ import EnvIndex, EnvSnapshot
 
 
 class DataBase(ArFiSettings):
@@ -1272,3 +1273,165 @@ def test_non_pydantic_field(monkeypatch, cwd_to_tmp, path_base_dir):
     monkeypatch.setenv("numbers", "null")
     config = AppConfig()
     assert config.numbers is None
+
+
+# @pytest.mark.current
+@pytest.mark.env
+def test_env_index():
+    data = {
+        "APP__DB__HOST": "host",
+        "app__db__port": "5432",
+        "App__Name": "name",
+        "APP_DB__USER": "user",
+        "X____Y": "y",
+    }
+    env_index = EnvIndex(data)
+    assert env_index.lower_data["app__db__host"] == "host"
+    assert env_index.get_keys("APP__NAME") == ["App__Name"]
+    assert env_index.search_prefix("app__db__", "__") == ["APP__DB__HOST", "app__db__port"]
+    assert env_index.search_prefix("APP__", "__") == ["APP__DB__HOST", "app__db__port", "App__Name"]
+    assert env_index.search_prefix("APP_", "__") == ["APP__DB__HOST", "app__db__port", "App__Name", "APP_DB__USER"]
+    assert env_index.search_prefix("app_db__", "__") == ["APP_DB__USER"]
+    assert env_index.search_prefix("x___", "__") == ["X____Y"]
+    assert env_index.search_prefix("app__db__", "") == ["APP__DB__HOST", "app__db__port"]
+    assert env_index.search_prefix("missing__", "__") == []
+
+
+# @pytest.mark.current
+@pytest.mark.env
+def test_env_snapshot_shared_by_tree(monkeypatch, cwd_to_tmp, path_base_dir):
+    monkeypatch.setenv("DB__HOST", "env_host")
+
+    class DataBase(ArFiSettings):
+        HOST: str = "localhost"
+
+    class AppConfig(ArFiSettings):
+        db: DataBase
+        env_config = EnvConfigDict(env_nested_delimiter="__")
+
+    config = AppConfig()
+    assert config.db.HOST == "env_host"
+    assert isinstance(config.env_snapshot, EnvSnapshot)
+    assert config.db.env_snapshot is config.env_snapshot
+
+    snapshot = config.env_snapshot
+    monkeypatch.setenv("DB__HOST", "new_host")
+    assert snapshot["DB__HOST"] == "env_host"
+    assert AppConfig(_env_snapshot=snapshot).db.HOST == "env_host"
+    snapshot.refresh()
+    assert snapshot["DB__HOST"] == "new_host"
+    assert AppConfig(_env_snapshot=snapshot).db.HOST == "new_host"
+    assert AppConfig().env_snapshot is not snapshot
+
+
+# @pytest.mark.current
+@pytest.mark.env
+def test_env_file_interpolated_by_snapshot(monkeypatch, cwd_to_tmp, path_base_dir):
+    (cwd_to_tmp / ".env").write_text("URL=postgres://${DB_HOST:-localhost}/app\n")
+    monkeypatch.setenv("DB_HOST", "live")
+
+    class AppConfig(ArFiSettings):
+        URL: str = ""
+        env_config = EnvConfigDict(env_file=".env")
+
+    assert AppConfig().URL == "postgres://live/app"
+    assert AppConfig(_env_snapshot=EnvSnapshot({"DB_HOST": "snapshot"})).URL == "postgres://snapshot/app"
+    assert AppConfig(_env_snapshot=EnvSnapshot({})).URL == "postgres://localhost/app"
+
+
+# @pytest.mark.current
+@pytest.mark.env
+def test_env_value_decoders(monkeypatch, cwd_to_tmp, path_base_dir):
+    import json
+
+    from pydantic import field_validator
+
+    from arfi_settings import utils
+
+    env = {
+        "TEXT": "plain text",
+        "NUMBER_TEXT": "123",
+        "QUOTED": '"quoted"',
+        "LEVEL": "debug",
+        "COUNT": "42",
+        "FLAG": "True",
+        "OPTIONAL": "null",
+        "ITEMS": "[1, 2]",
+        "DOUBLED": "7",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+
+    class AppConfig(ArFiSettings):
+        TEXT: str = ""
+        NUMBER_TEXT: str = ""
+        QUOTED: str = ""
+        LEVEL: Literal["debug", "info"] = "info"
+        COUNT: int = 0
+        FLAG: bool = False
+        OPTIONAL: int | None = 1
+        ITEMS: list[int] = []
+        DOUBLED: str = ""
+
+        @field_validator("DOUBLED", mode="before")
+        @classmethod
+        def double(cls, value: Any) -> str:
+            return str(value * 2)
+
+    decoded = []
+    json_loads = json.loads
+
+    def spy_loads(value, *args, **kwargs):
+        decoded.append(value)
+        return json_loads(value, *args, **kwargs)
+
+    monkeypatch.setattr(utils.json, "loads", spy_loads)
+    config = AppConfig()
+    assert config.TEXT == "plain text"
+    assert config.NUMBER_TEXT == "123"
+    assert config.QUOTED == "quoted"
+    assert config.LEVEL == "debug"
+    assert config.COUNT == 42
+    assert config.FLAG is True
+    assert config.OPTIONAL is None
+    assert config.ITEMS == [1, 2]
+    # The value of the field with the validator is decoded as before
+    assert config.DOUBLED == "14"
+    # Only the values which look like JSON are parsed
+    assert sorted(decoded) == sorted(['"quoted"', "42", "null", "[1, 2]", "7"])
+
+
+# @pytest.mark.current
+@pytest.mark.env
+def test_env_str_values_of_json(monkeypatch, cwd_to_tmp, path_base_dir):
+    from typing import Optional
+
+    env = {
+        "S": "123",
+        "O": "123",
+        "U": "true",
+        "L": "[1,2]",
+        "N": "null",
+        "Q": '"quoted"',
+        "LEVEL": "123",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+
+    class AppConfig(ArFiSettings):
+        S: str = ""
+        O: Optional[str] = ""
+        U: str | None = ""
+        L: str | None = ""
+        N: str | None = ""
+        Q: str | None = ""
+        LEVEL: Literal["123", "info"] | None = None
+
+    config = AppConfig()
+    assert config.S == "123"
+    assert config.O == "123"
+    assert config.U == "true"
+    assert config.L == "[1,2]"
+    assert config.N is None
+    assert config.Q == "quoted"
+    assert config.LEVEL == "123"
@@ -1488,3 +1488,39 @@ def test_conf_include_inherit_parent_exclude_self(cwd_to_tmp):
 
 """
 ###
+
+
+# @pytest.mark.current
+@pytest.mark.file_config
+def test_conf_ext_resolved_by_directory_listing(cwd_to_tmp, mocker):
+    import os
+    import time
+
+    from arfi_settings import ArFiReader, cache
+
+    conf_dir = cwd_to_tmp / "config"
+    conf_dir.mkdir()
+    (conf_dir / "config.json").write_text('{"name": "json"}')
+    old_time = time.time_ns() - 10_000_000_000
+    os.utime(conf_dir, ns=(old_time, old_time))
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_dir=conf_dir)
+        name: str = "app"
+
+    scan_dir = mocker.spy(cache, "scan_dir")
+    ArFiReader.listing_cache.clear()
+    assert AppConfig().name == "json"
+    assert AppConfig().name == "json"
+    scanned = [Path(call.args[0]) for call in scan_dir.call_args_list]
+    assert scanned.count(conf_dir) == 1
+
+    # The new file changes the mtime of the directory
+    (conf_dir / "config.toml").write_text('name = "toml"')
+    assert AppConfig().name == "toml"
+
+    ArFiReader.listing_cache = None
+    try:
+        assert AppConfig().name == "toml"
+    finally:
+        ArFiReader.listing_cache = cache.ListingCache()
@@ -0,0 +1,227 @@
+import pytest
+from pydantic import AliasChoices, Field
+
+from arfi_settings import ArFiHandler, ArFiSettings
+from arfi_settings.plans import plan_cache
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_handler_plan_is_shared(cwd_to_tmp, path_base_dir):
+    class AppConfig(ArFiSettings):
+        name: str = Field("default", validation_alias=AliasChoices("NAME", "app_name"))
+
+    first = AppConfig()
+    second = AppConfig()
+    first_handler = ArFiHandler(settings_class=first, init_kwargs={})
+    second_handler = ArFiHandler(settings_class=second, init_kwargs={})
+    assert first_handler.plan is second_handler.plan
+    assert first_handler.field_aliases is second_handler.field_aliases
+    assert first_handler.field_aliases["name"] == ["NAME", "app_name"]
+    assert first_handler.field_aliases_not_case_sensitive["name"] == ["NAME", "name", "app_name"]
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_handler_plan_depends_on_options(cwd_to_tmp, path_base_dir):
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    plain_handler = ArFiHandler(settings_class=AppConfig(), init_kwargs={})
+    nested_handler = ArFiHandler(settings_class=AppConfig(_env_nested_delimiter="__"), init_kwargs={})
+    assert plain_handler.plan is not nested_handler.plan
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_handler_plan_redefined_class(cwd_to_tmp, path_base_dir):
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    old_handler = ArFiHandler(settings_class=AppConfig(), init_kwargs={})
+
+    class AppConfig(ArFiSettings):
+        title: str = "default"
+
+    new_handler = ArFiHandler(settings_class=AppConfig(), init_kwargs={})
+    assert new_handler.plan is not old_handler.plan
+    assert new_handler.fields_names == {"MODE", "title"}
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_handler_plan_cache_clear(cwd_to_tmp, path_base_dir):
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    config = AppConfig()
+    handler = ArFiHandler(settings_class=config, init_kwargs={})
+    plan_cache.invalidate(AppConfig)
+    assert ArFiHandler(settings_class=config, init_kwargs={}).plan is not handler.plan
+    plan_cache.clear()
+    assert plan_cache.get(AppConfig, plan_cache.get_key(handler)) is None
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_read_workers(cwd_to_tmp):
+    import threading
+
+    from arfi_settings import ArFiReader, EnvConfigDict, FileConfigDict
+
+    conf_files = []
+    for number in range(4):
+        conf_file = cwd_to_tmp / f"config_{number}.toml"
+        conf_file.write_text(f'name = "conf_{number}"\nvalue_{number} = {number}')
+        conf_files.append(conf_file)
+    env_files = []
+    for number in range(3):
+        env_file = cwd_to_tmp / f".env.{number}"
+        env_file.write_text(f"LEVEL=env_{number}")
+        env_files.append(env_file)
+    threads = set()
+
+    class ThreadReader(ArFiReader):
+        def read(self):
+            if self.file_path is not None:
+                threads.add(threading.current_thread().name)
+            return super().read()
+
+    class ConcurrentHandler(ArFiHandler):
+        reader_class = ThreadReader
+        read_workers = 4
+
+    class AppConfig(ArFiSettings):
+        handler_class = ConcurrentHandler
+        file_config = FileConfigDict(conf_file=conf_files)
+        env_config = EnvConfigDict(env_file=env_files)
+
+        name: str = "app"
+        level: str = "info"
+        value_0: int = -1
+        value_3: int = -1
+
+    config = AppConfig()
+    # The later files have the higher priority
+    assert config.name == "conf_3"
+    assert config.level == "env_2"
+    assert (config.value_0, config.value_3) == (0, 3)
+    assert all(name.startswith("arfi_settings_read") for name in threads)
+
+    class SequentialHandler(ConcurrentHandler):
+        read_workers = 0
+
+    class SequentialConfig(AppConfig):
+        handler_class = SequentialHandler
+
+    threads.clear()
+    assert SequentialConfig().model_dump() == config.model_dump()
+    assert threads == {threading.current_thread().name}
+
+    conf_files[1].write_text("name = [")
+    with pytest.raises(ValueError):
+        AppConfig()
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_read_executor():
+    from arfi_settings.aio import ReadExecutor
+
+    read_executor = ReadExecutor()
+    futures = read_executor.submit(2, [lambda: 1, lambda: 2])
+    assert [future.result() for future in futures] == [1, 2]
+    executor = read_executor._executor
+    # One pool is kept for the smaller and the same numbers of the workers
+    read_executor.submit(1, [lambda: 3])[0].result()
+    read_executor.submit(2, [lambda: 4])[0].result()
+    assert read_executor._executor is executor
+    # The larger pool replaces the previous one
+    assert read_executor.submit(4, [lambda: 5])[0].result() == 5
+    assert read_executor._executor is not executor
+    assert read_executor.max_workers == 4
+    assert executor._shutdown
+    read_executor.shutdown()
+    assert read_executor._executor is None
+    assert read_executor.submit(1, [lambda: 6])[0].result() == 6
+    read_executor.shutdown()
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_mode_single_pass(cwd_to_tmp, monkeypatch):
+    from arfi_settings import FileConfigDict, tracing_hooks
+
+    conf_dir = cwd_to_tmp / "config"
+    conf_dir.mkdir()
+    (conf_dir / "config.toml").write_text('name = "base"\nlevel = "base"')
+    (conf_dir / "dev.toml").write_text('level = "dev"')
+    (conf_dir / "prod.toml").write_text('level = "prod"')
+
+    class StageCounter:
+        def __init__(self):
+            self.stages = []
+
+        def on_stage_start(self, stage, settings_class, source, path):
+            if stage in ("ordered_settings", "file"):
+                self.stages.append((stage, source, path and path.name))
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_dir=conf_dir)
+
+        name: str = "app"
+        level: str = "info"
+
+    counter = tracing_hooks.register(StageCounter())
+    try:
+        monkeypatch.setenv("MODE", "dev")
+        config = AppConfig()
+        assert (config.MODE, config.name, config.level) == ("dev", "base", "dev")
+        conf_stages = [stage for stage in counter.stages if stage[1].startswith(("conf_file", "toml"))]
+        assert conf_stages == [
+            ("ordered_settings", "conf_file_ordered_settings_handler", None),
+            ("file", "toml_ext_handler", "config.toml"),
+            ("file", "toml_ext_handler", "dev.toml"),
+        ]
+
+        # MODE of the config file is known only after reading it
+        monkeypatch.delenv("MODE")
+        (conf_dir / "config.toml").write_text('MODE = "prod"\nname = "base"')
+        counter.stages.clear()
+        config = AppConfig()
+        assert (config.MODE, config.name, config.level) == ("prod", "base", "prod")
+        conf_stages = [stage for stage in counter.stages if "conf_file" in stage[1]]
+        assert len(conf_stages) == 2
+    finally:
+        tracing_hooks.unregister(counter)
+
+
+# @pytest.mark.current
+@pytest.mark.handlers
+def test_nested_context_is_shared(cwd_to_tmp):
+    class Credentials(ArFiSettings):
+        user: str = "guest"
+
+    class Database(ArFiSettings):
+        host: str = "localhost"
+        credentials: Credentials
+
+    class Cache(ArFiSettings):
+        host: str = "localhost"
+
+    class AppConfig(ArFiSettings):
+        db: Database
+        cache: Cache
+
+    init_db = {"host": "db", "credentials": {"user": "admin"}}
+    config = AppConfig(db=init_db)
+    assert config.db.host == "db"
+    assert config.db.credentials.user == "admin"
+    # The passed values are not changed
+    assert init_db == {"host": "db", "credentials": {"user": "admin"}}
+
+    assert config.db._handler_tree == (("db",),)
+    assert config.cache._handler_tree == (("cache",),)
+    assert config.db.credentials._handler_tree == (("db",), ("credentials",))
+    # The parent part of the tree is shared by the nested settings
+    assert config.db.credentials._handler_tree[0] is config.db._handler_tree[0]
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_TIME_BUDGET_US = 500_000
+"""Budget of the own modules of `arfi_settings`, microseconds, about twice the measured time."""
+
+LAZY_MODULES = (
+    "dotenv",
+    "pydantic_settings",
+    "yaml",
+    "tomli",
+    "arfi_settings.aio",
+    "arfi_settings.connectors",
+    "arfi_settings.init_config",
+    "arfi_settings.profiler",
+    "arfi_settings.snapshot",
+    "arfi_settings.watcher",
+)
+
+
+def import_time(code: str) -> dict[str, tuple[int, int]]:
+    """Return self and cumulative import time of every module, microseconds."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_time), int(cumulative))
+    return modules
+
+
+# @pytest.mark.current
+@pytest.mark.import_time
+def test_import_time():
+    modules = import_time("import arfi_settings")
+    assert "arfi_settings" in modules
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    assert loaded == []
+    own_time = sum(self_time for name, (self_time, _) in modules.items() if name.split(".")[0] == "arfi_settings")
+    assert own_time < IMPORT_TIME_BUDGET_US
+
+
+# @pytest.mark.current
+@pytest.mark.import_time
+def test_lazy_exports():
+    code = (
+        "import sys, arfi_settings\n"
+        "assert 'arfi_settings.watcher' not in sys.modules\n"
+        "from arfi_settings import SettingsWatcher, SettingsSnapshot, init_settings, async_loader\n"
+        "from arfi_settings.init_config import init_settings as init_config_settings\n"
+        "assert 'arfi_settings.watcher' in sys.modules\n"
+        "assert init_settings is init_config_settings\n"
+        "assert SettingsWatcher.__module__ == 'arfi_settings.watcher'\n"
+        "assert 'SettingsWatcher' in dir(arfi_settings)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
+
+    import arfi_settings
+
+    with pytest.raises(AttributeError):
+        arfi_settings.missing_name
+
+
+# @pytest.mark.current
+@pytest.mark.import_time
+def test_init_settings_accessor():
+    code = (
+        "import arfi_settings.main, arfi_settings.storage\n"
+        "from arfi_settings.init_config import get_init_settings\n"
+        "assert not hasattr(arfi_settings.main, 'init_settings')\n"
+        "assert not hasattr(arfi_settings.storage, 'init_settings')\n"
+        "from arfi_settings import init_settings\n"
+        "assert get_init_settings() is init_settings\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
@@ -1,4 +1,5 @@
 import argparse
+import importlib.util
 import sys
 from pathlib import Path
 from typing import Literal
@@ -34,7 +35,6 @@ def test_init_settings_with_pyproject_toml(
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
     empty_pyproject_toml_file.write_text(
         """
         [tool.arfi_settings]
@@ -128,7 +128,6 @@ def test_pyproject_toml_class_vars(
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
     monkeypatch.setattr(arfi_settings.readers.ArFiReader, "default_cli_reader", None)
 
     pyproject_toml_file = cwd_to_tmp / "pyproject.toml"
@@ -297,3 +296,166 @@ def test_disable_read_pyproject_toml(
     config = AppConfig()
     assert config.pyproject_toml_path == empty_pyproject_toml_file
     assert config.settings_config.encoding == "cp1251"
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_search_called_file(cwd_to_tmp, monkeypatch):
+    init_settings = InitSettings()
+    monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
+
+    class AppConfig(ArFiSettings):
+        pass
+
+    lineno = sys._getframe().f_lineno + 1
+    _ = AppConfig()
+    assert init_settings.main_config_file == Path(__file__).resolve()
+    assert init_settings.called_line == lineno
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_search_called_file_cache(cwd_to_tmp, monkeypatch, mocker):
+    init_settings = InitSettings()
+    monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
+    walk_called_frame = mocker.spy(arfi_settings.init_config, "_walk_called_frame")
+
+    class AppConfig(ArFiSettings):
+        pass
+
+    def build():
+        return AppConfig()
+
+    for _ in range(3):
+        build()
+    assert init_settings.called_line == build.__code__.co_firstlineno + 1
+    assert walk_called_frame.call_count == 1
+    # Other line of the same code is walked again
+    lineno = sys._getframe().f_lineno + 1
+    _ = AppConfig()
+    assert init_settings.called_line == lineno
+    assert walk_called_frame.call_count == 2
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_read_pyproject_with_called_file(empty_pyproject_toml_file, cwd_to_tmp, mocker):
+    settings_file = cwd_to_tmp / "settings.py"
+    settings_file.touch(exist_ok=True)
+    empty_pyproject_toml_file.write_text(
+        """
+        [tool.arfi_settings]
+        env_file='.env.test'
+        """
+    )
+    init_settings = InitSettings()
+    search_called_file = mocker.spy(init_settings, "_search_called_file")
+    init_settings.read_pyproject(called_file=settings_file)
+    search_called_file.assert_not_called()
+    assert init_settings.main_config_file == settings_file.resolve()
+    assert init_settings.pyproject_toml_path == empty_pyproject_toml_file
+    assert init_settings.init_params.env_file == ".env.test"
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_pyproject_toml_discovery_cache(empty_pyproject_toml_file, cwd_to_tmp, mocker):
+    settings_dir = cwd_to_tmp / "settings"
+    settings_dir.mkdir()
+    settings_file = settings_dir / "settings.py"
+    settings_file.touch(exist_ok=True)
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file=settings_file, search_base_dir=True)
+    assert init_settings.pyproject_toml_path == empty_pyproject_toml_file
+    assert init_settings.base_dir == settings_dir
+
+    is_file = mocker.spy(Path, "is_file")
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file=settings_file, search_base_dir=True)
+    assert init_settings.pyproject_toml_path == empty_pyproject_toml_file
+    assert init_settings.base_dir == settings_dir
+    is_file.assert_not_called()
+
+    (settings_dir / "pyproject.toml").touch()
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file=settings_file)
+    assert init_settings.pyproject_toml_path == empty_pyproject_toml_file
+    InitSettings.clear_cache()
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file=settings_file)
+    assert init_settings.pyproject_toml_path == settings_dir / "pyproject.toml"
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_search_called_file_of_same_functions(tmp_path, monkeypatch):
+    init_settings = InitSettings()
+    monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
+
+    class AppConfig(ArFiSettings):
+        pass
+
+    builds = {}
+    for name in ("p1", "p2"):
+        package_dir = tmp_path / name
+        package_dir.mkdir()
+        (package_dir / "pyproject.toml").touch()
+        (package_dir / "mod.py").write_text("def build(settings_class):\n    return settings_class()\n")
+        spec = importlib.util.spec_from_file_location(f"{name}_mod", package_dir / "mod.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        builds[name] = module.build
+    # The code objects are equal, the files differ
+    assert builds["p1"].__code__ == builds["p2"].__code__
+
+    config = builds["p1"](AppConfig)
+    assert config.pyproject_toml_path == (tmp_path / "p1" / "pyproject.toml").resolve()
+    with pytest.warns(Warning, match="Path to pyproject.toml has been changed"):
+        config = builds["p2"](AppConfig)
+    assert config.pyproject_toml_path == (tmp_path / "p2" / "pyproject.toml").resolve()
+    assert init_settings.main_config_file == (tmp_path / "p2" / "mod.py").resolve()
+    assert Path(config.BASE_DIR) == (tmp_path / "p2").resolve()
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_init_with_called_file(empty_pyproject_toml_file, cwd_to_tmp, monkeypatch, mocker):
+    init_settings = InitSettings()
+    monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
+    settings_dir = cwd_to_tmp / "settings"
+    settings_dir.mkdir()
+    settings_file = settings_dir / "settings.py"
+    settings_file.touch()
+    search_called_file = mocker.spy(init_settings, "_search_called_file")
+
+    class AppConfig(ArFiSettings):
+        pass
+
+    config = AppConfig(_called_file=settings_file)
+    search_called_file.assert_not_called()
+    assert init_settings.main_config_file == settings_file.resolve()
+    assert config.pyproject_toml_path == empty_pyproject_toml_file
+    assert Path(config.BASE_DIR) == settings_dir.resolve()
+
+
+# @pytest.mark.current
+@pytest.mark.pyproject
+def test_pyproject_toml_discovery_cache_relative_paths(tmp_path, monkeypatch):
+    from arfi_settings.init_config import path_cache
+
+    for name in ("first", "second"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "first" / "pyproject.toml").touch()
+
+    monkeypatch.chdir(tmp_path / "first")
+    assert path_cache.is_file(Path("pyproject.toml"))
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file="")
+    assert init_settings.pyproject_toml_path == (tmp_path / "first" / "pyproject.toml").resolve()
+
+    (tmp_path / "second" / "pyproject.toml").touch()
+    monkeypatch.chdir(tmp_path / "second")
+    assert path_cache.resolve(Path("")) == (tmp_path / "second").resolve()
+    init_settings = InitSettings()
+    init_settings.read_pyproject(called_file="")
+    assert init_settings.pyproject_toml_path == (tmp_path / "second" / "pyproject.toml").resolve()
@@ -1,4 +1,6 @@
+import os
 import sys
+import time
 
 import pytest
 from pytest_mock import MockFixture
@@ -572,3 +574,226 @@ def test_reader_whithout_default(monkeypatch):
     reader = ArFiReader(is_cli=True)
     data = reader.read()
     assert data == {}
+
+
+@pytest.fixture
+def parse_cache():
+    cache = ArFiReader.setup_parse_cache(max_entries=2)
+    yield cache
+    ArFiReader.disable_parse_cache()
+
+
+def set_old_mtime(*paths, seconds: int = 10):
+    """The recently changed files are not cached."""
+
+    old_time = time.time_ns() - seconds * 1_000_000_000
+    for path in paths:
+        os.utime(path, ns=(old_time, old_time))
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_parse_cache(simple_data_config_config_toml, parse_cache):
+    ArFiReader.BASE_DIR = None
+    set_old_mtime(simple_data_config_config_toml)
+    data = ArFiReader(file_path="config/config.toml").read()
+    assert data == {"path_config_file": "config/config.toml"}
+    assert parse_cache.misses == 1
+    assert ArFiReader(file_path="config/config.toml").read() is data
+    assert parse_cache.hits == 1
+    assert len(parse_cache) == 1
+
+    with pytest.raises(TypeError):
+        data["path_config_file"] = "new"
+    data_copy = data.copy()
+    data_copy["path_config_file"] = "new"
+    assert data["path_config_file"] == "config/config.toml"
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_parse_cache_file_changed(simple_data_config_config_toml, parse_cache):
+    ArFiReader.BASE_DIR = None
+    conf_file = simple_data_config_config_toml
+    set_old_mtime(conf_file, seconds=20)
+    data = ArFiReader(file_path="config/config.toml").read()
+    conf_file.write_text("path_config_file = 'config/config.toml'\nnew_key = 1\n")
+    set_old_mtime(conf_file)
+    new_data = ArFiReader(file_path="config/config.toml").read()
+    assert new_data is not data
+    assert new_data == {"path_config_file": "config/config.toml", "new_key": 1}
+    assert len(parse_cache) == 1
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_parse_cache_limits(tmp_path, parse_cache):
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.json").write_text(f'{{"name": "{name}"}}')
+        set_old_mtime(tmp_path / f"{name}.json")
+        ArFiReader(file_path=tmp_path / f"{name}.json").read()
+    assert len(parse_cache) == 2
+    assert parse_cache.size == sum((tmp_path / f"{name}.json").stat().st_size for name in ("b", "c"))
+
+    ArFiReader.setup_parse_cache(max_bytes=5)
+    ArFiReader(file_path=tmp_path / "a.json").read()
+    assert len(ArFiReader.parse_cache) == 0
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_parse_cache_racy_file(tmp_path, parse_cache):
+    conf_file = tmp_path / "config.json"
+    conf_file.write_text('{"name": "a"}')
+    assert ArFiReader(file_path=conf_file).read() == {"name": "a"}
+    assert len(parse_cache) == 0
+
+    # The same size rewrite within the mtime granularity is not served from the cache
+    mtime_ns = conf_file.stat().st_mtime_ns
+    conf_file.write_text('{"name": "b"}')
+    os.utime(conf_file, ns=(mtime_ns, mtime_ns))
+    assert ArFiReader(file_path=conf_file).read() == {"name": "b"}
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_parse_cache_settings_values_are_mutable(cwd_to_tmp, path_base_dir, parse_cache):
+    from typing import Any
+
+    from arfi_settings import ArFiSettings, FileConfigDict
+
+    conf_file = cwd_to_tmp / "config.json"
+    conf_file.write_text('{"data": {"nested": {"a": 1}, "items": [1]}, "extra": {"b": {"c": 2}}}')
+    set_old_mtime(conf_file)
+
+    class AppConfig(ArFiSettings):
+        model_config = FileConfigDict(conf_file=conf_file)
+
+        data: dict = {}
+        extra: Any = None
+
+    first = AppConfig()
+    second = AppConfig()
+    assert parse_cache.hits == 1
+    first.data["nested"]["a"] = 10
+    first.data["items"].append(2)
+    first.extra["b"]["c"] = 20
+    assert type(first.data["nested"]) is dict
+    assert second.data == {"nested": {"a": 1}, "items": [1]}
+    assert second.extra == {"b": {"c": 2}}
+    assert AppConfig().data == {"nested": {"a": 1}, "items": [1]}
+
+
+ENV_FILE_TEXT = """﻿# comment
+
+PLAIN=value
+export EXPORTED = two words  # comment
+DOUBLE="multi
+line \\"quoted\\" \\n"  # comment
+SINGLE='single \\' \\\\ \\n'
+'QUOTED KEY'=value
+ONLY_KEY
+EMPTY= # comment
+HASH=#value
+INLINE=a #comment
+INTERPOLATED=${PLAIN}-${ENV_FILE_HOME}-${MISSING:-default}
+PLAIN=override
+"""
+
+
+@pytest.fixture
+def env_file_parser():
+    yield ArFiReader
+    ArFiReader.setup_env_file_parser("native")
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+@pytest.mark.parametrize("interpolate", [True, False])
+def test_native_env_file_parser(tmp_path, monkeypatch, env_file_parser, interpolate):
+    from dotenv import dotenv_values
+
+    monkeypatch.setenv("ENV_FILE_HOME", "/home/user")
+    env_file = tmp_path / ".env"
+    env_file.write_text(ENV_FILE_TEXT, encoding="utf-8")
+
+    ArFiReader.setup_env_file_parser("native", interpolate=interpolate)
+    data = ArFiReader(file_path=env_file, is_env_file=True, file_encoding="utf-8").read()
+    assert data == dotenv_values(env_file, encoding="utf-8", interpolate=interpolate)
+    assert list(data) == list(dotenv_values(env_file, encoding="utf-8", interpolate=interpolate))
+    assert data["DOUBLE"] == 'multi\nline "quoted" \n'
+    assert data["SINGLE"] == "single ' \\ \\n"
+    assert data["ONLY_KEY"] is None
+    assert data["EMPTY"] == ""
+    assert data["HASH"] == "#value"
+    if interpolate:
+        assert data["INTERPOLATED"] == "value-/home/user-default"
+
+    ArFiReader.setup_env_file_parser("dotenv", interpolate=interpolate)
+    assert ArFiReader(file_path=env_file, is_env_file=True, file_encoding="utf-8").read() == data
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+@pytest.mark.parametrize(
+    "text, lineno, dotenv_data",
+    [
+        ("A=1\nB 2\n", 2, {"A": "1"}),
+        ("A=1\nB='unclosed\nC=3\n", 2, {"A": "1", "C": "3"}),
+        ("A='value' tail\n", 1, {}),
+        ("export =1\n", 1, {}),
+    ],
+)
+def test_native_env_file_parser_invalid(tmp_path, env_file_parser, text, lineno, dotenv_data):
+    env_file = tmp_path / ".env"
+    env_file.write_text(text)
+    # The invalid lines are skipped as python-dotenv does
+    with pytest.warns(Warning, match=f"Invalid .env syntax at line {lineno}"):
+        assert ArFiReader(file_path=env_file, is_env_file=True).read() == dotenv_data
+
+    ArFiReader.setup_env_file_parser("native", strict=True)
+    with pytest.raises(ArFiSettingsError) as excinfo:
+        ArFiReader(file_path=env_file, is_env_file=True).read()
+    assert f"Invalid .env syntax at line {lineno}" in str(excinfo.value)
+
+    ArFiReader.setup_env_file_parser("dotenv")
+    assert ArFiReader(file_path=env_file, is_env_file=True).read() == dotenv_data
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_native_env_file_parser_interpolates_snapshot(tmp_path, monkeypatch, parse_cache, env_file_parser):
+    from arfi_settings import EnvSnapshot
+
+    monkeypatch.setenv("ENV_FILE_HOME", "/live")
+    env_file = tmp_path / ".env"
+    env_file.write_text("HOME_DIR=${ENV_FILE_HOME}/app\n")
+    set_old_mtime(env_file)
+
+    def read(environ):
+        return ArFiReader(file_path=env_file, is_env_file=True, env_snapshot=EnvSnapshot(environ)).read()
+
+    assert read({"ENV_FILE_HOME": "/first"}) == {"HOME_DIR": "/first/app"}
+    # The cached values interpolated by the other environment are not returned
+    assert read({"ENV_FILE_HOME": "/second"}) == {"HOME_DIR": "/second/app"}
+    assert read({}) == {"HOME_DIR": "/app"}
+    assert read({"ENV_FILE_HOME": "/first"}) == {"HOME_DIR": "/first/app"}
+    assert ArFiReader(file_path=env_file, is_env_file=True).read() == {"HOME_DIR": "/live/app"}
+
+
+# @pytest.mark.current
+@pytest.mark.readers
+def test_env_file_parser_switch(tmp_path, parse_cache, env_file_parser):
+    env_file = tmp_path / ".env"
+    env_file.write_text("A=1\n")
+    set_old_mtime(env_file)
+    with pytest.raises(ArFiSettingsError) as excinfo:
+        ArFiReader.setup_env_file_parser("fast")
+    assert "Unknown .env file parser `fast`" in str(excinfo.value)
+
+    native_data = ArFiReader(file_path=env_file, is_env_file=True).read()
+    ArFiReader.setup_env_file_parser("dotenv")
+    dotenv_data = ArFiReader(file_path=env_file, is_env_file=True).read()
+    assert dotenv_data == native_data
+    assert dotenv_data is not native_data
+    assert len(parse_cache) == 2
@@ -35,6 +35,7 @@ def test_settings_config_schema():
         "encoding": None,
         "cli": False,
         "secrets_dir": None,
+        "secrets_lazy": False,
         "conf_file": "config",
         "conf_dir": "config",
         "conf_ext": ["toml", "yaml", "yml", "json"],
@@ -102,6 +103,7 @@ def test_settings_params_schema(platform_system):
         "encoding": None,
         "cli": False,
         "secrets_dir": None,
+        "secrets_lazy": False,
         "include_inherit_parent": [],
         "exclude_inherit_parent": [],
         "handler": "",
@@ -155,6 +157,7 @@ def test_settings_params_schema(platform_system):
         "_encoding": "",
         "_cli": None,
         "_secrets_dir": default_path,
+        "_secrets_lazy": None,
         "_include_inherit_parent": None,
         "_exclude_inherit_parent": None,
         "_handler": "",
@@ -1,3 +1,5 @@
+import os
+import time
 from pathlib import Path
 
 import pydantic
@@ -259,3 +261,154 @@ def test_alias_path_secrets_dir(secrets_dir):
 
     config = AppConfig()
     assert config.path == "secrets/path_for_alias_1"
+
+
+# @pytest.mark.current
+@pytest.mark.secret
+def test_secrets_dir_reads_only_aliases(secrets_dir, mocker):
+    from arfi_settings import ArFiReader, cache, readers
+
+    (secrets_dir / "password").write_text("secret\n")
+    (secrets_dir / "other_service_token").write_text("token")
+    (secrets_dir / "password.txt").write_text("with extension")
+    nested_dir = secrets_dir / "nested"
+    nested_dir.mkdir()
+    (nested_dir / "USER").write_text("admin")
+    (nested_dir / "unknown").write_text("unknown")
+    # The recently changed files are not cached
+    old_time = time.time_ns() - 10_000_000_000
+    for path in (secrets_dir, *secrets_dir.rglob("*")):
+        os.utime(path, ns=(old_time, old_time))
+
+    class AppConfig(ArFiSettings):
+        ordered_settings = [
+            "secrets",
+        ]
+        model_config = SettingsConfigDict(
+            secrets_dir="secrets",
+            ignore_missing=False,
+        )
+
+        password: str = ""
+        user: str = ""
+
+    read_text = mocker.spy(cache, "read_text")
+    # By default only the listings are cached, the secrets are not kept in memory
+    secrets_cache = ArFiReader.setup_secrets_cache()
+    config = AppConfig()
+    assert (config.password, config.user) == ("secret", "admin")
+    read_files = sorted(Path(call.args[0]).name for call in read_text.call_args_list)
+    assert read_files == ["USER", "password"]
+    assert AppConfig().password == "secret"
+    assert read_text.call_count == 4
+    assert len(secrets_cache) == 0
+
+    # The unchanged files are not read again
+    read_text.reset_mock()
+    secrets_cache = ArFiReader.setup_secrets_cache(max_files=2)
+    assert AppConfig().password == "secret"
+    assert AppConfig().password == "secret"
+    assert read_text.call_count == 2
+    assert secrets_cache.hits == 2
+
+    (secrets_dir / "password").write_text("new secret")
+    assert AppConfig().password == "new secret"
+    assert read_text.call_count == 3
+
+    # The least recently used files are evicted
+    secrets_cache = ArFiReader.setup_secrets_cache(max_files=1)
+    assert AppConfig().user == "admin"
+    assert len(secrets_cache) == 1
+
+    read_text = mocker.spy(readers, "read_text")
+    ArFiReader.disable_secrets_cache()
+    try:
+        assert AppConfig().user == "admin"
+        assert read_text.call_count == 2
+    finally:
+        ArFiReader.setup_secrets_cache()
+
+
+# @pytest.mark.current
+@pytest.mark.secret
+def test_lazy_secrets(secrets_dir, mocker):
+    from pydantic import SecretStr
+
+    from arfi_settings import cache
+    from arfi_settings.types import LazySecretStr
+
+    (secrets_dir / "password").write_text("secret")
+    (secrets_dir / "token").write_text("token")
+    (secrets_dir / "user").write_text("admin")
+
+    class AppConfig(ArFiSettings):
+        ordered_settings = [
+            "secrets",
+        ]
+        model_config = SettingsConfigDict(
+            secrets_dir="secrets",
+            secrets_lazy=True,
+        )
+
+        password: SecretStr
+        token: SecretStr | None = None
+        user: str = ""
+
+    read_text = mocker.spy(cache, "read_text")
+    config = AppConfig()
+    assert isinstance(config.password, LazySecretStr)
+    assert isinstance(config.token, LazySecretStr)
+    assert config.user == "admin"
+    assert not config.password.is_loaded
+    assert str(config.password) == "**********"
+    assert config.model_dump()["password"] is config.password
+    read_files = [Path(call.args[0]).name for call in read_text.call_args_list]
+    assert "password" not in read_files and "token" not in read_files
+
+    assert config.password.get_secret_value() == "secret"
+    assert config.password.is_loaded
+    assert config.password == SecretStr("secret")
+    assert not config.token.is_loaded
+
+    assert config.model_dump_json() == '{"MODE":null,"password":"**********","token":"**********","user":"admin"}'
+
+    config = AppConfig()
+    (secrets_dir / "password").unlink()
+    with pytest.raises(ArFiSettingsError):
+        config.password.get_secret_value()
+    (secrets_dir / "password").write_text("secret")
+
+    config = AppConfig(_secrets_lazy=False)
+    assert type(config.password) is SecretStr
+    assert config.password.get_secret_value() == "secret"
+
+
+# @pytest.mark.current
+@pytest.mark.secret
+def test_lazy_secret_eq_hash(tmp_path, mocker):
+    from pydantic import SecretStr
+
+    from arfi_settings import types
+    from arfi_settings.types import LazySecretStr
+
+    read_text = mocker.spy(types, "read_text")
+    missing = LazySecretStr(tmp_path / "missing")
+    # The lazy secrets are compared and hashed without reading the files
+    assert missing == LazySecretStr(tmp_path / "missing")
+    assert missing != LazySecretStr(tmp_path / "missing", "latin-1")
+    assert missing != LazySecretStr(tmp_path / "other")
+    assert len({missing, LazySecretStr(tmp_path / "missing")}) == 1
+    assert not missing.is_loaded
+    assert read_text.call_count == 0
+
+    secret_file = tmp_path / "password"
+    secret_file.write_text("secret")
+    password = LazySecretStr(secret_file)
+    password_hash = hash(password)
+    # The comparison with other secrets reads the file
+    assert password == SecretStr("secret")
+    assert password.is_loaded
+    assert read_text.call_count == 1
+    assert hash(password) == password_hash
+    with pytest.raises(ArFiSettingsError):
+        missing == SecretStr("secret")
@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 
 import arfi_settings
-from arfi_settings import ArFiSettings
+from arfi_settings import ArFiReader, ArFiSettings, ArFiSettingsError, SettingsConfigDict
 from arfi_settings.init_config import InitSettings
 
 
@@ -18,7 +18,6 @@ def test_base_dir(cwd_to_tmp, monkeypatch, platform_system):
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
 
     class AppConfig(ArFiSettings):
         pass
@@ -29,7 +28,6 @@ def test_base_dir(cwd_to_tmp, monkeypatch, platform_system):
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
 
     class AppConfig(ArFiSettings):
         BASE_DIR = "settings/"
@@ -40,7 +38,6 @@ def test_base_dir(cwd_to_tmp, monkeypatch, platform_system):
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
 
     class AppConfig(ArFiSettings):
         BASE_DIR = "/settings"
@@ -52,7 +49,6 @@ def test_base_dir(cwd_to_tmp, monkeypatch, platform_system):
     monkeypatch.setattr(arfi_settings.init_config, "InitSettings", PatchedInitSettings)
     init_settings = PatchedInitSettings()
     monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
-    monkeypatch.setattr(arfi_settings.main, "init_settings", init_settings)
     monkeypatch.setenv("HOME", "/")
 
     class AppConfig(ArFiSettings):
@@ -61,3 +57,673 @@ def test_base_dir(cwd_to_tmp, monkeypatch, platform_system):
     config = AppConfig()
     base_dir = Path("~/settings")
     assert config.BASE_DIR == base_dir.expanduser().resolve()
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_instances_registry_is_weak(cwd_to_tmp, path_base_dir):
+    import gc
+
+    from arfi_settings.storage import config_storage
+
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    gc.collect()
+    size = len(config_storage.storage)
+    for _ in range(100):
+        config = AppConfig()
+        assert config_storage.storage.get(config) is not None
+    del config
+    gc.collect()
+    assert len(config_storage.storage) <= size
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_instances_max_size_keeps_live_instances(cwd_to_tmp, path_base_dir):
+    import gc
+
+    from arfi_settings.storage import config_storage
+
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    gc.collect()
+    AppConfig.instances_max_size = len(config_storage.storage) + 3
+    configs = []
+    with pytest.raises(ArFiSettingsError, match="registry is full"):
+        for _ in range(10):
+            configs.append(AppConfig(name="live"))
+    assert len(configs) == 3
+    # The live instances keep their configs
+    for config in configs:
+        assert config_storage.storage.get(config) is not None
+        assert config.name == "live"
+        assert config.conf_path == configs[0].conf_path
+
+    del configs, config
+    gc.collect()
+    assert AppConfig(name="new").name == "new"
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_settings_snapshot(cwd_to_tmp, path_base_dir, monkeypatch):
+    import pydantic
+
+    from arfi_settings import ArFiSettingsError, SettingsSnapshot
+
+    class DataBase(ArFiSettings):
+        host: str = "localhost"
+        port: int = 5432
+        tags: list[str] = ["main"]
+
+    class AppConfig(ArFiSettings):
+        name: str = "app"
+        db: DataBase = DataBase()
+
+    monkeypatch.setenv("NAME", "from_env")
+    config = AppConfig()
+    snapshot = config.snapshot()
+    assert isinstance(snapshot, SettingsSnapshot)
+    assert isinstance(snapshot.values["db"], SettingsSnapshot)
+    with pytest.raises(AttributeError):
+        snapshot.values = {}
+
+    monkeypatch.setenv("NAME", "changed_env")
+    copy_config = AppConfig.from_snapshot(snapshot)
+    assert copy_config == config
+    assert copy_config.name == "from_env"
+    assert copy_config.settings_config == config.settings_config
+    assert copy_config.conf_path == config.conf_path
+    copy_config.db.tags.append("extra")
+    assert config.db.tags == ["main"]
+
+    copy_config = AppConfig.from_snapshot(snapshot, name="request", db={"port": "6543"})
+    assert copy_config.name == "request"
+    assert copy_config.db.port == 6543
+    assert copy_config.db.host == "localhost"
+    assert {"name", "db"} <= copy_config.model_fields_set
+
+    with pytest.raises(pydantic.ValidationError):
+        AppConfig.from_snapshot(snapshot, db={"port": "not a port"})
+    with pytest.raises(pydantic.ValidationError):
+        AppConfig.from_snapshot(snapshot, unknown=1)
+    with pytest.raises(ArFiSettingsError):
+        DataBase.from_snapshot(snapshot)
+
+    # The mutable private values are not shared
+    first_config = AppConfig.from_snapshot(snapshot)
+    second_config = AppConfig.from_snapshot(snapshot)
+    first_config.conf_path.append(Path("extra"))
+    first_config.settings_config.conf_ext.append("ini")
+    assert second_config.conf_path == config.conf_path
+    assert Path("extra") not in config.conf_path
+    assert "ini" not in second_config.settings_config.conf_ext
+    assert "ini" not in config.settings_config.conf_ext
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_settings_snapshot_overrides_by_alias(cwd_to_tmp, path_base_dir):
+    from pydantic import AliasChoices, Field
+
+    class DataBase(ArFiSettings):
+        port: int = Field(5432, alias="db_port")
+
+    class AppConfig(ArFiSettings):
+        level: str = Field("info", validation_alias=AliasChoices("log_level", "LEVEL"))
+        db: DataBase = DataBase()
+
+    snapshot = AppConfig().snapshot()
+    config = AppConfig.from_snapshot(snapshot, log_level="debug", db={"db_port": "6543"})
+    assert config.level == "debug"
+    assert config.db.port == 6543
+    assert AppConfig.from_snapshot(snapshot, level="error").level == "error"
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_profiler(cwd_to_tmp, capsys):
+    from arfi_settings import ArFiSettingsError
+    from arfi_settings.__main__ import main
+    from arfi_settings.profiler import Profiler, import_settings_class, profile
+    from arfi_settings.tracing import tracing_hooks
+
+    class DataBase(ArFiSettings):
+        host: str = "localhost"
+
+    class AppConfig(ArFiSettings):
+        name: str = "app"
+        db: DataBase = DataBase()
+
+    profiler = profile(AppConfig, number=3)
+    assert profiler.number == 3
+    root = profiler.root
+    assert root.settings_class is AppConfig
+    for stage in (
+        "__new__",
+        "InstanceConfig.load",
+        "pyproject discovery",
+        "handler plan",
+        "default_main_handler",
+        "env_ordered_settings_handler",
+        "pydantic validation",
+    ):
+        assert stage in root.stages
+        assert root.stages[stage].calls >= 3
+    assert list(root.children) == ["db"]
+    assert root.children["db"].settings_class is DataBase
+    assert "env_ordered_settings_handler" in root.children["db"].stages
+    assert root.total_time > root.children["db"].total_time > 0
+    report = profiler.report()
+    assert "Profile of `" in report
+    assert "db: DataBase" in report
+
+    # Profiler hook is unregistered
+    assert not tracing_hooks.enabled
+    with Profiler():
+        assert tracing_hooks.enabled
+    assert not tracing_hooks.enabled
+    config = AppConfig()
+    assert config.db.host == "localhost"
+
+    assert import_settings_class("arfi_settings.connectors.SQLite").__name__ == "SQLite"
+    assert import_settings_class("arfi_settings.connectors:SQLite").__name__ == "SQLite"
+    for path in ("SQLite", "arfi_settings.connectors.Unknown", "arfi_settings.ArFiSettingsError", "unknown_module.A"):
+        with pytest.raises(ArFiSettingsError):
+            import_settings_class(path)
+
+    assert main(["profile", "arfi_settings.connectors.SQLite", "-n", "2", "-w", "1"]) == 0
+    assert "Profile of `SQLite`: 2 builds" in capsys.readouterr().out
+    assert main(["profile", "arfi_settings.connectors.Unknown"]) == 1
+    assert "not found" in capsys.readouterr().err
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_tracing_hooks(cwd_to_tmp):
+    from arfi_settings import ArFiSettingsError, FileConfigDict, tracing_hooks
+
+    class Hook:
+        def __init__(self):
+            self.events = []
+
+        def on_stage_start(self, stage, settings_class, source, path):
+            self.events.append(("start", stage, settings_class.__name__, source, path))
+
+        def on_stage_end(self, stage, settings_class, source, path):
+            self.events.append(("end", stage, settings_class.__name__, source, path))
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+
+    class DataBase(ArFiSettings):
+        host: str = "localhost"
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_file=conf_file)
+        name: str = "app"
+        db: DataBase = DataBase()
+
+    assert not tracing_hooks.enabled
+    global_hook = Hook()
+    db_hook = Hook()
+    tracing_hooks.register(global_hook)
+    tracing_hooks.register(db_hook, settings_class=DataBase)
+    try:
+        assert tracing_hooks.enabled
+        config = AppConfig()
+    finally:
+        tracing_hooks.unregister(global_hook)
+        tracing_hooks.unregister(db_hook, settings_class=DataBase)
+    assert not tracing_hooks.enabled
+    assert config.name == "toml"
+
+    events = global_hook.events
+    assert events[0] == ("start", "new", "AppConfig", None, None)
+    assert events[2] == ("start", "settings", "AppConfig", None, None)
+    assert events[-1] == ("end", "settings", "AppConfig", None, None)
+    assert ("start", "settings", "DataBase", "db", None) in events
+    assert ("start", "main_handler", "AppConfig", "default_main_handler", None) in events
+    assert ("start", "ordered_settings", "AppConfig", "env_ordered_settings_handler", None) in events
+    assert ("start", "file", "AppConfig", "toml_ext_handler", conf_file) in events
+    assert ("start", "validation", "AppConfig", None, None) in events
+    # Stages are nested
+    stack = []
+    for event, stage, class_name, source, path in events:
+        if event == "start":
+            stack.append((stage, class_name))
+        else:
+            assert stack.pop() == (stage, class_name)
+    assert not stack
+    # Nested settings are built inside the validation of the parent
+    assert events.index(("start", "settings", "DataBase", "db", None)) > events.index(
+        ("start", "validation", "AppConfig", None, None)
+    )
+
+    assert db_hook.events
+    assert {class_name for _, _, class_name, _, _ in db_hook.events} == {"DataBase"}
+
+    # The end is called on errors
+    hook = Hook()
+    tracing_hooks.register(hook, settings_class=AppConfig)
+    try:
+        with pytest.raises(ValueError):
+            AppConfig(name=[])
+    finally:
+        tracing_hooks.clear()
+    assert hook.events[-1] == ("end", "settings", "AppConfig", None, None)
+
+    with pytest.raises(ArFiSettingsError):
+        tracing_hooks.register(object())
+    assert not tracing_hooks.enabled
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_settings_watcher(cwd_to_tmp):
+    import asyncio
+    import threading
+
+    from arfi_settings import EnvConfigDict, FileConfigDict, SettingsConfigDict, SettingsWatcher
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+    env_file = cwd_to_tmp / ".env"
+    env_file.write_text("LEVEL=env_level")
+    secrets_dir = cwd_to_tmp / "secrets"
+    secrets_dir.mkdir()
+    (secrets_dir / "password").write_text("secret")
+    other_file = cwd_to_tmp / "other.toml"
+    other_file.write_text("")
+
+    class DataBase(ArFiSettings):
+        model_config = SettingsConfigDict(secrets_dir=secrets_dir)
+        host: str = "localhost"
+        password: str = ""
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_file=conf_file)
+        env_config = EnvConfigDict(env_file=env_file)
+
+        name: str = "app"
+        level: str = "info"
+        db: DataBase = DataBase()
+
+    errors = []
+    watcher = AppConfig.watch(interval=0.01, debounce=0, on_error=errors.append)
+    assert isinstance(watcher, SettingsWatcher)
+    config = watcher.settings
+    assert config.name == "toml"
+    assert config.level == "env_level"
+    assert config.db.password == "secret"
+    for path in (conf_file, env_file, secrets_dir, secrets_dir / "password"):
+        assert path.resolve() in watcher.paths
+    assert other_file.resolve() not in watcher.paths
+
+    assert not watcher.changed()
+    assert watcher.poll() is None
+    other_file.write_text("name = 1")
+    assert watcher.poll() is None
+
+    conf_file.write_text('name = "changed"')
+    assert watcher.changed()
+    new_config = watcher.poll()
+    assert new_config is watcher.settings
+    assert new_config.name == "changed"
+    assert watcher.poll() is None
+
+    (secrets_dir / "password").write_text("new secret")
+    assert watcher.poll().db.password == "new secret"
+    env_file.write_text("LEVEL=debug")
+    assert watcher.poll().level == "debug"
+
+    # The invalid file does not replace the settings
+    conf_file.write_text("name = [")
+    assert watcher.poll() is None
+    assert len(errors) == 1
+    assert watcher.settings.name == "changed"
+    assert watcher.poll() is None
+
+    # Polling in the thread
+    reloaded = threading.Event()
+    results = []
+
+    def callback(settings):
+        results.append(settings)
+        reloaded.set()
+
+    watcher.callback = callback
+    with watcher:
+        conf_file.write_text('name = "thread"')
+        assert reloaded.wait(5)
+    assert results[-1].name == "thread"
+    watcher.callback = None
+
+    # Async iterator
+    async def next_settings():
+        iterator = aiter(watcher)
+        await asyncio.sleep(0.02)
+        conf_file.write_text('name = "async"')
+        return await asyncio.wait_for(anext(iterator), 5)
+
+    assert asyncio.run(next_settings()).name == "async"
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_provenance_and_incremental_reload(cwd_to_tmp, monkeypatch):
+    from arfi_settings import FieldSource, FileConfigDict
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+    db_file = cwd_to_tmp / "db.toml"
+    db_file.write_text('host = "db_host"')
+    cache_file = cwd_to_tmp / "cache.toml"
+    cache_file.write_text("port = 1")
+
+    class DataBase(ArFiSettings):
+        file_config_inherit_parent = False
+        file_config = FileConfigDict(conf_file=db_file)
+        host: str = "localhost"
+        port: int = 5432
+
+    class Cache(ArFiSettings):
+        file_config_inherit_parent = False
+        file_config = FileConfigDict(conf_file=cache_file)
+        port: int = 0
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_file=conf_file)
+
+        name: str = "app"
+        level: str = "info"
+        db: DataBase = DataBase()
+        cache: Cache = Cache()
+
+    config = AppConfig(level="debug")
+    assert config.provenance["name"] == FieldSource("conf_file_ordered_settings_handler", conf_file, "name")
+    assert config.provenance["level"] == FieldSource("init_kwargs_ordered_settings_handler", key="level")
+    assert "MODE" not in config.provenance
+    assert config.db.provenance["host"] == FieldSource("conf_file_ordered_settings_handler", db_file, "host")
+    assert repr(config.provenance["level"]) == "FieldSource('init_kwargs_ordered_settings_handler', key='level')"
+    with pytest.raises(TypeError):
+        config.provenance["name"] = FieldSource("parent")
+
+    watcher = AppConfig.watch(interval=0.01, debounce=0)
+    assert watcher.reused == []
+    db = watcher.settings.db
+    db_dict = db.__dict__
+
+    # Only the changed root is built again
+    conf_file.write_text('name = "changed"')
+    config = watcher.poll()
+    assert config.name == "changed"
+    assert sorted(watcher.reused) == [("cache",), ("db",)]
+    assert config.db is db
+    assert config.db.__dict__ is db_dict
+
+    # The nested settings with the changed file are built again
+    db_file.write_text('host = "new_host"')
+    config = watcher.poll()
+    assert config.db.host == "new_host"
+    assert watcher.reused == [("cache",)]
+    assert config.cache.port == 1
+
+    # The changed environment builds the whole tree
+    cache_file.write_text("port = 2")
+    monkeypatch.setenv("ARFI_TEST_UNUSED", "1")
+    config = watcher.poll()
+    assert config.cache.port == 2
+    assert watcher.reused == []
+
+    watcher = AppConfig.watch(interval=0.01, debounce=0, incremental=False)
+    conf_file.write_text('name = "full"')
+    assert watcher.poll().name == "full"
+    assert watcher.reused == []
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_reload_does_not_enable_tracing(cwd_to_tmp):
+    from pydantic import field_validator
+
+    from arfi_settings import FileConfigDict
+    from arfi_settings.provenance import current_reuse
+    from arfi_settings.tracing import tracing_hooks
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+    builds = []
+
+    class DataBase(ArFiSettings):
+        file_config_inherit_parent = False
+        host: str = "localhost"
+
+    class AppConfig(ArFiSettings):
+        file_config = FileConfigDict(conf_file=conf_file)
+
+        name: str = "app"
+        db: DataBase = DataBase()
+
+        @field_validator("name")
+        @classmethod
+        def record(cls, value: str) -> str:
+            builds.append((current_reuse.get() is not None, tracing_hooks.enabled))
+            return value
+
+    watcher = AppConfig.watch(interval=0.01, debounce=0)
+    conf_file.write_text('name = "changed"')
+    assert watcher.poll().name == "changed"
+    assert watcher.reused == [("db",)]
+    # The other builds of the process see the tracing disabled, e.g. `read_workers` are used
+    assert builds == [(True, False), (True, False)]
+    assert AppConfig().name == "changed"
+    assert builds[-1] == (False, False)
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_reload_lists_secrets_by_cache(cwd_to_tmp, mocker):
+    import os
+    import time
+
+    from arfi_settings import ArFiReader, SettingsConfigDict, cache
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+    secrets_dir = cwd_to_tmp / "secrets"
+    (secrets_dir / "nested").mkdir(parents=True)
+    (secrets_dir / "password").write_text("secret")
+    (secrets_dir / "nested" / "token").write_text("token")
+    # The recently changed directories are not cached
+    old_time = time.time_ns() - 10_000_000_000
+    for path in (secrets_dir, *secrets_dir.rglob("*")):
+        os.utime(path, ns=(old_time, old_time))
+
+    class AppConfig(ArFiSettings):
+        model_config = SettingsConfigDict(conf_file=conf_file, secrets_dir=secrets_dir)
+
+        name: str = "app"
+        password: str = ""
+        token: str = ""
+
+    ArFiReader.setup_secrets_cache()
+    watcher = AppConfig.watch(interval=0.01, debounce=0)
+    assert watcher.settings.token == "token"
+    secrets_paths = {path.resolve() for path in (secrets_dir, *secrets_dir.rglob("*"))}
+    assert secrets_paths <= set(watcher.paths)
+
+    scan_dir = mocker.spy(cache, "scan_dir")
+    conf_file.write_text('name = "changed"')
+    assert watcher.poll().name == "changed"
+    assert scan_dir.call_count == 0
+
+    # The new files of the subdirectories are found
+    (secrets_dir / "nested" / "password").write_text("new secret")
+    assert watcher.changed()
+    assert watcher.poll().password == "new secret"
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_provenance_keys(cwd_to_tmp, monkeypatch):
+    from pydantic import AliasChoices, Field
+
+    from arfi_settings import EnvConfigDict, FieldSource
+
+    env_file = cwd_to_tmp / ".env"
+    env_file.write_text("App_Token=file_token\nPORT=1\n")
+    prod_env_file = cwd_to_tmp / "prod.env"
+    prod_env_file.write_text("APP_PORT=2\n")
+    monkeypatch.setenv("app_host", "env_host")
+
+    class AppConfig(ArFiSettings):
+        env_config = EnvConfigDict(env_prefix="app_", env_file=[env_file, prod_env_file])
+
+        host: str = ""
+        token: str = ""
+        port: int = Field(0, validation_alias=AliasChoices("APP_PORT", "PORT"))
+
+    config = AppConfig()
+    assert config.provenance["host"] == FieldSource("env_ordered_settings_handler", key="app_host")
+    assert config.provenance["token"] == FieldSource("env_file_ordered_settings_handler", env_file, "App_Token")
+    assert config.provenance["port"] == FieldSource("env_file_ordered_settings_handler", prod_env_file, "APP_PORT")
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_aload(cwd_to_tmp):
+    import asyncio
+    import threading
+
+    from arfi_settings import ArFiHandler, ArFiReader, ArFiSettingsError, AsyncLoader, FileConfigDict, async_loader
+
+    conf_file = cwd_to_tmp / "config.toml"
+    conf_file.write_text('name = "toml"')
+    json_file = cwd_to_tmp / "config.json"
+    json_file.write_text('{"level": "json"}')
+    threads = {}
+
+    class AsyncReader(ArFiReader):
+        def toml_reader(self):
+            threads["toml"] = threading.current_thread()
+            return super().toml_reader()
+
+        async def aread(self):
+            threads["aread"] = threading.current_thread()
+            await asyncio.sleep(0)
+            return self.read()
+
+    class AsyncHandler(ArFiHandler):
+        reader_class = AsyncReader
+
+    class AppConfig(ArFiSettings):
+        handler_class = AsyncHandler
+        file_config = FileConfigDict(conf_file=[conf_file, json_file])
+
+        name: str = "app"
+        level: str = "info"
+        port: int = 0
+
+    async def main():
+        threads["loop"] = threading.current_thread()
+        return await asyncio.gather(*(AppConfig.aload(port=port) for port in range(3)))
+
+    configs = asyncio.run(main())
+    assert [(config.name, config.level, config.port) for config in configs] == [
+        ("toml", "json", 0),
+        ("toml", "json", 1),
+        ("toml", "json", 2),
+    ]
+    assert threads["aread"] is threads["loop"]
+    assert threads["toml"] is threads["loop"]
+
+    # The default `aread` reads in a thread
+    config = AppConfig()
+    assert config.name == "toml"
+    reader = ArFiReader(file_path=json_file)
+    assert asyncio.run(reader.aread()) == {"level": "json"}
+
+    assert isinstance(async_loader, AsyncLoader)
+    with pytest.raises(ArFiSettingsError):
+        async_loader.setup(max_workers=0)
+    async_loader.setup(max_workers=1)
+    try:
+        assert asyncio.run(AppConfig.aload(port=5)).port == 5
+        assert async_loader.executor._max_workers == 1
+    finally:
+        async_loader.setup()
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+def test_class_body_detection(monkeypatch):
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+
+    monkeypatch.setenv("NAME", "from_env")
+
+    class Holder:
+        config = AppConfig()
+
+    assert Holder.config.name == "default"
+
+    def make():
+        assert AppConfig.__qualname__
+        return AppConfig()
+
+    assert "__qualname__" in make.__code__.co_names
+    assert make().name == "from_env"
+
+
+# @pytest.mark.current
+@pytest.mark.settings
+@pytest.mark.filterwarnings("ignore::Warning")
+def test_concurrent_aload_of_packages(tmp_path, monkeypatch):
+    import asyncio
+    import importlib.util
+
+    init_settings = InitSettings()
+    monkeypatch.setattr(arfi_settings.init_config, "init_settings", init_settings)
+
+    class AppConfig(ArFiSettings):
+        name: str = "default"
+        city: str = "default"
+        model_config = SettingsConfigDict(env_file=".env")
+
+    apps = {}
+    for name in ("pa", "pb"):
+        package_dir = tmp_path / name
+        (package_dir / "config").mkdir(parents=True)
+        (package_dir / "pyproject.toml").touch()
+        (package_dir / "config" / "config.toml").write_text(f'name = "{name}"')
+        (package_dir / ".env").write_text(f"CITY={name}")
+        # The same code in both packages
+        (package_dir / "app.py").write_text(
+            "def build(settings_class):\n"
+            "    return settings_class()\n"
+            "\n"
+            "\n"
+            "async def load(settings_class):\n"
+            "    return await settings_class.aload()\n"
+        )
+        spec = importlib.util.spec_from_file_location(f"{name}_app", package_dir / "app.py")
+        apps[name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(apps[name])
+
+    assert apps["pa"].build(AppConfig).name == "pa"
+
+    async def main():
+        return await asyncio.gather(*(apps[name].load(AppConfig) for _ in range(10) for name in ("pa", "pb")))
+
+    configs = asyncio.run(main())
+    assert [config.name for config in configs] == ["pa", "pb"] * 10
+    assert [config.city for config in configs] == ["pa", "pb"] * 10
+    assert [Path(config.BASE_DIR) for config in configs] == [(tmp_path / "pa").resolve(), (tmp_path / "pb").resolve()] * 10
+    assert apps["pb"].build(AppConfig).name == "pb"
+    # The dirs are kept by the readers, not by the shared reader class
+    assert ArFiReader.BASE_DIR is None
+    assert ArFiReader.ROOT_DIR is None
@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from pydantic.aliases import AliasPath
 from pydantic_core import PydanticUndefined
 
-from arfi_settings import ArFiSettings
+from arfi_settings import ArFiSettings, ArFiSettingsError
 from arfi_settings.utils import (
     allow_json_parse_failure,
     clean_value,
@@ -270,3 +270,80 @@ def test_allow_json_parse_failure():
     assert is_allow_union_5 is True
     assert is_allow_union_6 is True
     assert is_allow_func is False
+
+
+# @pytest.mark.current
+@pytest.mark.utils
+def test_weak_registry():
+    import gc
+
+    from arfi_settings.registry import WeakRegistry
+
+    class Item:
+        pass
+
+    registry = WeakRegistry(max_size=2)
+    first, second, third = Item(), Item(), Item()
+    registry.set(first, 1)
+    registry.set(second, 2)
+    assert registry.get(first) == 1
+    assert registry.get_object(id(second)) is second
+    # The live objects are never evicted
+    with pytest.raises(ArFiSettingsError, match="registry is full"):
+        registry.set(third, 3)
+    assert len(registry) == 2
+    assert registry.get(first) == 1
+    assert id(third) not in registry
+    registry.set(first, 10)
+    assert registry.get(first) == 10
+    registry.set(third, 3, max_size=3)
+    assert registry.get(third) == 3
+
+    first_id = id(first)
+    del first
+    gc.collect()
+    assert registry.get_object(first_id) is None
+    assert len(registry) == 2
+    # The place of the dead object is taken by the new one
+    fourth = Item()
+    registry.set(fourth, 4, max_size=3)
+    assert len(registry) == 3
+    assert registry.pop(second) == 2
+    assert len(registry) == 2
+
+
+# @pytest.mark.current
+@pytest.mark.utils
+def test_merge_layers():
+    from pydantic._internal._utils import deep_update
+
+    from arfi_settings.cache import freeze
+    from arfi_settings.merge import LayeredMerge, merge_layers
+
+    layers = [
+        {"a": 1, "b": {"x": 1, "y": {"z": 1}}, "c": {"k": 1}},
+        {"b": {"y": {"w": 2}}, "c": 2, "d": [1]},
+        freeze({"c": {"m": 3}, "b": {"x": 3}, "e": {"n": 3}}),
+        {"a": {"p": 4}, "b": {"y": 4}},
+    ]
+    expected = deep_update(*layers)
+    result = merge_layers(layers)
+    assert result == expected
+    assert list(result) == list(expected)
+    assert list(result["b"]) == list(expected["b"])
+    # The layers are not changed, not merged values are shared
+    assert layers[0] == {"a": 1, "b": {"x": 1, "y": {"z": 1}}, "c": {"k": 1}}
+    assert result["c"] is layers[2]["c"]
+    assert result["e"] is layers[2]["e"]
+    assert result["d"] is layers[1]["d"]
+    assert type(result["b"]) is dict
+
+    merge = LayeredMerge({})
+    assert not merge
+    assert merge.materialize() == {}
+    for layer in layers:
+        merge.add(layer)
+    assert merge.materialize() == expected
+    single = merge_layers([layers[2]])
+    assert single == layers[2]
+    assert type(single) is dict